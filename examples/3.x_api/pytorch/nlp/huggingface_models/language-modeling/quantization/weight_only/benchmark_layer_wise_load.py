@@ -0,0 +1,100 @@
+"""Count the checkpoint file opens and the wall time of one layer-wise RTN pass.
+
+The "per_tensor" mode builds a new CheckpointLoader for every tensor, which parses the index and opens the shard
+again like the loading before the loader cache. The "cached" mode is the default path, one loader per checkpoint
+which keeps the opened shards. Without --model, a random LLaMA checkpoint is saved to a temporary directory.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--model", type=str, default=None, help="Local checkpoint directory, a random LLaMA if None.")
+parser.add_argument("--num_layers", type=int, default=8, help="Decoder layers of the random LLaMA.")
+parser.add_argument("--hidden_size", type=int, default=1024, help="Hidden size of the random LLaMA.")
+parser.add_argument("--max_shard_size", type=str, default="100MB", help="Shard size of the random LLaMA.")
+parser.add_argument(
+    "--safe_serialization", type=int, default=1, help="1 saves the random LLaMA as safetensors, 0 as .bin."
+)
+parser.add_argument("--prefetch_depth", type=int, default=0, help="Modules loaded ahead on a background thread.")
+args = parser.parse_args()
+
+
+def save_random_llama(path):
+    """Save a random LLaMA checkpoint to the path."""
+    import torch
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    config = LlamaConfig(
+        hidden_size=args.hidden_size,
+        intermediate_size=args.hidden_size * 4,
+        num_hidden_layers=args.num_layers,
+        num_attention_heads=args.hidden_size // 64,
+        num_key_value_heads=args.hidden_size // 64,
+        vocab_size=32000,
+    )
+    torch.manual_seed(0)
+    LlamaForCausalLM(config).save_pretrained(
+        path, max_shard_size=args.max_shard_size, safe_serialization=bool(args.safe_serialization)
+    )
+
+
+def run_rtn(path, mode):
+    """Run one layer-wise RTN pass and count the opened checkpoint files.
+
+    Returns:
+        tuple: number of file opens and wall time in seconds.
+    """
+    from neural_compressor.torch.algorithms.layer_wise import utils as lw_utils
+    from neural_compressor.torch.quantization import RTNConfig, quantize
+    from neural_compressor.torch.utils import load_empty_model
+
+    lw_utils.close_checkpoint_loaders()
+    loaders = []
+
+    def per_tensor_loader(path):
+        loader = lw_utils.CheckpointLoader(path)
+        loaders.append(loader)
+        return loader
+
+    def cached_loader(path):
+        loader = get_checkpoint_loader(path)
+        if loader not in loaders:
+            loaders.append(loader)
+        return loader
+
+    get_checkpoint_loader = lw_utils.get_checkpoint_loader
+    model = load_empty_model(path)
+    quant_config = RTNConfig(use_layer_wise=True, model_path=path, prefetch_depth=args.prefetch_depth)
+    with mock.patch.object(
+        lw_utils, "get_checkpoint_loader", per_tensor_loader if mode == "per_tensor" else cached_loader
+    ):
+        start = time.time()
+        quantize(model, quant_config)
+        wall_time = time.time() - start
+    return sum(loader.num_opened_files for loader in loaders), wall_time
+
+
+def main():
+    """Compare the per-tensor loading with the cached loader."""
+    path = args.model
+    tmp_dir = None
+    if path is None:
+        tmp_dir = tempfile.mkdtemp()
+        path = tmp_dir
+        save_random_llama(path)
+    try:
+        print(f"{'mode':>10} {'file opens':>11} {'wall time(s)':>13}")
+        for mode in ("per_tensor", "cached"):
+            num_opens, wall_time = run_rtn(path, mode)
+            print(f"{mode:>10} {num_opens:>11} {wall_time:>13.2f}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
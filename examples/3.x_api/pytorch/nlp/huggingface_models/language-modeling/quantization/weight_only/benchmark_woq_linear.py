@@ -0,0 +1,138 @@
+"""Compare the latency and memory of INCWeightOnlyLinear with and without the cached dequantized weight.
+
+With cache_weight=True the module recovers the full-precision weight on the first forward and keeps it,
+with cache_weight=False every forward dequantizes the weight tile by tile and only keeps the packed weight.
+Each case runs in a fresh process so that the resident set size (RSS) of one case doesn't leak into another.
+The peak RSS growth includes the transient tiles of the fused forward, the retained RSS growth is measured after
+returning the freed heap memory to the system and only counts what the module keeps.
+"""
+
+import argparse
+import ctypes
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--in_features", type=int, default=4096, help="Input features of the linear layer.")
+parser.add_argument("--out_features", type=int, default=4096, help="Output features of the linear layer.")
+parser.add_argument("--tokens", type=int, default=1, help="Number of tokens in one forward, 1 for the decode step.")
+parser.add_argument("--bits", type=int, nargs="+", default=[2, 4, 8], help="Weight bits to benchmark.")
+parser.add_argument("--group_size", type=int, nargs="+", default=[32, 128, -1], help="Group sizes to benchmark.")
+parser.add_argument("--dequant_tile_size", type=int, default=1024, help="Output channels dequantized at once.")
+parser.add_argument("--iters", type=int, default=20, help="Number of timed forwards.")
+parser.add_argument("--warmup", type=int, default=3, help="Number of untimed forwards after the first one.")
+parser.add_argument("--num_threads", type=int, default=None, help="Intra-op threads, the torch default if None.")
+args = parser.parse_args()
+
+
+def _trim_heap():
+    """Return the freed heap memory to the system so that RSS only counts live memory (glibc only)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS (VmHWM) of the current process to its current RSS (Linux only)."""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _peak_rss():
+    """Get the peak RSS (VmHWM) of the current process in bytes (Linux only)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def run_case(bits, group_size, cache_weight):
+    """Quantize one random linear layer and time its forwards in the current process.
+
+    Returns:
+        dict: first forward latency, steady latency in ms and the peak and retained RSS growth in MB caused by
+            the forwards.
+    """
+    import psutil
+    import torch
+
+    from neural_compressor.torch.algorithms.weight_only.modules import INCWeightOnlyLinear
+    from neural_compressor.torch.algorithms.weight_only.utility import quant_tensor
+
+    torch.manual_seed(0)
+    if args.num_threads:
+        torch.set_num_threads(args.num_threads)
+    process = psutil.Process(os.getpid())
+    with torch.no_grad():
+        weight = torch.randn(args.out_features, args.in_features)
+        int_weight, scale, zp = quant_tensor(
+            weight, bits=bits, group_size=group_size, scheme="asym", return_int=True, quantile=1.0
+        )
+        module = INCWeightOnlyLinear(
+            args.in_features,
+            args.out_features,
+            bits=bits,
+            group_size=group_size,
+            zp=True,
+            bias=False,
+            cache_weight=cache_weight,
+            dequant_tile_size=args.dequant_tile_size,
+        )
+        module.pack(int_weight, scale, zp)
+        del weight, int_weight, scale, zp
+        inp = torch.randn(args.tokens, args.in_features)
+        _trim_heap()
+        rss_before = process.memory_info().rss
+        _reset_peak_rss()
+
+        start = time.perf_counter()
+        module(inp)
+        first_latency = time.perf_counter() - start
+        for _ in range(args.warmup):
+            module(inp)
+        start = time.perf_counter()
+        for _ in range(args.iters):
+            module(inp)
+        latency = (time.perf_counter() - start) / args.iters
+        peak_rss = _peak_rss()
+        _trim_heap()
+        rss_after = process.memory_info().rss
+    return {
+        "first_ms": first_latency * 1000,
+        "latency_ms": latency * 1000,
+        "peak_rss_mb": (peak_rss - rss_before) / 2**20,
+        "rss_mb": (rss_after - rss_before) / 2**20,
+    }
+
+
+def main():
+    """Benchmark every bits and group size with and without the weight cache."""
+    context = multiprocessing.get_context("spawn")
+    print(
+        f"linear {args.out_features}x{args.in_features}, {args.tokens} token(s), "
+        + f"dequant_tile_size {args.dequant_tile_size}, {args.iters} iterations"
+    )
+    header = (
+        f"{'bits':>4} {'group':>6} {'mode':>6} {'first(ms)':>10} {'latency(ms)':>12} "
+        + f"{'peak RSS(MB)':>13} {'retained RSS(MB)':>17}"
+    )
+    print(header)
+    print("-" * len(header))
+    for bits in args.bits:
+        for group_size in args.group_size:
+            for cache_weight in (True, False):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_case, bits, group_size, cache_weight).result()
+                print(
+                    f"{bits:>4} {group_size:>6} {'cache' if cache_weight else 'fused':>6} "
+                    + f"{result['first_ms']:>10.2f} {result['latency_ms']:>12.2f} "
+                    + f"{result['peak_rss_mb']:>13.1f} {result['rss_mb']:>17.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
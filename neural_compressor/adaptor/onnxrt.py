@@ -812,6 +812,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             iterations=list(range(0, iterations)),
             backend=self.backend,
             reduce_range=self.reduce_range,
+            num_workers=self.recipes.get("calibration_args", {}).get("num_workers", 1),
             **kwargs,
         )
         self.min_max = augment.dump_minmax(quantize_config)
@@ -1253,6 +1254,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
 
         model.graph().ClearField("node")
         model.graph().node.extend(new_nodes)
+        model.update()
 
         return model
 
@@ -1930,11 +1932,15 @@ class ONNXRT_WeightOnlyAdaptor(ONNXRUNTIMEAdaptor):
             from neural_compressor.adaptor.ox_utils.weight_only import rtn_quantize
 
             accuracy_level = self.recipes.get("rtn_args", {}).get("accuracy_level", 0)
+            num_workers = self.recipes.get("rtn_args", {}).get("num_workers", 1)
+            external_data_location = self.recipes.get("rtn_args", {}).get("external_data_location", None)
             tmp_model = rtn_quantize(
                 tmp_model,
                 quant_config,
                 accuracy_level=accuracy_level,
                 providers=[self.backend],
+                num_workers=num_workers,
+                external_data_location=external_data_location,
             )
         tmp_model.q_config = copy.deepcopy(quant_config)
         self._dump_model_op_stats(tmp_model, tune_cfg)
@@ -35,7 +35,7 @@ import onnxruntime
 from onnx import TensorProto, helper, shape_inference
 from packaging.version import Version
 
-from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR
+from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR, compute_calib_ranges
 from neural_compressor.adaptor.ox_utils.util import (
     _get_qrange_for_qType,
     calculate_scale_zp,
@@ -63,6 +63,7 @@ class ONNXRTAugment:
         iterations=[],
         backend="CPUExecutionProvider",
         reduce_range=False,
+        num_workers=1,
         **kwargs,
     ):
         """Initialization.
@@ -76,6 +77,8 @@ class ONNXRTAugment:
             iterations (list, optional): tensor of which iteration will be collected. Defaults to [].
             backend (list, optional): execution provider for onnxruntime. Defaults to ['CPUExecutionProvider'].
             reduce_range (bool, optional): use 7 bit or not. Defaults to False.
+            num_workers (int, optional): number of processes computing kl and percentile
+                calibration ranges of tensors concurrently. Defaults to 1.
         """
         self.model_wrapper = model_wrapper
         self.model = model_wrapper.model
@@ -94,6 +97,7 @@ class ONNXRTAugment:
         self.dynamically_quantized = False
         self.ort_version = Version(onnxruntime.__version__)
         self.reduce_range = reduce_range
+        self.num_workers = num_workers
 
         self.layer_wise = True if len(kwargs.get("split_model_input_names", [])) != 0 else False
         if self.layer_wise:
@@ -279,7 +283,6 @@ class ONNXRTAugment:
             name_to_node[data_name] = node.name
 
         activation_tensors_calib_range = {}
-        intermediate_tensor = {}
         name_to_calibrator = {}
         ort_inputs_for_next_split_model = []
         for idx, (inputs, labels) in enumerate(self.dataloader):
@@ -327,20 +330,14 @@ class ONNXRTAugment:
                         else:
                             calibrator = name_to_calibrator[node_output_names[output_idx]]
 
-                        # currently, the calibration range for each iteration is collected if
-                        # the calibration method is minmax, otherwise the tensor data is collected.
-                        # TODO: for kl and percentile method, need to support range collection
-                        # per iteration in the future.
+                        # the calibration range is collected per iteration for minmax method, while kl and
+                        # percentile methods fold each output into a histogram and compute the range at the end.
+                        calibrator.collect(output)
+                        name_to_calibrator[node_output_names[output_idx]] = calibrator
                         if calibrator.method_name == "minmax":
-                            calibrator.collect(output)
                             activation_tensors_calib_range[node_output_names[output_idx]] = [
                                 list(calibrator.calib_range)
                             ]
-                            name_to_calibrator[node_output_names[output_idx]] = calibrator
-                        else:
-                            intermediate_tensor.setdefault((node_output_names[output_idx], node_name), []).append(
-                                output
-                            )
                     elif q_config is None:
                         activation_tensors_calib_range.setdefault(node_output_names[output_idx], []).append(output)
 
@@ -357,21 +354,16 @@ class ONNXRTAugment:
             else:
                 _collect_data(ort_inputs)
 
-        # for kl and percentile method, collect calibration range after all tensors are collected.
-        merged_dict = intermediate_tensor
-        for (output_name, node_name), datas in merged_dict.items():
-            if any([data is None for data in datas]):
-                continue
-            calib_method = (
-                q_config[node_name]["activation"]["algorithm"]
-                if q_config and node_name in q_config and "activation" in q_config[node_name]
-                else "minmax"
-            )
-            calibrator = CALIBRATOR[calib_method]()
-            calibrator.collect(datas)
-            activation_tensors_calib_range.setdefault(output_name, []).append(list(calibrator.calib_range))
-            calibrator.clear()
-            del calibrator
+        # for kl and percentile method, compute calibration range after all tensors are collected.
+        histogram_calibrators = {
+            output_name: calibrator
+            for output_name, calibrator in name_to_calibrator.items()
+            if calibrator.method_name != "minmax"
+        }
+        calib_ranges = compute_calib_ranges(list(histogram_calibrators.values()), self.num_workers)
+        for output_name, calib_range in zip(histogram_calibrators.keys(), calib_ranges):
+            activation_tensors_calib_range.setdefault(output_name, []).append(list(calib_range))
+            histogram_calibrators[output_name].clear()
 
         # set for layer-wise quant
         self._dataloder_for_next_split_model = ort_inputs_for_next_split_model
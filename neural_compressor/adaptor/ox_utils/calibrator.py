@@ -22,10 +22,16 @@
 # --------------------------------------------------------------------------
 """Calibrator for onnx models."""
 
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
 CALIBRATOR = {}
 
+# histograms are extended with bins of the original width when the data range grows,
+# cap them at MAX_BINS_RATIO * num_bins so that streaming collection stays bounded.
+MAX_BINS_RATIO = 8
+
 
 def calib_registry(calib_method):
     """The class decorator used to register all Calibrator subclasses."""
@@ -113,6 +119,11 @@ class MinMaxCalibrator(CalibratorBase):
 class PercentileCalibrator(CalibratorBase):
     """Percentile calibrator class.
 
+    Each call of collect folds the data into a running histogram, so the calibrator
+    can be fed batch by batch and only keeps O(num_bins) values per tensor. When all the
+    batches have the same shape, the range is computed on the same bins as collecting them
+    at once, see HistogramCollector.calib_histogram.
+
     Args:
         num_bins (int, optional): number of bins to create a new histogram
                                     for collecting tensor values. Defaults to 2048.
@@ -125,20 +136,29 @@ class PercentileCalibrator(CalibratorBase):
         self.collector = None
         self.num_bins = num_bins
         self.percentile = percentile
+        self._need_update = False
 
     def collect_calib_data(self, datas):
-        """Collect calibration range."""
+        """Collect histogram of calibration data."""
         if not self.collector:
-            self.collector = HistogramCollector(self.num_bins)
+            self.collector = HistogramCollector(self.num_bins, max_bins=self.num_bins * MAX_BINS_RATIO)
         self.collector.collect_data(datas)
-        self.compute_percentile_range(self.percentile)
+        self._need_update = True
+
+    @property
+    def calib_range(self):
+        """Get calibration range value, computed lazily from the collected histogram."""
+        if self._need_update:
+            self.compute_percentile_range(self.percentile)
+            self._need_update = False
+        return self._calib_min, self._calib_max
 
     def compute_percentile_range(self, percentile):
         """Compute percentile range."""
         if percentile < 0 or percentile > 100:
             raise ValueError("Invalid percentile. Must be in range 0 <= percentile <= 100.")
 
-        calib_hist, calib_bin_edges, min_range, max_range, th = self.collector.histogram
+        calib_hist, calib_bin_edges, min_range, max_range, th = self.collector.calib_histogram
         total = calib_hist.sum()
         cdf = np.cumsum(calib_hist / total)
         percent_to_cut_one_side = (100.0 - percentile) / 200.0
@@ -156,6 +176,7 @@ class PercentileCalibrator(CalibratorBase):
         self._calib_min = None
         self._calib_max = None
         self.collector = None
+        self._need_update = False
 
     @property
     def method_name(self):
@@ -167,6 +188,11 @@ class PercentileCalibrator(CalibratorBase):
 class KLCalibrator(CalibratorBase):
     """KL calibrator class.
 
+    Each call of collect folds the data into a running histogram, so the calibrator
+    can be fed batch by batch and only keeps O(num_bins) values per tensor. When all the
+    batches have the same shape, the range is computed on the same bins as collecting them
+    at once, see HistogramCollector.calib_histogram.
+
     Args:
         num_bins (int, optional):number of bins to create a new histogram
                                     for collecting tensor values. Defaults to 128.
@@ -179,17 +205,26 @@ class KLCalibrator(CalibratorBase):
         self.collector = None
         self.num_bins = num_bins
         self.num_quantized_bins = num_quantized_bins
+        self._need_update = False
 
     def collect_calib_data(self, datas):
-        """Collect calibration range."""
+        """Collect histogram of calibration data."""
         if not self.collector:
-            self.collector = HistogramCollector(self.num_bins)
+            self.collector = HistogramCollector(self.num_bins, max_bins=self.num_bins * MAX_BINS_RATIO)
         self.collector.collect_data(datas)
-        self.compute_kl_range()
+        self._need_update = True
+
+    @property
+    def calib_range(self):
+        """Get calibration range value, computed lazily from the collected histogram."""
+        if self._need_update:
+            self.compute_kl_range()
+            self._need_update = False
+        return self._calib_min, self._calib_max
 
     def compute_kl_range(self):
         """Compute kl range."""
-        histogram = self.collector.histogram
+        histogram = self.collector.calib_histogram
         self._calib_min, self._calib_max = self.get_kl_threshold(histogram, self.num_quantized_bins)
 
     def get_kl_threshold(self, histogram, num_quantized_bins):
@@ -285,6 +320,7 @@ class KLCalibrator(CalibratorBase):
         self._calib_min = None
         self._calib_max = None
         self.collector = None
+        self._need_update = False
 
     @property
     def method_name(self):
@@ -293,21 +329,36 @@ class KLCalibrator(CalibratorBase):
 
 
 class HistogramCollector:
-    """Histogram collctor class."""
+    """Histogram collctor class.
 
-    def __init__(self, num_bins=2048):
+    Args:
+        num_bins (int, optional): number of bins of the initial histogram. Defaults to 2048.
+        max_bins (int, optional): upper bound of the number of bins. When combining histograms
+                                    exceeds it, adjacent bins are merged. Defaults to None (no bound).
+    """
+
+    def __init__(self, num_bins=2048, max_bins=None):
         """Initialize histogram collctor."""
         self._num_bins = num_bins
+        self._max_bins = max_bins
         self._histogram = None
+        # the shape of the collected data, False once data of different shapes is collected
+        self._data_shape = None
 
     def collect_data(self, datas):
         """Collect histogram data."""
         if isinstance(datas, list) and len(set([data.shape for data in datas])) != 1:
+            self._data_shape = False
             for data in datas:
                 if data.size == 0:  # pragma: no cover
                     continue
                 self._collect_value(data)
         else:
+            data_shape = datas[0].shape if isinstance(datas, list) else np.shape(datas)
+            if self._data_shape is None:
+                self._data_shape = data_shape
+            elif self._data_shape != data_shape:
+                self._data_shape = False
             datas = np.asarray(datas)
             datas = datas.flatten()
             assert datas.size > 0, "collected intermediate data size" "should not be 0, please check augmented_model"
@@ -325,6 +376,8 @@ class HistogramCollector:
             self._histogram = (hist, hist_edges, min_range, max_range, th)
         else:
             self._histogram = self.combine_histogram(self._histogram, data, min_range, max_range, th)
+            if self._max_bins is not None and len(self._histogram[0]) > self._max_bins:
+                self._histogram = self.merge_bins(self._histogram, self._max_bins)
 
     def combine_histogram(self, old_hist, data_arr, new_min, new_max, new_th):
         """Combine histogram."""
@@ -360,11 +413,92 @@ class HistogramCollector:
                 new_th,
             )
 
+    @staticmethod
+    def merge_bins(histogram, max_bins):
+        """Merge adjacent bins of a symmetric histogram so that it has at most max_bins bins.
+
+        The histogram is padded with empty bins on both sides so that the merged bins still
+        share edges with the original ones and stay symmetric around zero.
+        """
+        hist, hist_edges, min_range, max_range, th = histogram
+        num_bins = len(hist)
+        step = (hist_edges[-1] - hist_edges[0]) / num_bins
+        parity = num_bins % 2
+        factor = int(np.ceil(num_bins / max_bins))
+        while True:
+            # an odd histogram keeps its zero bin centered only when merged by an odd factor
+            if parity == 0 or factor % 2 == 1:
+                new_num_bins = int(np.ceil((num_bins - parity * factor) / 2 / factor)) * 2 + parity
+                if new_num_bins <= max_bins:
+                    break
+            factor += 1
+        pad = (new_num_bins * factor - num_bins) // 2
+        new_hist = np.pad(hist, (pad, pad)).reshape(new_num_bins, factor).sum(axis=1)
+        new_th = new_num_bins * factor * step / 2
+        new_hist_edges = np.linspace(-new_th, new_th, new_num_bins + 1)
+        return (new_hist, new_hist_edges, min_range, max_range, new_th)
+
+    @staticmethod
+    def rebin(histogram, num_bins):
+        """Rebin a histogram to num_bins bins over [-th, th], th being the largest absolute data value.
+
+        These are the bins of a histogram of all the data collected at once. The counts are
+        interpolated assuming the data is uniform inside each original bin and rounded so that
+        the total count is kept.
+        """
+        hist, hist_edges, min_range, max_range, _ = histogram
+        th = max(abs(min_range), abs(max_range))
+        if th == 0 or (len(hist) == num_bins and hist_edges[-1] == th):
+            return histogram
+        new_hist_edges = np.histogram_bin_edges(np.empty(0, np.result_type(th)), num_bins, range=(-th, th))
+        cdf = np.interp(new_hist_edges, hist_edges, np.concatenate(([0], np.cumsum(hist))))
+        cdf = np.rint(cdf).astype(np.int64)
+        cdf[0], cdf[-1] = 0, hist.sum()
+        return (np.diff(cdf), new_hist_edges, min_range, max_range, th)
+
     @property
     def histogram(self):
         """Get histogram."""
         return self._histogram
 
+    @property
+    def calib_histogram(self):
+        """Get the histogram to compute the calibration range.
+
+        Data of the same shape is flattened into a single histogram of num_bins bins when collected
+        at once, so when all the collected data has the same shape, the histogram is rebinned to
+        those bins. Otherwise each data is combined into the histogram in turn, which is kept as is.
+        """
+        if self._data_shape is False:
+            return self._histogram
+        return self.rebin(self._histogram, self._num_bins)
+
+
+def _get_calib_range(calibrator):
+    """Get calibration range of a calibrator, used as the task of worker processes."""
+    return calibrator.calib_range
+
+
+def compute_calib_ranges(calibrators, num_workers=1):
+    """Compute calibration ranges of independent calibrators.
+
+    The ranges of kl and percentile calibrators are computed from their histograms, which is
+    CPU bound Python code, so they are dispatched to a process pool when num_workers > 1.
+
+    Args:
+        calibrators (list): calibrators which have collected data.
+        num_workers (int, optional): number of worker processes. Defaults to 1 (serial).
+
+    Returns:
+        list: calibration ranges in the same order as calibrators.
+    """
+    num_workers = min(num_workers, len(calibrators))
+    if num_workers <= 1:
+        return [calibrator.calib_range for calibrator in calibrators]
+    chunksize = max(1, len(calibrators) // (num_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(_get_calib_range, calibrators, chunksize=chunksize))
+
 
 def smooth_distribution(p, eps=0.0001):
     """Smooth distribution.
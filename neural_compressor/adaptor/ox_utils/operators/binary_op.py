@@ -136,6 +136,7 @@ class BinaryDirect8BitOperator(Operator):
             for idx, parent in enumerate(parents):
                 if parent.op_type == "DequantizeLinear":
                     self.node.input[idx] = parent.input[0]
+                    self.quantizer.model.update_node_inputs(self.node)
                     self.quantizer.remove_nodes.append(parent)
             for child in children:
                 if child.op_type == "QuantizeLinear":
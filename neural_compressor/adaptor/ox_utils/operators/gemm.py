@@ -33,7 +33,7 @@ class GemmOperator(Operator):
     def quantize_check(self):
         """Check if quantizaion can be done."""
         node = self.node
-        if len(node.input) == 3 and not find_by_name(node.input[2], self.quantizer.model.initializer()):
+        if len(node.input) == 3 and not self.quantizer.model.get_initializer(node.input[2]):
             from neural_compressor.utils import logger
 
             logger.warning(
@@ -48,14 +48,14 @@ class GemmOperator(Operator):
         """Do quantizaion."""
         node = self.node
         self.quantizer.quantize_inputs(node, [0])
-        if self.per_channel and find_by_name(node.input[1], self.quantizer.model.initializer()):
+        if self.per_channel and self.quantizer.model.get_initializer(node.input[1]):
             self.quantizer.quantize_weights_per_channel(
                 node, [1], self.weight_dtype, self.weight_scheme, 0 if is_B_transposed(node) else 1
             )
         else:
             self.quantizer.quantize_inputs(node, [1])
 
-        if len(node.input) == 3 and find_by_name(node.input[2], self.quantizer.model.initializer()):
+        if len(node.input) == 3 and self.quantizer.model.get_initializer(node.input[2]):
             self.quantizer.quantize_bias_tensor(node)
             beta_attribute = [attr for attr in node.attribute if attr.name == "beta"]
             if len(beta_attribute):
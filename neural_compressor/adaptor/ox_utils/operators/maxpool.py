@@ -67,6 +67,7 @@ class MaxPoolOperator(Operator):
         ):  # pragma: no cover
             return
         node.input[0] = parent.input[0]
+        self.quantizer.model.update_node_inputs(node)
         node.output[0] = node.output[0].replace("_QuantizeInput", "_quantized")
         for child in children:
             if child.op_type == "QuantizeLinear":
@@ -100,6 +100,7 @@ class PadOperator(Operator):
         # Create an entry for output quantized value
         node.input[0] = parent.input[0]
         node.output[0] = child.output[0]
+        self.quantizer.model.update_node_inputs(node)
         self.quantizer.remove_nodes.extend([parent, child])
 
 
@@ -74,6 +74,7 @@ class UnaryDirect8BitOperator(Operator):
             for parent in parents:
                 if parent.op_type == "DequantizeLinear":
                     self.node.input[0] = parent.input[0]
+                    self.quantizer.model.update_node_inputs(self.node)
                     self.quantizer.remove_nodes.append(parents[0])
                     break
             for child in children:
@@ -244,8 +244,8 @@ class Quantizer:
                     for n in dq_nodes:
                         datas.append(
                             [
-                                onnx.numpy_helper.to_array(find_by_name(n.input[1], self.model.initializer())),
-                                onnx.numpy_helper.to_array(find_by_name(n.input[2], self.model.initializer())),
+                                onnx.numpy_helper.to_array(self.model.get_initializer(n.input[1])),
+                                onnx.numpy_helper.to_array(self.model.get_initializer(n.input[2])),
                             ]
                         )
                     for idx, data in enumerate(datas):
@@ -359,9 +359,7 @@ class Quantizer:
 
             if start_id == end_id:
                 if all([i.op_type in ["QuantizeLinear", "DequantizeLinear"] for i in match_nodes]):
-                    pair = [
-                        str(find_by_name(i.input[2], self.model.initializer()).data_type) for i in match_nodes[::-1]
-                    ]
+                    pair = [str(self.model.get_initializer(i.input[2]).data_type) for i in match_nodes[::-1]]
                     if " ".join(pair) in support_pair and support_pair[" ".join(pair)]:
                         self.replace_input.append(
                             [
@@ -444,7 +442,7 @@ class Quantizer:
         for idx, tensor_name in enumerate(node.input):
             if indices and idx not in indices:
                 continue
-            initializer = find_by_name(tensor_name, self.model.initializer())
+            initializer = self.model.get_initializer(tensor_name)
             if initializer is not None:
                 if initializer.data_type != onnx_proto.TensorProto.FLOAT:
                     continue
@@ -475,6 +473,7 @@ class Quantizer:
                     onnx.helper.make_node("Cast", [tensor_name], [name], to=dtype_mapping[cfg], name=name)
                 )
                 node.input[idx] = name
+                self.model.update_node_inputs(node)
                 self.new_value_info[name] = ValueInfo(tensor_name, TensorProto.FLOAT, dtype_mapping[cfg])
 
     def cast_outputs(self, node, cfg, indices=None):
@@ -547,7 +546,7 @@ class Quantizer:
         for idx, tensor_name in enumerate(node.input):
             if indices and idx not in indices:
                 continue
-            initializer = find_by_name(tensor_name, self.model.initializer())
+            initializer = self.model.get_initializer(tensor_name)
             if initializer is not None:
                 if initializer.data_type != onnx_proto.TensorProto.FLOAT:
                     return
@@ -571,6 +570,7 @@ class Quantizer:
                     weight = self._get_quantized_weight(initializer, dtype, scheme)
                     self._update_weight(weight)
                     node.input[idx] = weight.name
+                    self.model.update_node_inputs(node)
                     q_weight_name = weight.name + "_quantized"
                     zp_name = weight.name + "_zero_point"
                     scale_name = weight.name + "_scale"
@@ -595,6 +595,7 @@ class Quantizer:
                     weight = self._get_quantized_weight(initializer, dtype, scheme)
                     self._update_weight(weight)
                     node.input[idx] = weight.name
+                    self.model.update_node_inputs(node)
                     q_weight_name = weight.name + "_quantized"
                     zp_name = weight.name + "_zero_point"
                     scale_name = weight.name + "_scale"
@@ -673,10 +674,10 @@ class Quantizer:
                         ):
                             scale_name = tensor_name + "_scale"
                             zeropoint_name = tensor_name + "_zero_point"
-                            if find_by_name(scale_name, self.model.initializer()):
-                                self.model.remove_initializer(find_by_name(scale_name, self.model.initializer()))
-                            if find_by_name(zeropoint_name, self.model.initializer()):
-                                self.model.remove_initializer(find_by_name(zeropoint_name, self.model.initializer()))
+                            if self.model.get_initializer(scale_name):
+                                self.model.remove_initializer(self.model.get_initializer(scale_name))
+                            if self.model.get_initializer(zeropoint_name):
+                                self.model.remove_initializer(self.model.get_initializer(zeropoint_name))
                             qlinear_node = onnx.helper.make_node(
                                 "DynamicQuantizeLinear",
                                 [tensor_name],
@@ -712,7 +713,7 @@ class Quantizer:
             or input_name not in self.quantized_value_map
             or (
                 input_name in self.quantized_value_map
-                and find_by_name(self.quantized_value_map[input_name].scale_name, self.model.initializer()) is None
+                and self.model.get_initializer(self.quantized_value_map[input_name].scale_name) is None
             )
         ):
             self._dynamic_quantize_bias(input_name, weight_name + "_scale", bias_name, bias_name + "_quantized")
@@ -724,7 +725,7 @@ class Quantizer:
                     beta = onnx.helper.get_attribute_value(beta_attribute[0])
             _, quant_value = self.quantize_bias(bias_name, input_name, weight_name, beta)
             if self.model.get_initializer_share_num(bias_name) == 1:
-                self.model.remove_initializer(find_by_name(bias_name, self.model.initializer()))
+                self.model.remove_initializer(self.model.get_initializer(bias_name))
             inputs = [quant_value.q_name, quant_value.scale_name, quant_value.zp_name]
             axis = None
             if find_by_name(weight_name + "_DequantizeLinear", self.new_nodes):
@@ -733,9 +734,7 @@ class Quantizer:
                     axis = find_by_name("axis", dq_node.attribute).i
             dequant_node = make_dquant_node(bias_name + "_DequantizeLinear", inputs, [bias_name + "_dequantized"], axis)
             self.new_nodes.append(dequant_node)
-            self.replace_input.append(
-                [find_by_name(node.name, self.model.nodes()), bias_name, bias_name + "_dequantized"]
-            )
+            self.replace_input.append([self.model.get_node(node.name), bias_name, bias_name + "_dequantized"])
 
     def quantize_bias(self, bias_name, input_name, weight_name, beta=1.0):
         """Quantized the bias.
@@ -743,7 +742,7 @@ class Quantizer:
         Zero Point == 0 and Scale == Input_Scale * Weight_Scale
         """
         # get scale for weight
-        weight_scale_initializer = find_by_name(weight_name + "_scale", self.model.initializer())
+        weight_scale_initializer = self.model.get_initializer(weight_name + "_scale")
         weight_scale = (
             self.tensor_proto_to_array(weight_scale_initializer, os.path.dirname(self.model.model_path))
             if self.model.model_path is not None
@@ -751,7 +750,7 @@ class Quantizer:
         )
 
         # get bias
-        bias_initializer = find_by_name(bias_name, self.model.initializer())
+        bias_initializer = self.model.get_initializer(bias_name)
         bias_data = (
             self.tensor_proto_to_array(bias_initializer, os.path.dirname(self.model.model_path))
             if self.model.model_path is not None
@@ -765,7 +764,7 @@ class Quantizer:
             _, input_scale_name, _, _, _ = self._get_quantization_params(input_name)
         else:
             raise ValueError(f"Expected {input_name} to be in quantized value map for static quantization")
-        inputscale_initializer = find_by_name(input_scale_name, self.model.initializer())
+        inputscale_initializer = self.model.get_initializer(input_scale_name)
         input_scale = (
             self.tensor_proto_to_array(inputscale_initializer, os.path.dirname(self.model.model_path))
             if self.model.model_path is not None
@@ -880,6 +879,7 @@ class Quantizer:
                     axis,
                 )
                 node.input[idx] = weight_name
+                self.model.update_node_inputs(node)
                 self.replace_input.append([node, weight_name, dequant_node.output[0]])
                 self.new_nodes.extend([qlinear_node, dequant_node])
             else:
@@ -895,6 +895,7 @@ class Quantizer:
                 )
                 self.new_nodes.append(dequant_node)
                 node.input[idx] = weight_name
+                self.model.update_node_inputs(node)
 
                 # Replace weight_name with output of DequantizeLinear
                 self.replace_input.append([node, weight_name, dequant_node.output[0]])
@@ -909,7 +910,7 @@ class Quantizer:
         if name in self.quantized_value_map:
             return (name + "_quantized", name + "_zero_point", name + "_scale")
 
-        initializer = find_by_name(weight_name, self.model.initializer())
+        initializer = self.model.get_initializer(weight_name)
         if initializer is None:
             raise ValueError("{} is not an initializer", weight_name)
 
@@ -1078,7 +1079,7 @@ class Quantizer:
             quantized_bias_name (string): bias name
         """
         # Add tensors for the shape to be reshaped to
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         if weight is None:
             raise ValueError("Expected {} to be an initializer".format(node.input[1]))
 
@@ -1109,7 +1110,7 @@ class Quantizer:
 
     def is_valid_quantize_weight(self, weight_name):
         """Check weight can be quantized."""
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         if weight is not None:
             return weight.data_type == onnx_proto.TensorProto.FLOAT
         else:
@@ -374,6 +374,7 @@ class ORTSmoothQuant:
                                 for idx, inp in enumerate(child.input):
                                     if inp == node.output[0]:
                                         child.input[idx] = node.input[0]
+                                self.model.update_node_inputs(child)
         self.model.remove_nodes(remove_nodes)
 
     def _dump_op_info(self, percentile, op_types, iterations, quantize_config=None):
@@ -190,6 +190,7 @@ def split_shared_bias(model):
                     )
                     model.add_initializer(new_input)
                     node.input[2] = new_input_name
+                    model.update_node_inputs(node)
     return model
 
 
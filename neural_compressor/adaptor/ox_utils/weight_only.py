@@ -22,11 +22,14 @@ import math
 import os
 import struct
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import onnx
 from onnx import helper, numpy_helper
 from onnx import onnx_pb as onnx_proto
+from onnx.external_data_helper import ExternalDataInfo, set_external_data
 from packaging.version import Version
 
 from neural_compressor.adaptor.ox_utils.util import dtype_mapping, simple_progress_bar
@@ -229,9 +232,7 @@ def quant_tensor(data, num_bits=4, group_size=32, scheme="asym", dtype="int", ra
         )
     else:
         scale = np.ones(rmax.shape)
-        scale[rmin != rmax] = np.array(
-            [float(i) / (maxq - minq) for i in (rmax - rmin)[rmin != rmax].flatten().tolist()]
-        )
+        scale[rmin != rmax] = (rmax - rmin)[rmin != rmax].astype(np.float64) / (maxq - minq)
         zero_point = (
             ((np.zeros(scale.shape) - rmin) / scale).round()
             if dtype == "int"
@@ -290,6 +291,52 @@ def pad_tensor(weight, group_size, k_blocks):
     return weight
 
 
+def _get_weight_array(weight_tensor, base_dir):
+    """Get the array of a weight, the data in an external data file is memory-mapped instead of read.
+
+    Args:
+        weight_tensor (TensorProto): weight initializer
+        base_dir (str): directory of the external data file
+
+    Returns:
+        weight: read-only array of the weight
+    """
+    if weight_tensor.data_location == onnx_proto.TensorProto.EXTERNAL and weight_tensor.data_type in [
+        onnx_proto.TensorProto.FLOAT,
+        onnx_proto.TensorProto.FLOAT16,
+        onnx_proto.TensorProto.DOUBLE,
+    ]:
+        info = ExternalDataInfo(weight_tensor)
+        return np.memmap(
+            os.path.join(base_dir, info.location),
+            dtype=helper.tensor_dtype_to_np_dtype(weight_tensor.data_type),
+            mode="r",
+            offset=info.offset or 0,
+            shape=tuple(weight_tensor.dims),
+        )
+    return numpy_helper.to_array(weight_tensor, base_dir=base_dir)
+
+
+def _ordered_map(func, tasks, num_workers):
+    """Apply func to tasks in a thread pool and yield the results in order.
+
+    At most num_workers tasks are in flight, so the number of results kept in memory is bounded.
+    """
+    if num_workers <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = deque()
+        for task in tasks:
+            if len(futures) >= num_workers:
+                yield futures.popleft().result()
+            futures.append(executor.submit(func, task))
+        while futures:
+            yield futures.popleft().result()
+
+
 def rtn_quantize(
     model,
     weight_config={},
@@ -299,6 +346,8 @@ def rtn_quantize(
     ratios={},
     accuracy_level=0,
     providers=["CPUExecutionProvider"],
+    num_workers=1,
+    external_data_location=None,
 ):
     """Quant the model with round to nearst method.
 
@@ -323,6 +372,9 @@ def rtn_quantize(
                               2 (fp16 compute type of jblas kernel), 3 (bf16 compute type of jblas kernel),
                               4 (int8 compute type of jblas kernel)
         providers (list): providers to use
+        num_workers (int, optional): number of threads quantizing weights concurrently. Defaults to 1.
+        external_data_location (str, optional): file to write the new initializers to, relative to the
+            directory of the model. Defaults to None, which keeps them in the model.
 
     Returns:
         model: fake quantized ONNXModel
@@ -331,85 +383,121 @@ def rtn_quantize(
     base_dir = os.path.dirname(model.model_path) if model.model_path is not None else ""
     new_nodes = []
     remove_nodes = []
-    total_num = len([i for i in model.nodes() if i.op_type in ["MatMul"]])
-    curr_id = 0
+
+    # decide the config of each weight first, the weights are loaded and quantized in _quant
+    tasks = []
     for node in model.nodes():
-        if node.op_type in ["MatMul"]:
-            curr_id += 1
-            simple_progress_bar(total_num, curr_id)
         if (
             node.op_type in ["MatMul"]
             and model.get_initializer(node.input[1]) is not None
             and weight_config.get(node.name, {}) != "fp32"
         ):
             weight_tensor = model.get_initializer(node.input[1])
-            weight = numpy_helper.to_array(weight_tensor, base_dir=base_dir).copy()
-            if len(weight.shape) != 2:
+            if len(weight_tensor.dims) != 2:
                 continue
 
-            dtype = weight.dtype
-
             if node.name in weight_config:
                 num_bits = weight_config[node.name]["bits"]
                 group_size = weight_config[node.name]["group_size"]
                 scheme = weight_config[node.name]["scheme"]
 
-            org_w_shape = weight.shape  # ic, oc
+            org_w_shape = tuple(weight_tensor.dims)  # ic, oc
             group_size = group_size if group_size != -1 else org_w_shape[0]
 
-            k_blocks = (org_w_shape[0] - 1) // group_size + 1
-            init_share_num = model.get_initializer_share_num(node.input[1])
-
-            weight = pad_tensor(weight, group_size, k_blocks)
-
             satisfy_MatMulNBits_condition = Version(ort.__version__) > ONNXRT1161_VERSION and num_bits == 4
             satisfy_MatMulFpQ4_condition = (
                 Version(ort.__version__) >= ONNXRT116_VERSION and num_bits == 4 and group_size == 32
             )
-            if ("CUDAExecutionProvider" in providers and satisfy_MatMulNBits_condition) or (
+            # MatMulFpQ4 support 4 bits and 32 group_size with ort 1.16.0 and 1.16.1 versions, supported by CPU EP
+            # MatMulNBits supports 4 bits and 2^n group_size with ort > 1.16.1, supported by CPU EP AND CUDA EP
+            use_weight_only_op = ("CUDAExecutionProvider" in providers and satisfy_MatMulNBits_condition) or (
                 "CUDAExecutionProvider" not in providers
                 and (satisfy_MatMulFpQ4_condition or satisfy_MatMulNBits_condition)
-            ):  # pragma: no cover
-                # MatMulFpQ4 support 4 bits and 32 group_size with ort 1.16.0 and 1.16.1 versions, supported by CPU EP
-                # MatMulNBits supports 4 bits and 2^n group_size with ort > 1.16.1, supported by CPU EP AND CUDA EP
-                q_weight, scale, zp = quant_tensor(
-                    weight.T, num_bits, group_size, scheme, "uint", ratios.get(node.input[1], 1)
-                )
-                q_matmul_node, new_inits = make_matmul_weight_only_node(
-                    node=node,
-                    weight_shape=org_w_shape,
-                    num_bits=num_bits,
-                    group_size=group_size,
-                    k_blocks=k_blocks,
-                    q_weight=q_weight.astype("uint8"),
-                    scale=scale.astype(dtype),
-                    zero_point=zp if scheme == "asym" else None,
-                    accuracy_level=accuracy_level,
-                )
+            )
+            tasks.append((node, weight_tensor, num_bits, group_size, scheme, use_weight_only_op))
+
+    def _quant(task):
+        node, weight_tensor, num_bits, group_size, scheme, use_weight_only_op = task
+        weight = _get_weight_array(weight_tensor, base_dir)
+        dtype = weight.dtype
+        org_w_shape = weight.shape
+        k_blocks = (org_w_shape[0] - 1) // group_size + 1
+        weight = pad_tensor(weight, group_size, k_blocks)
+
+        if use_weight_only_op:  # pragma: no cover
+            q_weight, scale, zp = quant_tensor(
+                weight.T, num_bits, group_size, scheme, "uint", ratios.get(node.input[1], 1)
+            )
+            return make_matmul_weight_only_node(
+                node=node,
+                weight_shape=org_w_shape,
+                num_bits=num_bits,
+                group_size=group_size,
+                k_blocks=k_blocks,
+                q_weight=q_weight.astype("uint8"),
+                scale=scale.astype(dtype),
+                zero_point=zp if scheme == "asym" else None,
+                accuracy_level=accuracy_level,
+            )
 
-                model.add_initializers(new_inits)
+        q_weight = qdq_tensor(weight.T, num_bits, group_size, scheme, "int", ratios.get(node.input[1], 1))
+        q_weight = np.reshape(q_weight, (org_w_shape[1], -1))
+        q_weight = np.transpose(q_weight)
+        q_weight = q_weight[: org_w_shape[0], :].astype(dtype)
+        q_weight_tensor = onnx.helper.make_tensor(
+            name=node.input[1] + "_Q{}G{}".format(str(num_bits), str(group_size)),
+            data_type=dtype_mapping[str(dtype)],
+            dims=q_weight.shape,
+            vals=q_weight.tobytes(),
+            raw=True,
+        )
+        return None, [q_weight_tensor]
+
+    data_file = None
+    if external_data_location is not None:
+        assert model.model_path is not None, "external_data_location requires the path of the model."
+        data_path = os.path.join(base_dir, external_data_location)
+        for task in tasks:
+            weight_tensor = task[1]
+            if weight_tensor.data_location == onnx_proto.TensorProto.EXTERNAL:
+                assert os.path.abspath(
+                    os.path.join(base_dir, ExternalDataInfo(weight_tensor).location)
+                ) != os.path.abspath(data_path), "external_data_location can't be the external data file of weights."
+        data_file = open(data_path, "wb")
+
+    try:
+        for curr_id, (task, (q_matmul_node, new_inits)) in enumerate(
+            zip(tasks, _ordered_map(_quant, tasks, num_workers)), 1
+        ):
+            simple_progress_bar(len(tasks), curr_id)
+            node, weight_tensor = task[0], task[1]
+            init_share_num = model.get_initializer_share_num(node.input[1])
+            for tensor in new_inits:
+                if data_file is not None and tensor.HasField("raw_data") and model.get_initializer(tensor.name) is None:
+                    # move the data to the external data file so that only one weight is in memory,
+                    # tensors with typed fields like the int64 shape of MatMulFpQ4 are kept inline
+                    offset = data_file.tell()
+                    data_file.write(tensor.raw_data)
+                    set_external_data(tensor, external_data_location, offset, len(tensor.raw_data))
+                    tensor.ClearField("raw_data")
+            model.add_initializers(new_inits)
+            if q_matmul_node is not None:
                 remove_nodes.append(node)
                 new_nodes.append(q_matmul_node)
             else:
-                q_weight = qdq_tensor(weight.T, num_bits, group_size, scheme, "int", ratios.get(node.input[1], 1))
-                q_weight = np.reshape(q_weight, (org_w_shape[1], -1))
-                q_weight = np.transpose(q_weight)
-                q_weight = q_weight[: org_w_shape[0], :].astype(dtype)
-                q_weight_tensor = onnx.helper.make_tensor(
-                    name=node.input[1] + "_Q{}G{}".format(str(num_bits), str(group_size)),
-                    data_type=dtype_mapping[str(dtype)],
-                    dims=weight.shape,
-                    vals=q_weight.tobytes(),
-                    raw=True,
-                )
-                model.add_initializer(q_weight_tensor)
-                node.input[1] = q_weight_tensor.name
+                node.input[1] = new_inits[0].name
+                model.update_node_inputs(node)
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
+    finally:
+        if data_file is not None:
+            data_file.close()
 
     model.add_nodes(new_nodes)
     model.remove_nodes(remove_nodes)
     model.topological_sort()
+    if data_file is not None:
+        model.check_is_large_model()
     return model
 
 
@@ -520,6 +608,7 @@ def apply_awq_scale(model, weight_config, absorb_pairs, output_dicts, num_bits,
             )
             model.add_initializer(new_tensor)
             node.input[1] = new_tensor.name
+            model.update_node_inputs(node)
 
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
@@ -1165,6 +1254,7 @@ def gptq_quantize(
                 )
                 model.add_initializer(q_weight_tensor)
                 node.input[1] = q_weight_tensor.name
+                model.update_node_inputs(node)
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
 
@@ -288,9 +288,15 @@ class PreOptimization:
         self.analyzer.graph = self._tmp_graph_def
         self.analyzer.parse_graph()
         res = []
-
-        for sub_pattern in patterns:
-            res.extend([i for i in self.analyzer.query_fusion_pattern_nodes(sub_pattern) if i not in res])
+        matched = set()
+
+        for sub_pattern_res in self.analyzer.query_multi_fusion_pattern_nodes(patterns):
+            for i in sub_pattern_res:
+                # the op types are decided by the node names
+                key = tuple(i[:-1])
+                if key not in matched:
+                    matched.add(key)
+                    res.append(i)
         return res
 
     def has_positive_input(self, node_name):
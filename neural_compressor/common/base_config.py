@@ -19,6 +19,7 @@
 from __future__ import annotations
 
 import copy
+import functools
 import inspect
 import json
 import os
@@ -179,6 +180,97 @@ def register_config(framework_name: str, algo_name: str, priority: Union[float,
     return config_registry.register_config_impl(framework_name=framework_name, algo_name=algo_name, priority=priority)
 
 
+class OpNameMatcher:
+    """Match op names against the op name patterns of the local configs.
+
+    A pattern matches an op name if `re.match(pattern, op_name)` does, and among the matched patterns the last one
+    has the highest priority, which is how the local configs override each other. Instead of trying each pattern,
+    the mandatory prefixes of the patterns, made of literal characters and `.`, are merged into a trie. An op name
+    walks the trie once to collect the candidate patterns, and only the candidates which are not fully described by
+    their prefixes are checked with the compiled regex. The results are memorized, so the same op names of a model
+    are matched only once across tuning trials.
+
+    Example:
+        matcher = OpNameMatcher(["model.layers.0.mlp.fc1", ".*lm_head"])
+        matcher.match("model.lm_head")  # ".*lm_head"
+    """
+
+    _META_CHARS = frozenset("\\.^$*+?{}[]|()")
+    _QUANTIFIERS = frozenset("*+?{")
+
+    def __init__(self, patterns: List[str]) -> None:
+        """Init an OpNameMatcher.
+
+        Args:
+            patterns (List[str]): The op name patterns, a later pattern has a higher priority.
+        """
+        self.patterns = list(patterns)
+        # the trie node is a dict of {char: child node}, the patterns ending at a node are kept under the None key
+        self._trie = {}
+        self._regexes = {}
+        for index, pattern in enumerate(self.patterns):
+            prefix = self._get_prefix(pattern)
+            if prefix != pattern:
+                self._regexes[index] = re.compile(pattern)
+            node = self._trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(index)
+        self._cache = {}
+
+    @classmethod
+    def _get_prefix(cls, pattern: str) -> str:
+        """Get the prefix that every op name matched by the pattern starts with, `.` matches any character."""
+        if "|" in pattern:
+            return ""
+        for i, char in enumerate(pattern):
+            if char != "." and char in cls._META_CHARS:
+                return pattern[:i]
+            if i + 1 < len(pattern) and pattern[i + 1] in cls._QUANTIFIERS:
+                return pattern[:i]
+        return pattern
+
+    def _match_index(self, op_name: str) -> int:
+        best_index = -1
+        nodes = [self._trie]
+        for pos in range(len(op_name) + 1):
+            next_nodes = []
+            for node in nodes:
+                for index in node.get(None, ()):
+                    if index > best_index and (index not in self._regexes or self._regexes[index].match(op_name)):
+                        best_index = index
+                if pos < len(op_name):
+                    char = op_name[pos]
+                    if char in node:
+                        next_nodes.append(node[char])
+                    if char != "." and "." in node:
+                        next_nodes.append(node["."])
+            if not next_nodes:
+                break
+            nodes = next_nodes
+        return best_index
+
+    def match(self, op_name: str) -> Optional[str]:
+        """Get the pattern with the highest priority which matches the op name.
+
+        Args:
+            op_name (str): The op name.
+
+        Returns:
+            The matched pattern, None if no pattern matches the op name.
+        """
+        if op_name not in self._cache:
+            self._cache[op_name] = self._match_index(op_name)
+        index = self._cache[op_name]
+        return self.patterns[index] if index >= 0 else None
+
+
+@functools.lru_cache(maxsize=32)
+def _get_op_name_matcher(patterns: Tuple[str]) -> OpNameMatcher:
+    # the expanded configs of different trials share the same op name patterns
+    return OpNameMatcher(patterns)
+
+
 class BaseConfig(ABC):
     """The base config for all algorithm configs.
 
@@ -581,14 +673,15 @@ class BaseConfig(ABC):
         for config in config_list:
             global_config = config.global_config
             op_type_config_dict, op_name_config_dict = config._get_op_name_op_type_config()
+            matcher = _get_op_name_matcher(tuple(op_name_config_dict))
             for op_name, op_type in model_info:
                 if self.global_config is not None:
                     config_mapping[(op_name, op_type)] = global_config
                 if op_type in op_type_config_dict:
                     config_mapping[(op_name, op_type)] = op_type_config_dict[op_type]
-                for op_name_pattern in op_name_config_dict:
-                    if re.match(op_name_pattern, op_name):
-                        config_mapping[(op_name, op_type)] = op_name_config_dict[op_name_pattern]
+                op_name_pattern = matcher.match(op_name)
+                if op_name_pattern is not None:
+                    config_mapping[(op_name, op_type)] = op_name_config_dict[op_name_pattern]
         return config_mapping
 
     @staticmethod
@@ -758,13 +851,14 @@ class ComposableConfig(BaseConfig):
         config_mapping = OrderedDict()
         for config in self.config_list:
             op_type_config_dict, op_name_config_dict = config._get_op_name_op_type_config()
+            matcher = _get_op_name_matcher(tuple(op_name_config_dict))
             single_config_model_info = model_info.get(config.name, None)
             for op_name, op_type in single_config_model_info:
                 if op_type in op_type_config_dict:
-                    config_mapping[(op_name, op_type)] = op_name_config_dict[op_type]
-                for op_name_pattern in op_name_config_dict:
-                    if re.match(op_name_pattern, op_name):
-                        config_mapping[(op_name, op_type)] = op_name_config_dict[op_name_pattern]
+                    config_mapping[(op_name, op_type)] = op_type_config_dict[op_type]
+                op_name_pattern = matcher.match(op_name)
+                if op_name_pattern is not None:
+                    config_mapping[(op_name, op_type)] = op_name_config_dict[op_name_pattern]
         return config_mapping
 
     @classmethod
@@ -13,8 +13,13 @@
 # limitations under the License.
 """The auto-tune module."""
 
+import argparse
 import copy
+import multiprocessing
+import os
+import sys
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Sized, Tuple, Union
 
 from neural_compressor.common.base_config import BaseConfig
@@ -32,6 +37,7 @@ __all__ = [
     "SequentialSampler",
     "default_sampler",
     "ConfigSet",
+    "ParallelTrialRunner",
 ]
 
 
@@ -361,6 +367,8 @@ class TuningConfig:
         sampler: Sampler = default_sampler,
         tolerable_loss=0.01,
         max_trials=100,
+        num_parallel_trials=1,
+        cores_per_trial=None,
     ):
         """Initial a TuningConfig.
 
@@ -370,11 +378,20 @@ class TuningConfig:
             tolerable_loss: This float indicates how much metric loss we can accept.
                 The metric loss is relative, it can be both positive and negative. Default is 0.01.
             max_trials: Max tuning times. Combine with `tolerable_loss` field to decide when to stop. Default is 100.
+            num_parallel_trials: The number of trials run at once, each in a worker process bound to its own
+                cores. The trials are still recorded in order, so the tuning stops at the same trial and
+                chooses the same best config as running them one by one. The trials of PyTorch models on CPU
+                run in forked workers, the trials of TensorFlow models in spawned workers which load the model
+                again, see `ParallelTrialRunner.is_supported`. Default is 1.
+            cores_per_trial: The number of physical cores bound to each worker process. Default is None,
+                which splits the cores of NUMA node 0 evenly.
         """
         self.config_set = config_set
         self.sampler = sampler
         self.tolerable_loss = tolerable_loss
         self.max_trials = max_trials
+        self.num_parallel_trials = num_parallel_trials
+        self.cores_per_trial = cores_per_trial
 
 
 class _TrialRecord:
@@ -479,6 +496,176 @@ class TuningMonitor:
         return reach_max_trials or meet_accuracy_goal
 
 
+# the trial function of the running ParallelTrialRunner, inherited by the forked worker processes
+_trial_fn = None
+
+
+def _init_trial_worker(core_queue, worker_init_fn, trial_fn=None):
+    """Bind the worker process to its cores, the spawned worker processes get the trial function here."""
+    import psutil
+
+    global _trial_fn
+    if trial_fn is not None:
+        _trial_fn = trial_fn
+
+    cores = core_queue.get()
+    try:
+        psutil.Process().cpu_affinity(cores)
+    except (AttributeError, ValueError, OSError) as e:  # pragma: no cover
+        logger.warning(f"Failed to bind the trial worker {os.getpid()} to cores {cores}: {e}")
+    if worker_init_fn is not None:
+        worker_init_fn(cores)
+
+
+def _run_trial(quant_config):
+    """Run a trial in a worker process."""
+    return _trial_fn(quant_config)
+
+
+class ParallelTrialRunner:
+    """Run the trials of auto-tune in worker processes bound to different cores.
+
+    The trial function takes a quant config and returns the evaluation result of the quantized model. By default
+    the worker processes are forked, so the trial function, the model and the evaluation function don't need to
+    be picklable, but only the evaluation results are sent back. With the "spawn" start method the workers start
+    from a fresh interpreter and the trial function is pickled to them, for frameworks whose runtime doesn't
+    survive forking. Up to `num_parallel_trials` trials run at
+    once, and their results are added to the tuning monitor in the order of the config loader, so the tuning
+    stops at the same trial and has the same best trial as running the trials one by one.
+
+    Example:
+        runner = ParallelTrialRunner(trial_fn, num_parallel_trials=4)
+        stop_trial_index = runner.run(config_loader, tuning_logger, tuning_monitor)
+    """
+
+    def __init__(
+        self,
+        trial_fn: Callable[[BaseConfig], Union[float, int]],
+        num_parallel_trials: int,
+        cores_per_trial: Optional[int] = None,
+        worker_init_fn: Optional[Callable[[List[int]], None]] = None,
+        start_method: str = "fork",
+    ) -> None:
+        """Init a ParallelTrialRunner.
+
+        Args:
+            trial_fn: Quantize and evaluate the model with a quant config.
+            num_parallel_trials: The number of trials run at once.
+            cores_per_trial: The number of physical cores bound to each worker. Defaults to None,
+                which splits the cores of NUMA node 0 evenly.
+            worker_init_fn: Called with the bound cores in each worker, e.g. to set the number of threads.
+                Defaults to None.
+            start_method: "fork" or "spawn", how the worker processes are started. With "spawn" the trial
+                function and `worker_init_fn` must be picklable. Defaults to "fork".
+        """
+        self.trial_fn = trial_fn
+        self.num_parallel_trials = num_parallel_trials
+        self.cores_per_trial = cores_per_trial
+        self.worker_init_fn = worker_init_fn
+        self.start_method = start_method
+
+    @staticmethod
+    def is_supported(start_method: str = "fork") -> bool:
+        """Check whether the worker processes can be started safely.
+
+        Forking is not safe once TensorFlow or the runtime of an accelerator is initialized in the process,
+        their threads and device contexts are not copied into the workers. Spawned workers don't inherit the
+        process state. A warning is logged with the reason when the trials have to run one by one.
+        """
+        reason = None
+        if start_method not in multiprocessing.get_all_start_methods():
+            reason = f"{start_method} is not available"
+        elif start_method == "fork" and "tensorflow" in sys.modules:
+            reason = "TensorFlow is loaded"
+        elif start_method == "fork" and "torch" in sys.modules:
+            torch = sys.modules["torch"]
+            for device_type in ["cuda", "xpu", "hpu"]:
+                is_initialized = getattr(getattr(torch, device_type, None), "is_initialized", None)
+                if is_initialized is not None and is_initialized():
+                    reason = f"the {device_type} runtime is initialized"
+                    break
+        if reason is not None:
+            logger.warning(
+                f"Parallel trials need to {start_method} worker processes but {reason}, run the trials one by one."
+            )
+            return False
+        return True
+
+    def get_core_lists(self) -> List[List[int]]:
+        """Split the physical cores for the workers with the core binding logic of the benchmark."""
+        from neural_compressor.common.benchmark import dump_numa_info, parse_str2list, set_cores_for_instance
+
+        numa_info = dump_numa_info()
+        args = argparse.Namespace(
+            num_instances=self.num_parallel_trials, num_cores_per_instance=self.cores_per_trial, cores=None
+        )
+        try:
+            core_list_per_instance = set_cores_for_instance(args, numa_info)
+        except AssertionError as e:
+            logger.warning(f"{e} The trial workers share the cores of numa:0.")
+            return [numa_info[0]] * self.num_parallel_trials
+        return [parse_str2list(core_list[1]) for core_list in core_list_per_instance.values()]
+
+    def run(self, config_loader: "ConfigLoader", tuning_logger: TuningLogger, tuning_monitor: "TuningMonitor"):
+        """Run the trials until the tuning monitor needs to stop.
+
+        Args:
+            config_loader: The config loader which generates the configs of the trials.
+            tuning_logger: The tuning logger.
+            tuning_monitor: The tuning monitor to record the trial results.
+
+        Returns:
+            The index of the trial at which the tuning stopped, None if all configs are tried without stopping.
+        """
+        global _trial_fn
+        core_lists = self.get_core_lists()
+        ctx = multiprocessing.get_context(self.start_method)
+        core_queue = ctx.Queue()
+        for cores in core_lists:
+            core_queue.put(cores)
+        _trial_fn = self.trial_fn if self.start_method == "fork" else None
+        # the workers are the child processes started by the executor
+        other_children = set(multiprocessing.active_children())
+        executor = ProcessPoolExecutor(
+            max_workers=len(core_lists),
+            mp_context=ctx,
+            initializer=_init_trial_worker,
+            initargs=(core_queue, self.worker_init_fn, self.trial_fn if self.start_method != "fork" else None),
+        )
+        configs = enumerate(config_loader, 1)
+        max_trials = tuning_monitor.tuning_config.max_trials
+        pending = {}
+        trial_index = 1
+        stop_trial_index = None
+        try:
+            while True:
+                # keep the workers busy with the next trials, the monitor stops at max_trials at the latest
+                while len(pending) < len(core_lists) and trial_index + len(pending) <= max_trials:
+                    next_trial = next(configs, None)
+                    if next_trial is None:
+                        break
+                    next_index, quant_config = next_trial
+                    tuning_logger.trial_start(trial_index=next_index)
+                    pending[next_index] = (quant_config, executor.submit(_run_trial, quant_config))
+                if trial_index not in pending:
+                    break
+                quant_config, future = pending.pop(trial_index)
+                eval_result = future.result()
+                tuning_monitor.add_trial_result(trial_index, eval_result, quant_config)
+                tuning_logger.trial_end(trial_index)
+                if tuning_monitor.need_stop():
+                    stop_trial_index = trial_index
+                    break
+                trial_index += 1
+        finally:
+            # the results of the trials after the stop are not needed
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in set(multiprocessing.active_children()) - other_children:
+                process.terminate()
+            _trial_fn = None
+        return stop_trial_index
+
+
 def init_tuning(tuning_config: TuningConfig) -> Tuple[ConfigLoader, TuningLogger, TuningMonitor]:
     """Initializes the tuning process.
 
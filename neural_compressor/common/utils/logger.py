@@ -204,6 +204,11 @@ class TuningLogger:
         """Log the end of the evaluation process."""
         logger.info("Evaluation end.")
 
+    @classmethod
+    def trial_time_saved(cls, trial_index: int = None, time_saved: float = 0.0) -> None:
+        """Log the time saved by reusing the results of other trials."""
+        logger.info("%d-trail saved %.3fs by the trial cache.", trial_index, time_saved)
+
     @classmethod
     def trial_end(cls, trial_index: int = None) -> None:
         """Log the end of a trial."""
@@ -108,12 +108,14 @@ class BaseCallbacks(object):
         else:
             return None
 
-    def on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None):
+    def on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None, sample_indices=None):
         """Be called on the end of loss computation."""
         if len(self.hooks_dict["on_after_compute_loss"]) > 0:
             loss = student_loss
+            # only the hooks of distillation take sample_indices, keep the 4 arguments call of the others
+            kwargs = {"sample_indices": sample_indices} if sample_indices is not None else {}
             for on_after_compute_loss_hook in self.hooks_dict["on_after_compute_loss"]:
-                loss = on_after_compute_loss_hook(input, student_output, loss, teacher_output)
+                loss = on_after_compute_loss_hook(input, student_output, loss, teacher_output, **kwargs)
             return loss
         else:
             return None
@@ -333,7 +335,7 @@ class DistillationCallbacks(BaseCallbacks):
         if self.criterion is not None and hasattr(self.criterion, "clear_features"):
             self.criterion.clear_features()
 
-    def _on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None):
+    def _on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None, sample_indices=None):
         """Set or compute output of teacher model.
 
         Called after student model forward, calculate the output of the teacher model
@@ -344,13 +346,20 @@ class DistillationCallbacks(BaseCallbacks):
             student_output (tensor): The output logits of the student model.
             student_loss (tensor or float): The original loss of the student model.
             teacher_output (tensor, optional): The output logits of the teacher model.
+            sample_indices (list, optional): The dataset indices of the samples in input,
+                the key of the teacher output cache.
         """
         if self.criterion is None:
             self.create_criterion()
         assert self.criterion, "criterion must be set in yaml config file."
         if teacher_output is None:
             assert self.teacher_model, "teacher_model must be set."
-            teacher_output = self.criterion.teacher_model_forward(input, teacher_model=self.teacher_model._model)
+            if sample_indices is None:
+                teacher_output = self.criterion.teacher_model_forward(input, teacher_model=self.teacher_model._model)
+            else:
+                teacher_output = self.criterion.teacher_model_forward(
+                    input, teacher_model=self.teacher_model._model, sample_indices=sample_indices
+                )
         return self.criterion.loss_cal_sloss(student_output, teacher_output, student_loss)
 
     def init_train_cfg(self):
@@ -31,6 +31,8 @@ from neural_compressor.adaptor.pytorch import pytorch_forward_wrapper
 from neural_compressor.utils import logger
 from neural_compressor.utils.utility import LazyImport, singleton
 
+from .teacher_cache import TeacherOutputCache, get_model_hash
+
 torch = LazyImport("torch")
 tf = LazyImport("tensorflow")
 
@@ -287,8 +289,19 @@ class KnowledgeDistillationFramework(object):
 class KnowledgeDistillationLoss(KnowledgeDistillationFramework):
     """Initialize the KnowledgeDistillationLoss class."""
 
+    # the value of the teacher outputs that are not in the cached top_k
+    teacher_cache_fill_value = float("-inf")
+
     def __init__(
-        self, temperature=1.0, loss_types=["CE", "CE"], loss_weights=[0.5, 0.5], student_model=None, teacher_model=None
+        self,
+        temperature=1.0,
+        loss_types=["CE", "CE"],
+        loss_weights=[0.5, 0.5],
+        student_model=None,
+        teacher_model=None,
+        teacher_cache_dir=None,
+        teacher_cache_top_k=None,
+        teacher_cache_dtype="float32",
     ):
         """Initialize Knowledge Distillation Loss class.
 
@@ -299,9 +312,17 @@ class KnowledgeDistillationLoss(KnowledgeDistillationFramework):
             loss_weights (list, optional): loss weights. Defaults to [0.5, 0.5].
             student_model (model, optional): student model. Defaults to None.
             teacher_model (model, optional): teacher model. Defaults to None.
+            teacher_cache_dir (str, optional): directory to cache the teacher outputs, the teacher model is
+                hashed here to key the cache, see set_teacher_output_cache. Defaults to None.
+            teacher_cache_top_k (int, optional): number of the largest teacher outputs to cache. Defaults to None.
+            teacher_cache_dtype (str, optional): dtype of the cached teacher outputs. Defaults to "float32".
         """
         super(KnowledgeDistillationLoss, self).__init__(student_model=student_model, teacher_model=teacher_model)
         self.teacher_outputs = None
+        self.teacher_output_cache = None
+        self._warned_no_sample_indices = False
+        if teacher_cache_dir is not None and teacher_model is not None:
+            self.set_teacher_output_cache(teacher_cache_dir, teacher_cache_top_k, teacher_cache_dtype)
         self.temperature = temperature
         self.loss_weights = loss_weights
         self.loss_types = loss_types
@@ -311,18 +332,93 @@ class KnowledgeDistillationLoss(KnowledgeDistillationFramework):
         )
         assert sum(loss_weights) == 1.0, "Sum of loss_weights should be 1.0."
 
-    def teacher_model_forward(self, input, teacher_model=None):
+    def teacher_model_forward(self, input, teacher_model=None, sample_indices=None):
         """Define parameters for teacher_model_forward function.
 
         Args:
             input (tensor, tuple or dict): input data.
             teacher_model (model, optional): teacher model. Defaults to None.
+            sample_indices (list, optional): the dataset indices of the samples in input, the key of
+                the teacher output cache. Defaults to None.
 
         Raises:
             NotImplementedError: NotImplementedError
         """
         raise NotImplementedError("Function teacher_model_forward " "should be framework related.")
 
+    def teacher_outputs_to_numpy(self, outputs):
+        """Convert the teacher outputs to a numpy array for the teacher output cache.
+
+        Args:
+            outputs (tensor): teacher outputs
+
+        Raises:
+            NotImplementedError: NotImplementedError
+        """
+        raise NotImplementedError("Function teacher_outputs_to_numpy " "should be framework related.")
+
+    def set_teacher_output_cache(self, cache_dir, top_k=None, dtype="float32"):
+        """Cache the teacher outputs under cache_dir, the cache is cleared if the teacher model changes.
+
+        The teacher model is hashed once here over its whole state_dict (or weights), the hash isn't computed
+        again in training. If the teacher weights are changed afterwards, call this function again, otherwise
+        the outputs cached for the old weights are still read.
+
+        Args:
+            cache_dir (str): directory of the cache files.
+            top_k (int, optional): number of the largest outputs to keep along the last axis,
+                the others are restored as teacher_cache_fill_value. Defaults to None, which keeps all.
+            dtype (str, optional): dtype to store the outputs, like "float16". Defaults to "float32".
+        """
+        assert self.teacher_model is not None, "teacher_model must be set for the teacher output cache."
+        self.teacher_output_cache = TeacherOutputCache(
+            cache_dir, get_model_hash(self.teacher_model), top_k, dtype, self.teacher_cache_fill_value
+        )
+
+    def _read_teacher_outputs(self, sample_indices):
+        """Read the teacher outputs from the cache, return None if they aren't cached."""
+        cache = self.teacher_output_cache
+        if cache is not None and sample_indices is None and not self._warned_no_sample_indices:
+            logger.warning(
+                "The teacher output cache is set but no sample_indices are given, the teacher model runs "
+                "without the cache. Pass sample_indices to on_after_compute_loss to use the cache."
+            )
+            self._warned_no_sample_indices = True
+        if cache is None or sample_indices is None or not cache.contains(sample_indices):
+            return None
+        return cache.read(sample_indices)
+
+    def _write_teacher_outputs(self, sample_indices, outputs):
+        """Write the teacher outputs to the cache, return them as read from the cache or None if not cached.
+
+        The outputs are read back so that the loss always sees the same top_k and dtype of the cache.
+        """
+        if self.teacher_output_cache is None or sample_indices is None or outputs is None:
+            return None
+        self.teacher_output_cache.write(sample_indices, self.teacher_outputs_to_numpy(outputs))
+        return self.teacher_output_cache.read(sample_indices)
+
+    def cache_teacher_outputs(self, dataloader):
+        """Run the teacher model on a dataloader and cache its outputs before training.
+
+        The samples are indexed in the order of the dataloader, so it shouldn't be shuffled, and the
+        same indices should be passed to on_after_compute_loss in training.
+
+        Args:
+            dataloader: the dataloader that yields (input, label) batches.
+        """
+        assert self.teacher_output_cache is not None, "Please call set_teacher_output_cache first."
+        start = 0
+        for input, _ in dataloader:
+            batch_input = input
+            while isinstance(batch_input, (list, tuple, dict)):
+                batch_input = next(iter(batch_input.values())) if isinstance(batch_input, dict) else batch_input[0]
+            sample_indices = list(range(start, start + len(batch_input)))
+            if not self.teacher_output_cache.contains(sample_indices):
+                self._write_teacher_outputs(sample_indices, self.teacher_model_forward(input))
+            start += len(sample_indices)
+        self.teacher_output_cache.flush()
+
     def teacher_student_loss_cal(self, student_outputs, teacher_outputs):
         """Define parameters for teacher_student_loss_cal function.
 
@@ -403,7 +499,15 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
     """The PyTorchKnowledgeDistillationLoss class inherits from KnowledgeDistillationLoss."""
 
     def __init__(
-        self, temperature=1.0, loss_types=["CE", "CE"], loss_weights=[0.5, 0.5], student_model=None, teacher_model=None
+        self,
+        temperature=1.0,
+        loss_types=["CE", "CE"],
+        loss_weights=[0.5, 0.5],
+        student_model=None,
+        teacher_model=None,
+        teacher_cache_dir=None,
+        teacher_cache_top_k=None,
+        teacher_cache_dtype="float32",
     ):
         """Initialize PyTorch Knowledge Distillation Loss class.
 
@@ -414,6 +518,9 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
             loss_weights (list, optional): loss weights. Defaults to [0.5, 0.5].
             student_model (torch.nn.model, optional): student model. Defaults to None.
             teacher_model (torch.nn.model, optional): teacher model. Defaults to None.
+            teacher_cache_dir (str, optional): directory to cache the teacher outputs. Defaults to None.
+            teacher_cache_top_k (int, optional): number of the largest teacher outputs to cache. Defaults to None.
+            teacher_cache_dtype (str, optional): dtype of the cached teacher outputs. Defaults to "float32".
 
         Raises:
             NotImplementedError: NotImplementedError
@@ -425,6 +532,9 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
             loss_weights=loss_weights,
             student_model=student_model,
             teacher_model=teacher_model,
+            teacher_cache_dir=teacher_cache_dir,
+            teacher_cache_top_k=teacher_cache_top_k,
+            teacher_cache_dtype=teacher_cache_dtype,
         )
         if self.student_targets_loss is None:
             if self.loss_types[0] == "CE":
@@ -479,13 +589,15 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
         targets_prob = torch.nn.functional.softmax(targets, dim=-1)
         return torch.nn.functional.kl_div(log_prob, targets_prob)
 
-    def teacher_model_forward(self, input, teacher_model=None, device=None):
+    def teacher_model_forward(self, input, teacher_model=None, device=None, sample_indices=None):
         """Teacher model forward.
 
         Args:
             input (tensor): input data
             teacher_model (torch.nn.model, optional): teacher model. Defaults to None.
             device (torch.device, optional): device. Defaults to None.
+            sample_indices (list, optional): the dataset indices of the samples in input, the outputs
+                are read from or written to the teacher output cache with them. Defaults to None.
 
         Returns:
             tensor: output
@@ -503,13 +615,33 @@ class PyTorchKnowledgeDistillationLoss(KnowledgeDistillationLoss):
                 logger.warning("Cannot get model device, assuming it's in CPU.")
                 model_device = "cpu"
             device = model_device if device is None else device
-            if device != model_device:
-                model.to(device)
-            with torch.no_grad():
-                outputs = pytorch_forward_wrapper(model, input)
+            cached_outputs = self._read_teacher_outputs(sample_indices)
+            if cached_outputs is None:
+                if device != model_device:
+                    model.to(device)
+                with torch.no_grad():
+                    outputs = pytorch_forward_wrapper(model, input)
+                cached_outputs = self._write_teacher_outputs(sample_indices, outputs)
+            if cached_outputs is not None:
+                outputs = torch.from_numpy(cached_outputs).to(device)
             self.teacher_outputs = outputs
         return outputs
 
+    def teacher_outputs_to_numpy(self, outputs):
+        """Convert the teacher outputs to a numpy array.
+
+        Args:
+            outputs (tensor): teacher outputs
+
+        Returns:
+            np.ndarray: teacher outputs
+        """
+        assert isinstance(outputs, torch.Tensor), "Only tensor teacher outputs can be cached, but got {}.".format(
+            type(outputs)
+        )
+        outputs = outputs.detach().cpu()
+        return (outputs if outputs.dtype in [torch.float32, torch.float64] else outputs.float()).numpy()
+
     def teacher_student_loss_cal(self, student_outputs, teacher_outputs):
         """Calculate loss between student model and teacher model.
 
@@ -570,6 +702,9 @@ class PyTorchKnowledgeDistillationLossWrapper(object):
         new_dict = {}
         for k in _params:
             new_dict[k] = param_dict[k]
+        for k in ["teacher_cache_dir", "teacher_cache_top_k", "teacher_cache_dtype"]:
+            if param_dict.get(k) is not None:
+                new_dict[k] = param_dict[k]
         return new_dict
 
     def __call__(self, **kwargs):
@@ -585,8 +720,19 @@ class PyTorchKnowledgeDistillationLossWrapper(object):
 class TensorflowKnowledgeDistillationLoss(KnowledgeDistillationLoss):
     """The TensorflowKnowledgeDistillationLoss class inherits from KnowledgeDistillationLoss."""
 
+    # the teacher outputs are probabilities
+    teacher_cache_fill_value = 0.0
+
     def __init__(
-        self, temperature=1.0, loss_types=["CE", "CE"], loss_weights=[0.5, 0.5], student_model=None, teacher_model=None
+        self,
+        temperature=1.0,
+        loss_types=["CE", "CE"],
+        loss_weights=[0.5, 0.5],
+        student_model=None,
+        teacher_model=None,
+        teacher_cache_dir=None,
+        teacher_cache_top_k=None,
+        teacher_cache_dtype="float32",
     ):
         """Initialize Tensorflow Knowledge Distillation Loss class.
 
@@ -597,6 +743,9 @@ class TensorflowKnowledgeDistillationLoss(KnowledgeDistillationLoss):
             loss_weights (list, optional): loss weights. Defaults to [0.5, 0.5].
             student_model (optional): student model. Defaults to None.
             teacher_model (optional): teacher model. Defaults to None.
+            teacher_cache_dir (str, optional): directory to cache the teacher outputs. Defaults to None.
+            teacher_cache_top_k (int, optional): number of the largest teacher outputs to cache. Defaults to None.
+            teacher_cache_dtype (str, optional): dtype of the cached teacher outputs. Defaults to "float32".
 
         Raises:
             NotImplementedError: NotImplementedError
@@ -608,6 +757,9 @@ class TensorflowKnowledgeDistillationLoss(KnowledgeDistillationLoss):
             loss_weights=loss_weights,
             student_model=student_model,
             teacher_model=teacher_model,
+            teacher_cache_dir=teacher_cache_dir,
+            teacher_cache_top_k=teacher_cache_top_k,
+            teacher_cache_dtype=teacher_cache_dtype,
         )
         if self.student_targets_loss is None:
             if self.loss_types[0] == "CE":
@@ -643,29 +795,47 @@ class TensorflowKnowledgeDistillationLoss(KnowledgeDistillationLoss):
         targets_prob = targets
         return tf.math.reduce_mean(tf.math.reduce_sum(-targets_prob * log_prob, axis=-1), axis=-1)
 
-    def teacher_model_forward(self, input, teacher_model=None):
+    def teacher_model_forward(self, input, teacher_model=None, sample_indices=None):
         """Teacher model forward.
 
         Args:
             input (tensor): input data
             teacher_model (optional): teacher model. Defaults to None.
             device (torch.device, optional): device. Defaults to None.
+            sample_indices (list, optional): the dataset indices of the samples in input, the outputs
+                are read from or written to the teacher output cache with them. Defaults to None.
 
         Returns:
             tensor: output
         """
         outputs = None
         if self.loss_weights[1] > 0 and input is not None:
-            model = self.teacher_model if teacher_model is None else teacher_model
-            if isinstance(input, list) or isinstance(input, tuple):  # pragma: no cover
-                outputs = model(*input, training=True)
-            elif isinstance(input, dict):  # pragma: no cover
-                outputs = model(**input, training=True)
-            else:
-                outputs = model(input, training=True)
+            cached_outputs = self._read_teacher_outputs(sample_indices)
+            if cached_outputs is None:
+                model = self.teacher_model if teacher_model is None else teacher_model
+                if isinstance(input, list) or isinstance(input, tuple):  # pragma: no cover
+                    outputs = model(*input, training=True)
+                elif isinstance(input, dict):  # pragma: no cover
+                    outputs = model(**input, training=True)
+                else:
+                    outputs = model(input, training=True)
+                cached_outputs = self._write_teacher_outputs(sample_indices, outputs)
+            if cached_outputs is not None:
+                outputs = tf.convert_to_tensor(cached_outputs)
             self.teacher_outputs = outputs
         return outputs
 
+    def teacher_outputs_to_numpy(self, outputs):
+        """Convert the teacher outputs to a numpy array.
+
+        Args:
+            outputs (tensor): teacher outputs
+
+        Returns:
+            np.ndarray: teacher outputs
+        """
+        return np.asarray(outputs, dtype=np.float32)
+
     def teacher_student_loss_cal(self, student_outputs, teacher_outputs):
         """Calculate loss between student model and teacher model.
 
@@ -741,6 +911,9 @@ class TensorflowKnowledgeDistillationLossWrapper(object):
         new_dict = {}
         for k in _params:
             new_dict[k] = param_dict[k]
+        for k in ["teacher_cache_dir", "teacher_cache_top_k", "teacher_cache_dtype"]:
+            if param_dict.get(k) is not None:
+                new_dict[k] = param_dict[k]
         return new_dict
 
     def __call__(self, **kwargs):
@@ -756,8 +929,19 @@ class TensorflowKnowledgeDistillationLossWrapper(object):
 class TensorflowKnowledgeDistillationLossExternal(KnowledgeDistillationLoss):
     """TensorflowKnowledgeDistillationLossExternal inherits from KnowledgeDistillationLoss."""
 
+    # the teacher outputs are probabilities
+    teacher_cache_fill_value = 0.0
+
     def __init__(
-        self, temperature=1.0, loss_types=["CE", "CE"], loss_weights=[0.5, 0.5], student_model=None, teacher_model=None
+        self,
+        temperature=1.0,
+        loss_types=["CE", "CE"],
+        loss_weights=[0.5, 0.5],
+        student_model=None,
+        teacher_model=None,
+        teacher_cache_dir=None,
+        teacher_cache_top_k=None,
+        teacher_cache_dtype="float32",
     ):
         """Initialize Tensorflow Knowledge Distillation Loss class.
 
@@ -768,6 +952,9 @@ class TensorflowKnowledgeDistillationLossExternal(KnowledgeDistillationLoss):
             loss_weights (list, optional): loss weights. Defaults to [0.5, 0.5].
             student_model (optional): student model. Defaults to None.
             teacher_model (optional): teacher model. Defaults to None.
+            teacher_cache_dir (str, optional): directory to cache the teacher outputs. Defaults to None.
+            teacher_cache_top_k (int, optional): number of the largest teacher outputs to cache. Defaults to None.
+            teacher_cache_dtype (str, optional): dtype of the cached teacher outputs. Defaults to "float32".
 
         Raises:
             NotImplementedError: NotImplementedError
@@ -779,6 +966,9 @@ class TensorflowKnowledgeDistillationLossExternal(KnowledgeDistillationLoss):
             loss_weights=loss_weights,
             student_model=student_model,
             teacher_model=teacher_model,
+            teacher_cache_dir=teacher_cache_dir,
+            teacher_cache_top_k=teacher_cache_top_k,
+            teacher_cache_dtype=teacher_cache_dtype,
         )
         if self.student_targets_loss is None:
             if self.loss_types[0] == "CE":
@@ -800,29 +990,47 @@ class TensorflowKnowledgeDistillationLossExternal(KnowledgeDistillationLoss):
                 )
             logger.info("teacher_student_loss: {}, {}".format(self.loss_types[1], self.loss_weights[1]))
 
-    def teacher_model_forward(self, input, teacher_model=None):
+    def teacher_model_forward(self, input, teacher_model=None, sample_indices=None):
         """Teacher model forward.
 
         Args:
             input (tensor): input data
             teacher_model (optional): teacher model. Defaults to None.
             device (optional): device. Defaults to None.
+            sample_indices (list, optional): the dataset indices of the samples in input, the outputs
+                are read from or written to the teacher output cache with them. Defaults to None.
 
         Returns:
             tensor: output
         """
         outputs = None
         if self.loss_weights[1] > 0 and input is not None:
-            model = self.teacher_model if teacher_model is None else teacher_model
-            if isinstance(input, list) or isinstance(input, tuple):  # pragma: no cover
-                outputs = model(*input, training=True)
-            elif isinstance(input, dict):  # pragma: no cover
-                outputs = model(**input, training=True)
-            else:
-                outputs = model(input, training=True)
+            cached_outputs = self._read_teacher_outputs(sample_indices)
+            if cached_outputs is None:
+                model = self.teacher_model if teacher_model is None else teacher_model
+                if isinstance(input, list) or isinstance(input, tuple):  # pragma: no cover
+                    outputs = model(*input, training=True)
+                elif isinstance(input, dict):  # pragma: no cover
+                    outputs = model(**input, training=True)
+                else:
+                    outputs = model(input, training=True)
+                cached_outputs = self._write_teacher_outputs(sample_indices, outputs)
+            if cached_outputs is not None:
+                outputs = tf.convert_to_tensor(cached_outputs)
             self.teacher_outputs = outputs
         return outputs
 
+    def teacher_outputs_to_numpy(self, outputs):
+        """Convert the teacher outputs to a numpy array.
+
+        Args:
+            outputs (tensor): teacher outputs
+
+        Returns:
+            np.ndarray: teacher outputs
+        """
+        return np.asarray(outputs, dtype=np.float32)
+
     def teacher_student_loss_cal(self, student_outputs, teacher_outputs):
         """Calculate loss between student model and teacher model.
 
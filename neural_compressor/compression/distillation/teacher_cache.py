@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A memory-mapped cache of the teacher model outputs for knowledge distillation."""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from neural_compressor.utils import logger
+from neural_compressor.utils.utility import LazyImport
+
+torch = LazyImport("torch")
+
+
+def get_model_hash(model):
+    """Get the sha256 hash of the weights of a model.
+
+    Args:
+        model: a torch.nn.Module, a Keras model with get_weights, or the path of a checkpoint file.
+
+    Returns:
+        str: the hex digest.
+    """
+    sha = hashlib.sha256()
+    if isinstance(model, str):
+        with open(model, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+    elif hasattr(model, "state_dict"):
+        for name, tensor in model.state_dict().items():
+            sha.update(name.encode("utf-8"))
+            tensor = tensor.detach().cpu().contiguous()
+            sha.update(str((tensor.dtype, tuple(tensor.shape))).encode("utf-8"))
+            sha.update(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+    elif hasattr(model, "get_weights"):
+        for weight in model.get_weights():
+            weight = np.ascontiguousarray(weight)
+            sha.update(str((weight.dtype, weight.shape)).encode("utf-8"))
+            sha.update(weight.tobytes())
+    else:
+        raise NotImplementedError("Cannot get the hash of the teacher model {}.".format(type(model)))
+    return sha.hexdigest()
+
+
+class TeacherOutputCache(object):
+    """A cache of the teacher model outputs on disk, keyed by sample index.
+
+    The outputs are written to memory-mapped files under cache_dir, so later epochs and later runs read them
+    instead of running the teacher model. The files grow with the largest sample index written. With top_k,
+    only the top_k largest values along the last axis and their indices are kept, and the other values are
+    restored as fill_value. The cache is emptied when it is opened with another teacher_hash, top_k or dtype.
+
+    Args:
+        cache_dir (str): the directory of the cache files.
+        teacher_hash (str): the hash of the teacher model, see get_model_hash.
+        top_k (int, optional): number of values to keep along the last axis. Defaults to None, which keeps all.
+        dtype (str, optional): the dtype to store the values. Defaults to "float32".
+        fill_value (float, optional): the value of the outputs that are not in the top_k.
+            Defaults to -inf, which suits logits. Use 0.0 for probabilities.
+    """
+
+    def __init__(self, cache_dir, teacher_hash, top_k=None, dtype="float32", fill_value=float("-inf")):
+        """Initialize the cache and load the outputs of the same teacher if exist."""
+        self.cache_dir = cache_dir
+        self.fill_value = fill_value
+        self._meta = {"teacher_hash": teacher_hash, "top_k": top_k, "dtype": np.dtype(dtype).name}
+        self._meta_path = os.path.join(cache_dir, "meta.json")
+        self._values = self._indices = self._cached = None
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if all(meta.get(key) == value for key, value in self._meta.items()):
+                self._meta = meta
+                self._open()
+                return
+            logger.info("The teacher model or the cache settings changed, clear the teacher outputs cache.")
+        self._clear()
+
+    def _file(self, name):
+        return os.path.join(self.cache_dir, name + ".bin")
+
+    def _clear(self):
+        for name in ["values", "indices", "cached"]:
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        self._meta.update({"shape": None, "capacity": 0})
+        self._save_meta()
+
+    def _save_meta(self):
+        with open(self._meta_path, "w") as f:
+            json.dump(self._meta, f)
+
+    def _open(self):
+        capacity, shape, top_k = self._meta["capacity"], self._meta["shape"], self._meta["top_k"]
+        if capacity == 0:
+            return
+        stored_shape = shape[:-1] + [top_k] if top_k else shape
+        self._values = np.memmap(self._file("values"), self._meta["dtype"], "r+", shape=(capacity, *stored_shape))
+        if top_k:
+            self._indices = np.memmap(self._file("indices"), np.int32, "r+", shape=(capacity, *stored_shape))
+        self._cached = np.memmap(self._file("cached"), np.uint8, "r+", shape=(capacity,))
+
+    def _grow(self, size):
+        capacity = max(size, 2 * self._meta["capacity"], 1024)
+        shape, top_k = self._meta["shape"], self._meta["top_k"]
+        stored_shape = shape[:-1] + [top_k] if top_k else shape
+        files = [("values", np.dtype(self._meta["dtype"]), stored_shape), ("cached", np.dtype(np.uint8), [])]
+        if top_k:
+            files.append(("indices", np.dtype(np.int32), stored_shape))
+        self._values = self._indices = self._cached = None
+        for name, dtype, sample_shape in files:
+            # the new space of the file is filled with zeros
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * int(np.prod(sample_shape)) * dtype.itemsize)
+        self._meta["capacity"] = capacity
+        self._save_meta()
+        self._open()
+
+    def __len__(self):
+        """Get the number of cached samples."""
+        return 0 if self._cached is None else int(np.count_nonzero(self._cached))
+
+    def contains(self, sample_indices):
+        """Check if the outputs of all the samples are cached."""
+        sample_indices = np.asarray(sample_indices, dtype=np.int64)
+        if self._cached is None or sample_indices.max(initial=-1) >= self._meta["capacity"]:
+            return False
+        return bool(self._cached[sample_indices].all())
+
+    def write(self, sample_indices, outputs):
+        """Write the teacher outputs of a batch.
+
+        Args:
+            sample_indices (list or array): the indices of the samples in the batch.
+            outputs (np.ndarray): the teacher outputs, the first axis is the batch.
+        """
+        sample_indices = np.asarray(sample_indices, dtype=np.int64)
+        outputs = np.asarray(outputs)
+        assert len(sample_indices) == len(outputs), "Got {} sample indices for {} outputs.".format(
+            len(sample_indices), len(outputs)
+        )
+        if self._meta["shape"] is None:
+            assert (
+                not self._meta["top_k"] or 0 < self._meta["top_k"] < outputs.shape[-1]
+            ), "top_k should be in (0, {}), but got {}.".format(outputs.shape[-1], self._meta["top_k"])
+            self._meta["shape"] = list(outputs.shape[1:])
+        assert list(outputs.shape[1:]) == self._meta["shape"], "The teacher outputs shape {} doesn't match {}.".format(
+            list(outputs.shape[1:]), self._meta["shape"]
+        )
+        if sample_indices.max(initial=-1) >= self._meta["capacity"]:
+            self._grow(int(sample_indices.max()) + 1)
+        top_k = self._meta["top_k"]
+        if top_k:
+            indices = np.argpartition(-outputs, top_k - 1, axis=-1)[..., :top_k]
+            self._values[sample_indices] = np.take_along_axis(outputs, indices, axis=-1)
+            self._indices[sample_indices] = indices
+        else:
+            self._values[sample_indices] = outputs
+        self._cached[sample_indices] = 1
+
+    def read(self, sample_indices):
+        """Read the teacher outputs of a batch.
+
+        Args:
+            sample_indices (list or array): the indices of the samples in the batch.
+
+        Returns:
+            np.ndarray: the float32 teacher outputs.
+        """
+        sample_indices = np.asarray(sample_indices, dtype=np.int64)
+        values = self._values[sample_indices].astype(np.float32)
+        if not self._meta["top_k"]:
+            return values
+        outputs = np.full((len(sample_indices), *self._meta["shape"]), self.fill_value, dtype=np.float32)
+        np.put_along_axis(outputs, self._indices[sample_indices].astype(np.int64), values, axis=-1)
+        return outputs
+
+    def flush(self):
+        """Flush the cached outputs to the files."""
+        for array in [self._values, self._indices, self._cached]:
+            if array is not None:
+                array.flush()
@@ -0,0 +1,254 @@
+"""Sparse Linear layers for the models pruned with NxM and N:M patterns."""
+
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+
+from ..utils import logger, torch
+
+__all__ = [
+    "SparseLinear",
+    "export_sparse_model",
+    "load_sparse_model",
+]
+
+
+def _index_dtype(max_value):
+    return torch.int32 if max_value < 2**31 else torch.int64
+
+
+class SparseLinear(torch.nn.Module):
+    """A Linear layer for inference that stores and multiplies only the unpruned weights.
+
+    Two layouts are supported:
+        NxM blocks: a block CSR of the [out_features, in_features] weight. values is a [N, nnz, M] tensor of the
+            non-zero blocks, indices holds the block column of each block and crow_indices the offsets of the
+            block rows. The product is computed as N CSR products that share the same indices.
+        N:M: values is a [out_features, in_features // M, M - N] tensor of the kept weights in each group of M
+            weights and indices is a uint8 tensor with the same shape, holding their positions in the group.
+
+    Use SparseLinear.from_linear to convert a pruned torch.nn.Linear.
+
+    Args:
+        in_features (int): size of each input sample.
+        out_features (int): size of each output sample.
+        values (Tensor): the kept weights.
+        indices (Tensor): the block column indices for NxM blocks, the positions in group for N:M.
+        crow_indices (Tensor, optional): the block row offsets for NxM blocks. Defaults to None, which means N:M.
+        bias (Tensor, optional): the bias. Defaults to None.
+    """
+
+    def __init__(self, in_features, out_features, values, indices, crow_indices=None, bias=None):
+        """Initialize."""
+        super().__init__()
+        self.in_features = in_features
+        self.out_features = out_features
+        self.register_buffer("values", values)
+        self.register_buffer("indices", indices)
+        if crow_indices is not None:
+            self.register_buffer("crow_indices", crow_indices)
+        else:
+            self.crow_indices = None
+        if bias is not None:
+            self.bias = torch.nn.Parameter(bias, requires_grad=False)
+        else:
+            self.register_parameter("bias", None)
+        self._csr_cache = None
+
+    @property
+    def pattern(self):
+        """Get the pattern string, "NxM" or "N:M"."""
+        if self.crow_indices is not None:
+            return "{}x{}".format(self.values.shape[0], self.values.shape[2])
+        M = self.in_features // self.values.shape[1]
+        return "{}:{}".format(M - self.values.shape[2], M)
+
+    @classmethod
+    def from_linear(cls, linear, pattern):
+        """Convert a pruned torch.nn.Linear into a SparseLinear.
+
+        Args:
+            linear (torch.nn.Linear): the pruned layer.
+            pattern (str): the pruning pattern, "NxM" like "4x1" or "N:M" like "2:4".
+
+        Returns:
+            A SparseLinear, or None if the weight doesn't fit the pattern.
+        """
+        weight = linear.weight.detach()
+        bias = linear.bias.detach() if linear.bias is not None else None
+        out_features, in_features = weight.shape
+        if "x" in pattern:
+            N, M = [int(size) for size in pattern.split("x")]
+            if out_features % N != 0 or in_features % M != 0:
+                return None
+            blocks = weight.reshape(out_features // N, N, in_features // M, M).permute(0, 2, 1, 3)
+            nonzero = blocks.ne(0).any(dim=-1).any(dim=-1)
+            rows, cols = nonzero.nonzero(as_tuple=True)
+            index_dtype = _index_dtype(max(rows.numel(), in_features) * M)
+            crow_indices = torch.zeros(out_features // N + 1, dtype=index_dtype, device=weight.device)
+            crow_indices[1:] = nonzero.sum(dim=1).cumsum(dim=0)
+            values = blocks[rows, cols].permute(1, 0, 2).contiguous()
+            return cls(in_features, out_features, values, cols.to(index_dtype), crow_indices, bias)
+
+        N, M = [int(size) for size in pattern.split(":")]
+        if in_features % M != 0 or M > 256:
+            return None
+        groups = weight.reshape(out_features, in_features // M, M)
+        if bool((groups.ne(0).sum(dim=-1) > M - N).any()):
+            return None
+        # the non-zero positions first, in their order inside the group
+        indices = torch.argsort(groups.eq(0).to(torch.uint8), dim=-1, stable=True)[..., : M - N]
+        values = groups.gather(-1, indices).contiguous()
+        return cls(in_features, out_features, values, indices.to(torch.uint8), bias=bias)
+
+    def _get_csr_indices(self):
+        """Get the crow and col indices of the element-wise CSR, they are cached until the buffers change."""
+        key = tuple((t.data_ptr(), t._version) for t in [self.indices, self.crow_indices] if t is not None)
+        if self._csr_cache is not None and self._csr_cache[0] == key:
+            return self._csr_cache[1]
+        if self.crow_indices is not None:
+            M = self.values.shape[2]
+            crow_indices = self.crow_indices * M
+            col_indices = self.indices
+            if M > 1:
+                offsets = torch.arange(M, dtype=self.indices.dtype, device=self.indices.device)
+                col_indices = (self.indices.unsqueeze(1) * M + offsets).flatten()
+        else:
+            out_features, groups, kept = self.values.shape
+            M = self.in_features // groups
+            index_dtype = _index_dtype(max(self.values.numel(), self.in_features))
+            crow_indices = torch.arange(out_features + 1, dtype=index_dtype, device=self.values.device) * (
+                groups * kept
+            )
+            starts = torch.arange(groups, dtype=index_dtype, device=self.values.device) * M
+            col_indices = (starts.unsqueeze(1) + self.indices.to(index_dtype)).flatten()
+        self._csr_cache = (key, (crow_indices, col_indices))
+        return crow_indices, col_indices
+
+    def forward(self, input):
+        """Compute input @ weight.T + bias with the non-zero weights only."""
+        crow_indices, col_indices = self._get_csr_indices()
+        values = self.values
+        if values.dtype not in [torch.float32, torch.float64]:
+            # the CPU sparse kernels only support float32 and float64
+            values = values.float()
+        x = input.reshape(-1, self.in_features).to(values.dtype).t()
+        if self.crow_indices is not None:
+            N = values.shape[0]
+            size = (self.out_features // N, self.in_features)
+            outputs = [torch.sparse_csr_tensor(crow_indices, col_indices, v.flatten(), size) @ x for v in values]
+            output = torch.stack(outputs, dim=1).reshape(self.out_features, -1)
+        else:
+            size = (self.out_features, self.in_features)
+            output = torch.sparse_csr_tensor(crow_indices, col_indices, values.flatten(), size) @ x
+        output = output.t().to(input.dtype)
+        if self.bias is not None:
+            output = output + self.bias
+        return output.reshape(*input.shape[:-1], self.out_features)
+
+    def to_dense(self):
+        """Get the dense weight."""
+        crow_indices, col_indices = self._get_csr_indices()
+        if self.crow_indices is not None:
+            N = self.values.shape[0]
+            size = (self.out_features // N, self.in_features)
+            rows = [
+                torch.sparse_csr_tensor(crow_indices, col_indices, v.flatten(), size).to_dense() for v in self.values
+            ]
+            return torch.stack(rows, dim=1).reshape(self.out_features, self.in_features)
+        size = (self.out_features, self.in_features)
+        return torch.sparse_csr_tensor(crow_indices, col_indices, self.values.flatten(), size).to_dense()
+
+    def extra_repr(self):
+        """Set the extra representation of the module."""
+        density = self.values.numel() / (self.in_features * self.out_features)
+        return "in_features={}, out_features={}, bias={}, pattern={}, density={:.4f}".format(
+            self.in_features, self.out_features, self.bias is not None, self.pattern, density
+        )
+
+
+def _set_module(model, name, module):
+    parent_name, _, attr = name.rpartition(".")
+    parent = model.get_submodule(parent_name) if parent_name else model
+    setattr(parent, attr, module)
+
+
+def export_sparse_model(model, pattern, layer_names=None, min_sparsity=0.5):
+    """Replace the pruned Linear layers of a model with SparseLinear layers.
+
+    Args:
+        model (torch.nn.Module): the pruned model, it is modified in place.
+        pattern (str): the pruning pattern, "NxM" like "4x1" or "N:M" like "2:4".
+        layer_names (list, optional): regular expressions of the layer names to convert. Defaults to None,
+            which converts all the Linear layers that fit the pattern.
+        min_sparsity (float, optional): the layers with a lower sparsity ratio are kept dense, e.g. the layers
+            which are not pruned. Defaults to 0.5.
+
+    Returns:
+        The model with SparseLinear layers. Save it with model.state_dict() and load it with load_sparse_model.
+    """
+    pattern = pattern.split("_")[-1]
+    assert re.fullmatch(r"\d+x\d+|\d+:\d+", pattern), "only NxM and N:M patterns are supported, but got {}".format(
+        pattern
+    )
+    for name, module in list(model.named_modules()):
+        if type(module) is not torch.nn.Linear:
+            continue
+        if layer_names is not None and not any(re.search(layer_name, name) for layer_name in layer_names):
+            continue
+        sparse_module = SparseLinear.from_linear(module, pattern)
+        if sparse_module is None:
+            logger.warning(f"{name} with shape {tuple(module.weight.shape)} doesn't fit {pattern}, keep it dense.")
+            continue
+        sparsity = 1 - sparse_module.values.numel() / module.weight.numel()
+        if sparsity < min_sparsity:
+            logger.warning(f"{name} has a sparsity of {sparsity:.4f} < {min_sparsity}, keep it dense.")
+            continue
+        _set_module(model, name, sparse_module)
+    return model
+
+
+def load_sparse_model(model, state_dict):
+    """Load the state_dict of a model exported by export_sparse_model into the dense model.
+
+    The Linear layers saved as SparseLinear are replaced according to the shapes in the state_dict.
+
+    Args:
+        model (torch.nn.Module): the dense model with the same architecture, it is modified in place.
+        state_dict (dict or str): the state_dict or the path of the file saved by torch.save.
+
+    Returns:
+        The model with SparseLinear layers and the loaded weights.
+    """
+    if isinstance(state_dict, str):
+        state_dict = torch.load(state_dict, map_location="cpu")
+    for name, module in list(model.named_modules()):
+        if type(module) is not torch.nn.Linear or name + ".values" not in state_dict:
+            continue
+        bias = state_dict[name + ".bias"] if module.bias is not None else None
+        sparse_module = SparseLinear(
+            module.in_features,
+            module.out_features,
+            state_dict[name + ".values"],
+            state_dict[name + ".indices"],
+            state_dict.get(name + ".crow_indices"),
+            bias,
+        )
+        _set_module(model, name, sparse_module)
+    model.load_state_dict(state_dict)
+    return model
@@ -18,7 +18,7 @@
 # limitations under the License.
 import numpy as np
 
-from ..utils import logger, nn, safe_get_data, safe_get_grad, safe_get_shape, tf, torch
+from ..utils import global_kthvalue, logger, nn, safe_get_data, safe_get_grad, safe_get_shape, tf, torch
 from .base import KerasBasePattern, ProgressivePatternUtils, PytorchBasePattern, SparsityInfo, register_pattern
 
 
@@ -310,8 +310,8 @@ class PytorchPatternNxM(PytorchBasePattern):
     def get_masks_global(self, scores, cur_target_sparsity_ratio, pre_masks, keep_exact_sparsity_ratio=True):
         """Generate masks for layers.
 
-        Gather all layer's scores together and calculate a common threshold.
-        This threshold will be applied to all layers.
+        Calculate a common threshold from all layer's scores with global_kthvalue, which doesn't
+        concatenate the scores. This threshold will be applied to all layers.
 
         Args:
             scores: A dict{"layer_name": Tensor} that stores the pruning scores of weights.
@@ -340,10 +340,9 @@ class PytorchPatternNxM(PytorchBasePattern):
             if not_exceed_layers == new_not_exceed_layers or len(new_not_exceed_layers) == 0:
                 break
             not_exceed_layers = new_not_exceed_layers
-            global_scores = torch.cat([torch.flatten(new_scores[key]) for key in not_exceed_layers])
             if residual_k < 1:  # pragma: no cover
                 break
-            threshold, _ = torch.kthvalue(global_scores, residual_k)
+            threshold = global_kthvalue([new_scores[key] for key in not_exceed_layers], residual_k)
 
             for key in not_exceed_layers:
                 block_size = self.block_size[key]
@@ -19,7 +19,17 @@
 
 import numpy as np
 
-from ..utils import F, safe_get_data, safe_get_grad, safe_get_shape, safe_set_data, tf, torch
+from ..utils import (
+    USE_DEEPSPEED,
+    F,
+    PackedMasks,
+    safe_get_data,
+    safe_get_grad,
+    safe_get_shape,
+    safe_set_data,
+    tf,
+    torch,
+)
 
 PRUNERS = {}
 
@@ -186,7 +196,8 @@ class PytorchBasePruner(BasePruner):
     Attributes:
         modules: A dict {"module_name": Tensor} that stores the pruning modules' weights.
         config: A config dict object that contains the pruner information.
-        masks: A dict {"module_name": Tensor} that stores the masks for modules' weights.
+        masks: A PackedMasks {"module_name": Tensor} that stores the masks for modules' weights, the block-wise
+            masks of NxM patterns take one bit per block.
         scores: A dict {"module_name": Tensor} that stores the score for modules' weights,
             which are used to determine what parts to be pruned by a criterion.
         pattern: A Pattern object defined in ./patterns.py
@@ -209,19 +220,44 @@ class PytorchBasePruner(BasePruner):
             param_shape = safe_get_shape(module.weight)
             self.masks[key] = torch.ones(param_shape).to(module.weight.device).bool()
         self._init()
+        # pack the masks with the block sizes of the pattern
+        self.masks = self.masks
+
+    @property
+    def masks(self):
+        """Get the masks for modules' weights."""
+        return self._masks
+
+    @masks.setter
+    def masks(self, masks):
+        block_sizes = self._get_mask_block_sizes()
+        if not isinstance(masks, PackedMasks) or masks.block_sizes != block_sizes:
+            masks = PackedMasks(masks, block_sizes)
+        self._masks = masks
+
+    def _get_mask_block_sizes(self):
+        """Get the NxM block sizes of the layers whose masks can be stored with one bit per block."""
+        pattern = getattr(self, "pattern", None)
+        block_sizes = getattr(pattern, "block_size", None)
+        if USE_DEEPSPEED or not isinstance(block_sizes, dict) or pattern.block:
+            return {}
+        return {key: block_sizes[key] for key in block_sizes.keys() if key not in pattern.invalid_layers}
 
     def mask_weights(self):
         """Apply masks to corresponding modules' weights.
 
-        Weights are multiplied with masks. This is the formal pruning process.
+        Weights are multiplied with masks in place. This is the formal pruning process.
         """
         with torch.no_grad():
             for key in self.modules.keys():
                 module = self.modules[key]
                 param = module.weight
-                param_data = safe_get_data(param)
-                new_val = param_data * self.masks[key]
-                safe_set_data(new_val=new_val, param=param)
+                if USE_DEEPSPEED:  # pragma: no cover
+                    param_data = safe_get_data(param)
+                    new_val = param_data * self.masks[key]
+                    safe_set_data(new_val=new_val, param=param)
+                else:
+                    self.masks.mask_weight_(key, param.data)
 
 
 class KerasBasePruner(BasePruner):
@@ -276,7 +276,7 @@ class PytorchProgressivePruner(PytorchBasicPruner):
         with torch.no_grad():
             for key in self.modules.keys():
                 module = self.modules[key]
-                module.weight.data = module.weight.data * input_masks[key]
+                module.weight.data.mul_(input_masks[key])
 
     def print_progressive_sparsity(self):
         """Output the progressive sparsity."""
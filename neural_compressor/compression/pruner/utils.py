@@ -17,8 +17,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
 import re
-from collections import UserDict
+from collections import UserDict, namedtuple
 
 import numpy as np
 
@@ -641,6 +642,161 @@ def collect_layer_inputs(model, layers, layer_idx, layer_inputs, device="cuda:0"
     return inputs, positional_inputs, other_input_infos
 
 
+def _count_values(tensors, compare):
+    """Count the values of tensors that satisfy compare, without concatenating them."""
+    return sum(int(torch.count_nonzero(compare(t))) for t in tensors)
+
+
+def global_kthvalue(tensors, k, num_bins=1024, max_candidates=1 << 20, exact=True):
+    """Find the k-th smallest value of a group of tensors without concatenating them.
+
+    It gives the same value as torch.kthvalue(torch.cat([t.flatten() for t in tensors]), k). A value range
+    that contains the k-th value is narrowed down with the summed histograms of the tensors, the counts of
+    values below and inside the range are exact, so the histogram binning never changes the result. Once at
+    most max_candidates values are left in the range, they are gathered and the exact value is selected.
+
+    Args:
+        tensors (list): tensors of the same dtype and device.
+        k (int): the k of the k-th smallest value, starts from 1.
+        num_bins (int, optional): number of histogram bins of each pass. Defaults to 1024.
+        max_candidates (int, optional): number of values in the range to stop narrowing. Defaults to 1 << 20.
+        exact (bool, optional): whether to select the exact value among the candidates. If False, the upper
+            bound of the range is returned, which is larger than or equal to the k-th value and at most
+            max_candidates values are between them. Defaults to True.
+
+    Returns:
+        threshold (Tensor): 0-dim tensor of the k-th smallest value.
+    """
+    tensors = [t.flatten() for t in tensors if t.numel() > 0]
+    dtype, device = tensors[0].dtype, tensors[0].device
+    lo = min(t.min() for t in tensors).item()
+    hi = max(t.max() for t in tensors).item()
+    below = 0  # number of values less than lo
+    count = sum(t.numel() for t in tensors)  # number of values in [lo, hi]
+    assert 1 <= k <= count, "k should be in [1, {}], but got {}.".format(count, k)
+
+    while count > max_candidates and lo < hi and math.isfinite(lo) and math.isfinite(hi):
+        hist = sum(torch.histc(t.float(), bins=num_bins, min=lo, max=hi) for t in tensors)
+        idx = int(torch.searchsorted(torch.cumsum(hist.double(), 0), k - below))
+        idx = min(idx, num_bins - 1)
+        # widen the bin by its neighbours in case the binning rounds a value to the next bin
+        width = (hi - lo) / num_bins
+        new_lo = max(lo, lo + (idx - 1) * width)
+        new_hi = min(hi, lo + (idx + 2) * width)
+        new_below = _count_values(tensors, lambda t: t < new_lo)
+        new_count = _count_values(tensors, lambda t: (t >= new_lo) & (t <= new_hi))
+        if new_below < k <= new_below + new_count and (new_lo, new_hi) != (lo, hi):
+            lo, hi, below, count = new_lo, new_hi, new_below, new_count
+            continue
+
+        # the range is too narrow to be split by the bins, skip its smallest value with all the copies
+        value = min(torch.where(t >= lo, t, torch.full_like(t, float("inf"))).min() for t in tensors).item()
+        equal = _count_values(tensors, lambda t: t == value)
+        if k <= below + equal:
+            return torch.tensor(value, dtype=dtype, device=device)
+        if dtype not in [torch.float32, torch.float64]:
+            break
+        lo = torch.nextafter(torch.tensor(value, dtype=dtype), torch.tensor(float("inf"), dtype=dtype)).item()
+        below += equal
+        count -= equal
+
+    if not exact:
+        return torch.tensor(hi, dtype=dtype, device=device)
+    candidates = torch.cat([t[(t >= lo) & (t <= hi)] for t in tensors])
+    threshold, _ = torch.kthvalue(candidates, k - below)
+    return threshold
+
+
+_PackedMask = namedtuple("_PackedMask", ["bits", "shape", "block_size"])
+
+
+def _pack_bits(mask):
+    """Pack a bool tensor into an uint8 tensor, 8 values per byte."""
+    flat = mask.flatten().to(torch.uint8)
+    flat = torch.nn.functional.pad(flat, (0, -flat.numel() % 8)).reshape(-1, 8)
+    shifts = torch.arange(8, dtype=torch.uint8, device=mask.device)
+    return (flat << shifts).sum(dim=1, dtype=torch.uint8)
+
+
+def _unpack_bits(bits, shape):
+    """Unpack an uint8 tensor packed by _pack_bits into a bool tensor of shape."""
+    shifts = torch.arange(8, dtype=torch.uint8, device=bits.device)
+    flat = ((bits.unsqueeze(1) >> shifts) & 1).flatten().bool()
+    return flat[: math.prod(shape)].reshape(shape)
+
+
+class PackedMasks(UserDict):
+    """A dict {"module_name": Tensor} of weight masks that stores the block-wise masks with one bit per block.
+
+    A bool 2-dims mask of a layer in block_sizes is packed when its values are the same inside each NxM
+    block, other masks are stored as they are. A packed mask is expanded to its full size when it is read,
+    while mask_weight_ applies it to a weight in place without expanding it.
+
+    Args:
+        masks: A dict {"module_name": Tensor} of the initial masks.
+        block_sizes: A dict {"module_name": [N, M]} of the layers whose masks can be packed.
+    """
+
+    def __init__(self, masks=None, block_sizes=None):
+        """Initialize."""
+        self.block_sizes = block_sizes if block_sizes is not None else {}
+        super().__init__(masks)
+
+    def _pack(self, key, mask):
+        block_size = self.block_sizes.get(key)
+        if block_size is None or not isinstance(mask, torch.Tensor) or mask.dtype != torch.bool or mask.dim() != 2:
+            return None
+        rows, cols = mask.shape
+        n, m = block_size
+        if rows % n != 0 or cols % m != 0:
+            return None
+        blocks = mask.reshape(rows // n, n, cols // m, m)
+        block_mask = blocks.any(dim=3).any(dim=1)
+        if n * m > 1 and not torch.equal(block_mask, blocks.all(dim=3).all(dim=1)):
+            return None
+        return _PackedMask(_pack_bits(block_mask), tuple(mask.shape), (n, m))
+
+    def _block_mask(self, packed):
+        rows, cols = packed.shape
+        n, m = packed.block_size
+        return _unpack_bits(packed.bits, (rows // n, cols // m))
+
+    def __setitem__(self, key, mask):
+        """Store a mask, pack it if it is block-wise."""
+        packed = self._pack(key, mask)
+        self.data[key] = mask if packed is None else packed
+
+    def __getitem__(self, key):
+        """Get a mask of the full size."""
+        value = self.data[key]
+        if not isinstance(value, _PackedMask):
+            return value
+        n, m = value.block_size
+        block_mask = self._block_mask(value)
+        rows, cols = block_mask.shape
+        return block_mask[:, None, :, None].expand(rows, n, cols, m).reshape(value.shape)
+
+    def is_packed(self, key):
+        """Check if the mask of a layer is packed."""
+        return isinstance(self.data[key], _PackedMask)
+
+    def mask_weight_(self, key, weight):
+        """Multiply a weight with its mask in place.
+
+        Args:
+            key: The layer name.
+            weight: A Tensor with the same shape as the mask.
+        """
+        value = self.data[key]
+        if isinstance(value, _PackedMask) and weight.is_contiguous():
+            n, m = value.block_size
+            block_mask = self._block_mask(value)
+            rows, cols = block_mask.shape
+            weight.view(rows, n, cols, m).mul_(block_mask[:, None, :, None])
+        else:
+            weight.mul_(self[key])
+
+
 ########################################################
 ## Utility for integrate DeepSpeed
 ########################################################
@@ -742,6 +742,8 @@ class _BaseQuantizationConfig:
                  "add_qdq_pair_to_weight": whether add QDQ pair for weights, only valid for onnxrt_trt_ep
                  "optypes_to_exclude_output_quant": don"t quantize output of specified optypes
                  "dedicated_qdq_pair": whether dedicate QDQ pair, only valid for onnxrt_trt_ep
+                 "calibration_args": parameters for calibration, "num_workers" is the number of processes
+                                     computing kl and percentile ranges, only valid for onnx models
         quant_format: Support "default", "QDQ" and "QOperator", only required in ONNXRuntime.
         device: Support "cpu", "gpu", "npu" and "xpu".
         calibration_sampling_size: Number of calibration sample.
@@ -908,6 +910,12 @@ class _BaseQuantizationConfig:
             else:
                 return {}
 
+        def calibration_args(val=None):
+            if val is not None:
+                return _check_value("calibration_args", val, dict)
+            else:
+                return {}
+
         def awq_args(val=None):
             if val is not None:
                 return _check_value("awq_args", val, dict)
@@ -1012,6 +1020,7 @@ class _BaseQuantizationConfig:
             "add_qdq_pair_to_weight": add_qdq_pair_to_weight,
             "optypes_to_exclude_output_quant": optypes_to_exclude_output_quant,
             "dedicated_qdq_pair": dedicated_qdq_pair,
+            "calibration_args": calibration_args,
             "rtn_args": rtn_args,
             "awq_args": awq_args,
             "gptq_args": gptq_args,
@@ -1211,6 +1220,8 @@ class PostTrainingQuantConfig(_BaseQuantizationConfig):
                  "add_qdq_pair_to_weight": whether add QDQ pair for weights, only valid for onnxrt_trt_ep
                  "optypes_to_exclude_output_quant": don"t quantize output of specified optypes
                  "dedicated_qdq_pair": whether dedicate QDQ pair, only valid for onnxrt_trt_ep
+                 "calibration_args": parameters for calibration, "num_workers" is the number of processes
+                                     computing kl and percentile ranges, only valid for onnx models
         quant_format: Support "default", "QDQ" and "QOperator", only required in ONNXRuntime.
         inputs: Inputs of model, only required in tensorflow.
         outputs: Outputs of model, only required in tensorflow.
@@ -1617,6 +1628,15 @@ class KnowledgeDistillationLossConfig:
             First item is the weight multiplied to the loss of student model output and groundtruth label,
             second item is the weight multiplied to the loss of student model output and teacher model output.
             Defaults to [0.5, 0.5].
+        teacher_cache_dir (str, optional): directory to cache the teacher model outputs. The outputs are read
+            from the cache instead of running the teacher model when the sample indices of the batch are passed
+            to on_after_compute_loss, and the cache is cleared when the teacher model weights change.
+            Defaults to None, which doesn't cache.
+        teacher_cache_top_k (int, optional): number of the largest teacher outputs to cache for each sample,
+            the others are restored as -inf logits (0 probabilities for TensorFlow). Defaults to None, which
+            caches all the outputs.
+        teacher_cache_dtype (str, optional): dtype of the cached teacher outputs, like "float16".
+            Defaults to "float32".
 
     Example::
 
@@ -1629,7 +1649,15 @@ class KnowledgeDistillationLossConfig:
         model = compression_manager.model
     """
 
-    def __init__(self, temperature=1.0, loss_types=["CE", "CE"], loss_weights=[0.5, 0.5]):
+    def __init__(
+        self,
+        temperature=1.0,
+        loss_types=["CE", "CE"],
+        loss_weights=[0.5, 0.5],
+        teacher_cache_dir=None,
+        teacher_cache_top_k=None,
+        teacher_cache_dtype="float32",
+    ):
         """Init a KnowledgeDistillationLossConfig object."""
         self.config = DotDict(
             {
@@ -1637,6 +1665,9 @@ class KnowledgeDistillationLossConfig:
                     "temperature": temperature,
                     "loss_types": loss_types,
                     "loss_weights": loss_weights,
+                    "teacher_cache_dir": teacher_cache_dir,
+                    "teacher_cache_top_k": teacher_cache_top_k,
+                    "teacher_cache_dtype": teacher_cache_dtype,
                 }
             }
         )
@@ -21,7 +21,9 @@ import os
 import sys
 from pathlib import Path
 
-from neural_compressor.adaptor.ox_utils.util import MAXIMUM_PROTOBUF
+import numpy as np
+
+from neural_compressor.adaptor.ox_utils.util import MAXIMUM_PROTOBUF, dtype_mapping
 from neural_compressor.model.base_model import BaseModel
 from neural_compressor.utils.utility import LazyImport
 
@@ -31,6 +33,197 @@ ortq = LazyImport("neural_compressor.adaptor.ox_utils.util")
 
 logger = logging.getLogger("neural_compressor")
 
+# onnx data types stored as raw bytes of the numpy dtype of the same name, bfloat16 and string have no such dtype
+RAW_DATA_NP_DTYPE = {
+    dtype_mapping[name]: np.dtype(name)
+    for name in [
+        "float32",
+        "uint8",
+        "int8",
+        "uint16",
+        "int16",
+        "int32",
+        "int64",
+        "bool",
+        "float16",
+        "double",
+        "uint32",
+        "uint64",
+        "complex64",
+        "complex128",
+    ]
+}
+
+
+class _NameIndex:
+    """Name index of a repeated field of the graph, such as graph.node or graph.initializer.
+
+    The index is built on the first lookup. Elements appended to the field directly are indexed on the next
+    lookup, and the index is rebuilt if the field shrinks without going through `remove`. With `scan_on_miss`,
+    a name missing from the index is looked up by a linear scan, so an element renamed in place is still found
+    and indexed under its new name.
+    """
+
+    # number of removals after which the position hints are refreshed
+    MAX_POSITION_DRIFT = 256
+
+    def __init__(self, model, field_name, scan_on_miss=False):
+        """Initialize the index.
+
+        Args:
+            model (ONNXModel): the model owning the graph.
+            field_name (str): name of the indexed field of the graph, "node" or "initializer".
+            scan_on_miss (bool, optional): whether look up a missing name by a linear scan. Defaults to False.
+        """
+        self.model = model
+        self.field_name = field_name
+        self.scan_on_miss = scan_on_miss
+        self.reset()
+
+    def __getstate__(self):
+        """Drop the indexed elements when the model is copied, they belong to the graph of the original."""
+        return {"model": self.model, "field_name": self.field_name, "scan_on_miss": self.scan_on_miss}
+
+    def __setstate__(self, state):
+        """Restore an empty index."""
+        self.__dict__.update(state)
+        self.reset()
+
+    def _get_field(self):
+        return getattr(self.model.model.graph, self.field_name)
+
+    def reset(self):
+        """Drop the index, it's rebuilt on the next lookup."""
+        self._elements = None
+        # id of element -> upper bound of its position, only removals before it move it towards the front
+        self._positions = {}
+        self._size = 0
+        self._drift = 0
+
+    def _add_element(self, element, position):
+        self._elements.setdefault(element.name, []).append(element)
+        self._positions[id(element)] = position
+
+    def _remove_element(self, element):
+        elements = self._elements.get(element.name, [])
+        for idx, indexed in enumerate(elements):
+            if indexed is element:
+                del elements[idx]
+                break
+        self._positions.pop(id(element), None)
+
+    def sync(self):
+        """Bring the index up to date with the elements added to or removed from the field directly."""
+        field = self._get_field()
+        if self._elements is None or len(field) < self._size:
+            self.reset()
+            self._elements = {}
+            start = 0
+        elif len(field) > self._size:
+            start = self._size
+        else:
+            return
+        for position in range(start, len(field)):
+            self._add_element(field[position], position)
+        self._size = len(field)
+
+    def get(self, name):
+        """Get the first element of a name, None if there is no such element."""
+        self.sync()
+        for element in self._elements.get(name, []):
+            if element.name == name:
+                return element
+        if not self.scan_on_miss:
+            return None
+        for position, element in enumerate(self._get_field()):
+            if element.name == name:
+                self._add_element(element, position)
+                return element
+        return None
+
+    def _refresh_positions(self):
+        for position, element in enumerate(self._get_field()):
+            self._positions[id(element)] = position
+        self._drift = 0
+
+    def _find_position(self, element):
+        field = self._get_field()
+        position = self._positions.get(id(element))
+        if position is not None:
+            for idx in range(min(position, len(field) - 1), max(position - self._drift, 0) - 1, -1):
+                if field[idx] is element:
+                    return idx
+        # not an element of the field, compare the contents like RepeatedCompositeFieldContainer.remove
+        for idx, candidate in enumerate(field):
+            if candidate == element:
+                return idx
+        return None
+
+    def remove(self, elements):
+        """Remove elements from the field with a single deletion per element."""
+        elements = list(elements)
+        self.sync()
+        if len(elements) > 1 or self._drift > self.MAX_POSITION_DRIFT:
+            self._refresh_positions()
+        field = self._get_field()
+        positions = set()
+        for element in elements:
+            position = self._find_position(element)
+            if position is not None:
+                positions.add(position)
+        for position in sorted(positions, reverse=True):
+            self._remove_element(field[position])
+            del field[position]
+        self._size -= len(positions)
+        self._drift += len(positions)
+
+
+class _NodeIndex(_NameIndex):
+    """Name index of graph.node which also keeps the consumers of each tensor.
+
+    Consumers are checked on lookup, so a node whose input is replaced in place is dropped. A node which starts
+    consuming a tensor in place isn't noticed until it's passed to `update_inputs` or the index is reset.
+    """
+
+    def reset(self):
+        """Drop the index, it's rebuilt on the next lookup."""
+        super().reset()
+        self._consumers = {}
+
+    def _add_element(self, element, position):
+        super()._add_element(element, position)
+        self._add_consumer(element)
+
+    def _add_consumer(self, element):
+        for name in set(element.input):
+            consumers = self._consumers.setdefault(name, [])
+            if not any(consumer is element for consumer in consumers):
+                consumers.append(element)
+
+    def _remove_element(self, element):
+        super()._remove_element(element)
+        for name in set(element.input):
+            consumers = self._consumers.get(name, [])
+            for idx, consumer in enumerate(consumers):
+                if consumer is element:
+                    del consumers[idx]
+                    break
+
+    def update_inputs(self, node):
+        """Index the inputs of a node of the graph after they are changed in place."""
+        if self._elements is not None and id(node) in self._positions:
+            self._add_consumer(node)
+
+    def get_consumers(self, name):
+        """Get the nodes which take a tensor as input."""
+        self.sync()
+        consumers = [node for node in self._consumers.get(name, []) if name in node.input]
+        if consumers:
+            self._consumers[name] = consumers
+        else:
+            self._consumers.pop(name, None)
+        return consumers
+
 
 class ONNXModel(BaseModel):
     """Build ONNX model."""
@@ -62,6 +255,9 @@ class ONNXModel(BaseModel):
             self._config = AutoConfig.from_pretrained(Path(model).parent.as_posix())
 
         self.node_name_counter = {}
+        # nodes are often renamed in place, e.g. with a "_quant" suffix by the quantizer
+        self._node_index = _NodeIndex(self, "node", scan_on_miss=True)
+        self._initializer_index = _NameIndex(self, "initializer")
         self._output_name_to_node = {}
         self._input_name_to_nodes = {}
         self._get_input_name_to_nodes(self._model.graph.node)
@@ -136,6 +332,8 @@ class ONNXModel(BaseModel):
     def model(self, model):
         """Set model itself."""
         self._model = model
+        self._node_index.reset()
+        self._initializer_index.reset()
         self._graph_info = {}
         self._get_graph_info()
         self._output_name_to_node = {}
@@ -152,7 +350,12 @@ class ONNXModel(BaseModel):
         return [i.name for i in self._model.graph.output]
 
     def update(self):
-        """Update model info."""
+        """Update model info.
+
+        Call it after the graph is changed without the methods of ONNXModel, e.g. graph.ClearField("node").
+        """
+        self._node_index.reset()
+        self._initializer_index.reset()
         self._graph_info = {}
         self._get_graph_info()
         self._output_name_to_node = {}
@@ -218,13 +421,11 @@ class ONNXModel(BaseModel):
 
     def remove_node(self, node):
         """Remove a node from model."""
-        if node in self._model.graph.node:
-            self._model.graph.node.remove(node)
+        self._node_index.remove([node])
 
     def remove_nodes(self, nodes_to_remove):
         """Remove nodes from model."""
-        for node in nodes_to_remove:
-            self.remove_node(node)
+        self._node_index.remove(nodes_to_remove)
 
     def add_node(self, node):
         """Add a node to model."""
@@ -236,7 +437,7 @@ class ONNXModel(BaseModel):
 
     def add_initializer(self, tensor):
         """Add a initializer to model."""
-        if ortq.find_by_name(tensor.name, self._model.graph.initializer) is None:
+        if self.get_initializer(tensor.name) is None:
             self._model.graph.initializer.extend([tensor])
 
     def add_initializers(self, tensors):
@@ -246,51 +447,57 @@ class ONNXModel(BaseModel):
 
     def get_initializer(self, name):
         """Get an initializer by name."""
-        for tensor in self._model.graph.initializer:
-            if tensor.name == name:
-                return tensor
-        return None
+        return self._initializer_index.get(name)
 
     def get_initializer_share_num(self, name):
-        """Get the number of shares of initializer."""
-        num = 0
-        if self.get_initializer(name) is None:
-            return num
+        """Get the number of shares of initializer.
 
-        for node in self.nodes():
-            if name in node.input:
-                num += 1
-        return num
+        Nodes of the graph whose inputs are written in place must be passed to `update_node_inputs`.
+        """
+        if self.get_initializer(name) is None:
+            return 0
+        return len(self._node_index.get_consumers(name))
 
     def get_node(self, name):
         """Get a node by name."""
-        for node in self._model.graph.node:
-            if node.name == name:
-                return node
-        return None
+        return self._node_index.get(name)
 
     def remove_initializer(self, tensor):
         """Remove an initializer from model."""
-        if tensor in self._model.graph.initializer:
-            self._model.graph.initializer.remove(tensor)
+        self._initializer_index.remove([tensor])
 
     def remove_initializers(self, init_to_remove):
         """Remove initializers from model."""
-        for initializer in init_to_remove:
-            self.remove_initializer(initializer)
+        self._initializer_index.remove(init_to_remove)
 
     def set_initializer(self, tensor, array, raw=False):
-        """Update initializer."""
+        """Update initializer.
+
+        The initializer is replaced with one of the same dims and data type holding the array as raw bytes. The
+        data of an initializer stored in an external data file is kept in memory afterwards, the file isn't changed.
+
+        Args:
+            tensor (str): name of the initializer.
+            array (np.ndarray): new data, it's cast to the data type of the initializer.
+            raw (bool, optional): whether the array already has the data type of the initializer, its bytes are
+                written as they are. Defaults to False.
+        """
         old_tensor = self.get_initializer(tensor)
         self.remove_initializer(old_tensor)
         dims = old_tensor.dims
         data_type = old_tensor.data_type
-        new_tensor = (
-            onnx.helper.make_tensor(tensor, data_type, dims, array.flatten().tolist())
-            if not raw
-            else onnx.helper.make_tensor(tensor, data_type, dims, array.tostring(), raw=raw)
-        )
-        self.add_initializer(new_tensor)
+        np_dtype = RAW_DATA_NP_DTYPE.get(data_type)
+        if not raw and np_dtype is None:
+            # no numpy dtype to cast to, let onnx convert the values, e.g. float32 to bfloat16
+            self.add_initializer(onnx.helper.make_tensor(tensor, data_type, dims, array.flatten().tolist()))
+            return
+        array = np.ascontiguousarray(array if raw else array.astype(np_dtype, copy=False))
+        # fill a new element of the field in place, extend would copy the data once more
+        new_tensor = self._model.graph.initializer.add()
+        new_tensor.name = tensor
+        new_tensor.data_type = data_type
+        new_tensor.dims.extend(dims)
+        new_tensor.raw_data = array.tobytes()
 
     @property
     def input_name_to_nodes(self):
@@ -459,24 +666,28 @@ class ONNXModel(BaseModel):
             )
         onnx.save_model(self._model, output_path)
 
-    @staticmethod
-    def replace_node_input(node, old_input_name, new_input_name):
+    def update_node_inputs(self, node):
+        """Update the consumers of the tensors after the inputs of a node in the graph are written in place."""
+        self._node_index.update_inputs(node)
+
+    def replace_node_input(self, node, old_input_name, new_input_name):
         """Replace input of a node."""
         assert isinstance(old_input_name, str) and isinstance(new_input_name, str)
         for j in range(len(node.input)):
             if node.input[j] == old_input_name:
                 node.input[j] = new_input_name
+        self.update_node_inputs(node)
 
     def replace_input_of_all_nodes(self, old_input_name, new_input_name, white_optype=[], black_optype=[]):
         """Replace inputs of all nodes."""
         if len(white_optype) > 0:
             for node in self.model.graph.node:
                 if node.op_type in white_optype:
-                    ONNXModel.replace_node_input(node, old_input_name, new_input_name)
+                    self.replace_node_input(node, old_input_name, new_input_name)
         else:
             for node in self.model.graph.node:
                 if node.op_type not in black_optype:
-                    ONNXModel.replace_node_input(node, old_input_name, new_input_name)
+                    self.replace_node_input(node, old_input_name, new_input_name)
 
     @staticmethod
     def replace_node_output(node, old_output_name, new_output_name):
@@ -596,6 +807,7 @@ class ONNXModel(BaseModel):
         assert len(list(set([n.name for n in nodes]))) == len(list(set([n.name for n in self.model.graph.node])))
         self.model.graph.ClearField("node")
         self.model.graph.node.extend(nodes)
+        self._node_index.reset()
 
     def get_nodes_chain(self, start, stop, result_chain=[]):
         """Get nodes chain with given start node and stop node."""
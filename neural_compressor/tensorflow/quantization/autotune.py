@@ -14,18 +14,28 @@
 """Intel Neural Compressor Tensorflow quantization AutoTune API."""
 
 
+import os
+import pickle
 from copy import deepcopy
+from functools import partial
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import tensorflow as tf
 
-from neural_compressor.common import logger
+from neural_compressor.common import logger, options
 from neural_compressor.common.base_config import BaseConfig, get_all_config_set_from_config_registry
-from neural_compressor.common.base_tuning import EvaluationFuncWrapper, TuningConfig, init_tuning
+from neural_compressor.common.base_tuning import EvaluationFuncWrapper, ParallelTrialRunner, TuningConfig, init_tuning
 from neural_compressor.common.utils import call_counter, dump_elapsed_time
 from neural_compressor.tensorflow.quantization import quantize_model
 from neural_compressor.tensorflow.quantization.config import FRAMEWORK_NAME, StaticQuantConfig
-from neural_compressor.tensorflow.utils import BaseModel, Model, constants
+from neural_compressor.tensorflow.utils import (
+    BaseModel,
+    KerasModel,
+    Model,
+    TensorflowSavedModelModel,
+    constants,
+    version1_gte_version2,
+)
 
 __all__ = [
     "autotune",
@@ -38,6 +48,74 @@ def get_all_config_set() -> Union[BaseConfig, List[BaseConfig]]:
     return get_all_config_set_from_config_registry(fwk_name=FRAMEWORK_NAME)
 
 
+def _init_trial_threads(cores):
+    """Limit the TensorFlow threads of a trial worker to its cores, before the runtime is initialized."""
+    tf.config.threading.set_intra_op_parallelism_threads(len(cores))
+
+
+def _run_trial(model_path, eval_fn, eval_args, calib_dataloader, calib_iteration, calib_func, quant_config):
+    """Load the float model, quantize it with the quant config and evaluate it in a trial worker."""
+    q_model = quantize_model(Model(model_path), quant_config, calib_dataloader, calib_iteration, calib_func)
+    return EvaluationFuncWrapper(eval_fn, eval_args).evaluate(q_model)
+
+
+def _save_float_model(model: BaseModel) -> str:
+    """Save the float model to the workspace for the trial workers to load it, return the saved path."""
+    root = os.path.join(os.path.abspath(options.workspace), "autotune_fp32_model")
+    if isinstance(model, KerasModel):
+        root += ".keras" if version1_gte_version2(tf.__version__, "2.16.1") else ""
+    elif not isinstance(model, TensorflowSavedModelModel):
+        root += ".pb"
+    model.save(root)
+    return root
+
+
+def _autotune_in_parallel(
+    model,
+    model_path,
+    tune_config,
+    config_loader,
+    tuning_logger,
+    tuning_monitor,
+    eval_fn,
+    eval_args,
+    calib_dataloader,
+    calib_iteration,
+    calib_func,
+):
+    """Run the trials in spawned worker processes.
+
+    Returns:
+        tuple: whether the trials ran in parallel, and the best quantized model or None if no trial met the goal.
+    """
+    if not ParallelTrialRunner.is_supported(start_method="spawn"):  # pragma: no cover
+        return False, None
+    try:
+        pickle.dumps((eval_fn, eval_args, calib_dataloader, calib_func))
+    except Exception as e:
+        logger.warning(f"Parallel trials need a picklable eval_fn and calibration data but {e}, run them one by one.")
+        return False, None
+    # TensorFlow doesn't survive forking, the spawned workers load the float model again
+    if model_path is None:
+        model_path = _save_float_model(model)
+    trial_fn = partial(_run_trial, model_path, eval_fn, eval_args, calib_dataloader, calib_iteration, calib_func)
+    runner = ParallelTrialRunner(
+        trial_fn,
+        tune_config.num_parallel_trials,
+        tune_config.cores_per_trial,
+        worker_init_fn=_init_trial_threads,
+        start_method="spawn",
+    )
+    stop_trial_index = runner.run(config_loader, tuning_logger, tuning_monitor)
+    if stop_trial_index is None:
+        return True, None
+    logger.info("Stopped tuning.")
+    # the quantized models stay in the worker processes, quantize the best config again
+    logger.info("Re-quantizing with best quantization config...")
+    best_quant_config: BaseConfig = tuning_monitor.get_best_quant_config()
+    return True, quantize_model(model, best_quant_config, calib_dataloader, calib_iteration, calib_func)
+
+
 @dump_elapsed_time("Pass auto-tune")
 @call_counter
 def autotune(
@@ -49,7 +127,13 @@ def autotune(
     calib_iteration: int = 100,
     calib_func: Callable = None,
 ) -> Optional[BaseModel]:
-    """The main entry of auto-tune."""
+    """The main entry of auto-tune.
+
+    With `tune_config.num_parallel_trials` > 1 the trials run in spawned worker processes which load the float
+    model from its path, or from a copy saved to the workspace, so `eval_fn`, `eval_args` and the calibration
+    data must be picklable. Otherwise the trials run one by one.
+    """
+    model_path = model if isinstance(model, str) else None
     model = Model(model)
     best_quant_model = None
     eval_func_wrapper = EvaluationFuncWrapper(eval_fn, eval_args)
@@ -57,6 +141,23 @@ def autotune(
     baseline: float = eval_func_wrapper.evaluate(model)
     tuning_monitor.set_baseline(baseline)
     tuning_logger.tuning_start()
+    if tune_config.num_parallel_trials > 1:
+        ran_in_parallel, best_quant_model = _autotune_in_parallel(
+            model,
+            model_path,
+            tune_config,
+            config_loader,
+            tuning_logger,
+            tuning_monitor,
+            eval_fn,
+            eval_args,
+            calib_dataloader,
+            calib_iteration,
+            calib_func,
+        )
+        if ran_in_parallel:
+            tuning_logger.tuning_end()
+            return best_quant_model
     for trial_index, quant_config in enumerate(config_loader, 1):
         tuning_logger.trial_start(trial_index=trial_index)
         tuning_logger.execution_start()
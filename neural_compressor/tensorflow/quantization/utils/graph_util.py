@@ -17,6 +17,7 @@
 """Tensorflow Graph Utils Helper Classes."""
 
 import copy
+import itertools
 import logging
 import re
 from collections import namedtuple
@@ -211,7 +212,38 @@ class GraphAnalyzer:
         else:
             return self._search_patterns(patterns)
 
-    def _search_patterns(self, input_pattern):
+    def query_multi_fusion_pattern_nodes(self, patterns_list):
+        """Query the nodes aggregation status of several patterns in one pass over the graph.
+
+        The op type index of the graph is built once and shared by all the patterns.
+
+        Args:
+            patterns_list (list): list of patterns, please check the _search_patterns definition.
+
+        Returns:
+            [list]: The matched node names of each pattern, in the order of patterns_list.
+        """
+        if self.extend_engine:
+            # Todo keep this for future extension API
+            pass
+        else:
+            op_index = self._build_op_index()
+            return [self._search_patterns(patterns, op_index) for patterns in patterns_list]
+
+    def _build_op_index(self):
+        """Group the nodes of the graph by op type.
+
+        Returns:
+            [dict]: op type to the list of (position, node) of the nodes with this op type,
+                ordered by the position of the node in node_name_details.
+        """
+        op_index = {}
+        for position, details in enumerate(self.node_name_details.values()):
+            node = details.node
+            op_index.setdefault(node.op, []).append((position, node))
+        return op_index
+
+    def _search_patterns(self, input_pattern, op_index=None):
         """Search user specified patterns on internal graph structure.
 
         Args:
@@ -225,6 +257,8 @@ class GraphAnalyzer:
             Conv2D + BiasAdd + AddN + Relu6
             Conv2D + BiasAdd + Relu
             Conv2D + BiasAdd + Relu6
+            op_index (dict, optional): op type index returned by _build_op_index. Defaults to None,
+            which builds it from the current graph.
 
         Return: [string list]. Each matched pattern composed of matched node name and we put the
                     match node op as the last element of each pair.
@@ -252,38 +286,16 @@ class GraphAnalyzer:
 
             return False
 
-        def _compare_list(list_a, list_b):
-            """Check list a is a subset of list b.
-
-            e.g, list a is ['a', 'b', 'c'] while list b is ['a', 'b', 'c', 'd'],
-            then list a is subset of list b.
-
-            Args:
-                list_a ([Any]): list A
-                list_b ([Any]): list B
-
-            Returns:
-                [bool]: list a is a subset of list b or not.
-            """
-            assert isinstance(list_a, list)
-            assert isinstance(list_b, list)
-            is_subset = True
-
-            for index, value in enumerate(list_a):
-                is_subset &= value == list_b[index]
-
-            return is_subset
-
-        def _dfs(op_names, op_types, graph_info, node, pattern):
-            if pattern == []:
+        def _dfs(op_names, op_types, graph_info, node, pattern_len):
+            """Match input_pattern[:pattern_len] backward from node, op_names/op_types is the matched path."""
+            if pattern_len == 0:
                 return
-            start_index = 0
-            end_index = len(pattern) - 1
+            end_index = pattern_len - 1
             matched_flag = False
-            while start_index <= end_index:
-                matched_flag = _validate_input(node.op, pattern[end_index])
+            while end_index >= 0:
+                matched_flag = _validate_input(node.op, input_pattern[end_index])
 
-                if not matched_flag and isinstance(pattern[end_index], tuple):
+                if not matched_flag and isinstance(input_pattern[end_index], tuple):
                     end_index -= 1
                     continue
 
@@ -294,80 +306,67 @@ class GraphAnalyzer:
 
                 return
 
-            if start_index == end_index:
+            if end_index == 0:
                 if matched_flag:
-                    matched_res = copy.deepcopy(op_names)
-                    matched_res.reverse()
-                    op_types_copy = copy.deepcopy(op_types)
-                    op_types_copy.reverse()
-                    matched_res.append(op_types_copy)
-                    if matched_res not in output_result:
-                        output_result.append(matched_res)
+                    matched_names = tuple(reversed(op_names))
+                    if matched_names not in matched_set:
+                        matched_set.add(matched_names)
+                        output_result.append(list(matched_names) + [op_types[::-1]])
 
                     op_names.pop()
                     op_types.pop()
                 return
 
+            # the same length as input_pattern[:end_index] of a slice
+            next_len = end_index if end_index >= 0 else pattern_len - 1
             for index, value in enumerate(node.input):
                 cur_node = graph_info[GraphRewriterHelper.node_name_from_input(value)].node
-                _dfs(op_names, op_types, graph_info, cur_node, pattern[:end_index])
+                _dfs(op_names, op_types, graph_info, cur_node, next_len)
                 if index == len(node.input) - 1:
                     op_names.pop()
                     op_types.pop()
 
-        output_result = []
-
-        for _, v in self.node_name_details.items():
-            start_index = len(input_pattern) - 1
-            while start_index >= 0:
-                find_first_match = _validate_input(v.node.op, input_pattern[start_index])
-                if find_first_match:
-                    break
-
-                if isinstance(input_pattern[start_index], tuple):
-                    start_index -= 1
-                    continue
+        if op_index is None:
+            op_index = self._build_op_index()
 
-                start_index = -2
-
-            if start_index < 0:
-                continue
-
-            visited_op_name = []
-            visited_op_types = []
+        # the first matched node must match the last mandatory element or an optional one after it
+        start_ops = set()
+        for criteria in reversed(input_pattern):
+            start_ops.update([criteria] if isinstance(criteria, str) else criteria)
+            if not isinstance(criteria, tuple):
+                break
+        start_nodes = [op_index[op] for op in start_ops if op in op_index]
+        if len(start_nodes) == 1:
+            start_nodes = start_nodes[0]
+        else:
+            start_nodes = sorted(itertools.chain.from_iterable(start_nodes), key=lambda i: i[0])
 
-            _dfs(visited_op_name, visited_op_types, self.node_name_details, v.node, input_pattern)
+        output_result = []
+        matched_set = set()
+        for _, node in start_nodes:
+            _dfs([], [], self.node_name_details, node, len(input_pattern))
 
         sorted_output = sorted(output_result, key=lambda i: i[-1])
 
-        useless_match_list = []
-        for index, value in enumerate(sorted_output):
-            if index == len(sorted_output) - 1:
-                break
-
+        # drop the matches whose node names are the head of the next match
+        useless_match = [False] * len(sorted_output)
+        for index in range(len(sorted_output) - 1):
+            matched_op_names = sorted_output[index][:-1]
             next_matched_op_names = sorted_output[index + 1][:-1]
-            if len(value[:-1]) < len(next_matched_op_names) and _compare_list(value[:-1], next_matched_op_names):
-                useless_match_list.append(value)
-
-        for i in useless_match_list:
-            sorted_output.remove(i)
+            if (
+                len(matched_op_names) < len(next_matched_op_names)
+                and matched_op_names == next_matched_op_names[: len(matched_op_names)]
+            ):
+                useless_match[index] = True
+        sorted_output = [i for i, useless in zip(sorted_output, useless_match) if not useless]
 
         longest_match = {}
-        final_output = []
         for i in sorted_output:
             key = i[0]
-            if key not in longest_match:
+            if key not in longest_match or len(longest_match[key]) < len(i[-1]):
                 longest_match[key] = i[-1]
-                continue
-
-            if len(longest_match[key]) < len(i[-1]):
-                longest_match[key] = i[-1]
-
-        for i in sorted_output:
-            if i[0] in longest_match and i[-1] == longest_match[i[0]]:
-                final_output.append(i)
 
-        return final_output
+        return [i for i in sorted_output if i[-1] == longest_match[i[0]]]
 
     def remove_node_with_single_input_output(self, node_name):
         """Remove node with one input and rebuild internal graph data structure.
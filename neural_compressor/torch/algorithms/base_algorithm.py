@@ -14,14 +14,126 @@
 """Intel Neural Compressor PyTorch Quantizer API."""
 
 import copy
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import Any, Optional
 
 import torch
+from torch.ao.quantization.observer import ObserverBase
 
 from neural_compressor.common.utils import Mode
 
 
+class CalibrationCache:
+    """Cache of observer statistics shared by the quantizations of one float model.
+
+    Observers only record the float activations and weights flowing through the prepared model, so
+    quantizing the same model with the same calibration function gives the same statistics for an op
+    whatever the configs of the other ops are. The cache keeps the observer states keyed by
+    (op, observer type) and loads them into later prepared models instead of running the calibration
+    function again. It is only consulted by quantizers with `support_calib_cache` set, inside `activate`.
+
+    Example:
+        calib_cache = CalibrationCache()
+        with calib_cache.activate():
+            q_model = quantize(model_1, quant_config_1, run_fn=run_fn)
+            q_model = quantize(model_2, quant_config_2, run_fn=run_fn)  # reuse the statistics if possible
+    """
+
+    _active = None
+
+    def __init__(self):
+        """Init a CalibrationCache object."""
+        self.observer_states = {}
+        self.calib_time = 0.0
+        self.hits = 0
+        self.time_saved = 0.0
+
+    @classmethod
+    def get_active(cls) -> Optional["CalibrationCache"]:
+        """Get the activated calibration cache, None if no cache is activated."""
+        return cls._active
+
+    @contextmanager
+    def activate(self):
+        """Activate the cache for the quantizations in the context."""
+        previous, CalibrationCache._active = CalibrationCache._active, self
+        try:
+            yield self
+        finally:
+            CalibrationCache._active = previous
+
+    @staticmethod
+    def _get_observer_key(observer, op_name):
+        # the attributes changing the statistics recorded by torch.ao observers
+        attrs = tuple(getattr(observer, attr, None) for attr in ("ch_axis", "bins", "averaging_constant"))
+        return (op_name, type(observer).__name__) + attrs
+
+    def _get_observer_keys(self, model):
+        """Get the observers of the prepared model and their cache keys, None if any of them can't be cached."""
+        observers = {name: module for name, module in model.named_modules() if isinstance(module, ObserverBase)}
+        if not observers:
+            return None
+        op_names = {}
+        if isinstance(model, torch.fx.GraphModule):
+            # observers of an fx graph are named by index, use the node observed by them instead
+            for node in model.graph.nodes:
+                if node.op == "call_module" and node.target in observers:
+                    if node.target in op_names or not isinstance(node.args[0], torch.fx.Node):
+                        return None  # shared observers record the statistics of several nodes
+                    op_names[node.target] = node.args[0].name
+        else:
+            op_names = {name: name.rpartition(".")[0] for name in observers}
+        if set(op_names) != set(observers):
+            return None
+        return {
+            name: (observer, self._get_observer_key(observer, op_names[name])) for name, observer in observers.items()
+        }
+
+    def load(self, model: torch.nn.Module) -> bool:
+        """Load the cached observer states into a prepared model.
+
+        Args:
+            model (torch.nn.Module): the prepared model.
+
+        Returns:
+            bool: True if all observers of the model are loaded and the calibration can be skipped.
+        """
+        observer_keys = self._get_observer_keys(model)
+        if observer_keys is None or any(key not in self.observer_states for _, key in observer_keys.values()):
+            return False
+        loaded_observers = {}
+        for name, (observer, key) in observer_keys.items():
+            loaded_observer = copy.deepcopy(observer)
+            try:
+                loaded_observer.load_state_dict(self.observer_states[key])
+            except RuntimeError:
+                return False
+            loaded_observers[name] = loaded_observer
+        # replace observers only after all of them are loaded, to not mix cached and calibrated statistics
+        for name, loaded_observer in loaded_observers.items():
+            parent_name, _, attr_name = name.rpartition(".")
+            setattr(model.get_submodule(parent_name), attr_name, loaded_observer)
+        self.hits += 1
+        self.time_saved += self.calib_time
+        return True
+
+    def save(self, model: torch.nn.Module, calib_time: float = 0.0):
+        """Save the observer states of a calibrated model.
+
+        Args:
+            model (torch.nn.Module): the calibrated model.
+            calib_time (float, optional): seconds spent in calibration. Defaults to 0.0.
+        """
+        observer_keys = self._get_observer_keys(model)
+        if observer_keys is None:
+            return
+        for observer, key in observer_keys.values():
+            self.observer_states[key] = {k: v.detach().clone() for k, v in observer.state_dict().items()}
+        self.calib_time = max(self.calib_time, calib_time)
+
+
 class Quantizer(ABC):
     """The base quantizer for all algorithm quantizers.
 
@@ -32,8 +144,13 @@ class Quantizer(ABC):
         - `prepare`: prepare a given model for convert.
         - `convert`: convert a prepared model to a quantized model.
     Note: `quantize` and `execute` are optional for new quantization algorithms.
+
+    Set `support_calib_cache` if the calibration only records statistics with torch.ao observers, so that
+    an activated `CalibrationCache` can skip calibrating the same float model again.
     """
 
+    support_calib_cache = False
+
     def __init__(self, quant_config: Optional[Any] = None):
         """Init a Quantizer object.
 
@@ -90,11 +207,16 @@ class Quantizer(ABC):
 
         run_fn = kwargs.get("run_fn", None)
         if run_fn is not None:
-            run_args = kwargs.get("run_args", None)
-            if run_args:
-                run_fn(model, *run_args)
-            else:
-                run_fn(model)
+            calib_cache = CalibrationCache.get_active() if self.support_calib_cache else None
+            if calib_cache is None or not calib_cache.load(model):
+                start = time.time()
+                run_args = kwargs.get("run_args", None)
+                if run_args:
+                    run_fn(model, *run_args)
+                else:
+                    run_fn(model)
+                if calib_cache is not None:
+                    calib_cache.save(model, time.time() - start)
 
         model = self.convert(model, *args, **kwargs)
 
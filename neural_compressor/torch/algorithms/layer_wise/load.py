@@ -17,8 +17,13 @@
 """Load one specify tensor from a bin file."""
 
 import io
+import mmap
 import os
+import pickle as std_pickle
+import struct
+import sys
 import warnings
+import zipfile
 from typing import IO, Any, BinaryIO, Callable, Dict, Optional, Union
 
 from packaging.version import Version
@@ -271,3 +276,151 @@ def load(
                     opened_file.seek(orig_position)
                     return torch.jit.load(opened_file, map_location=map_location)
                 return _load(opened_zipfile, tensor_name, prefix, map_location, pickle_module, **pickle_load_args)
+
+
+class _StorageMeta:
+    """Placeholder of a serialized storage, records where its bytes live."""
+
+    def __init__(self, key, dtype):
+        self.key = key
+        self.dtype = dtype
+
+
+class TensorMeta:
+    """Location and layout of a serialized tensor."""
+
+    def __init__(self, key, dtype, storage_offset, size, stride):
+        self.key = key
+        self.dtype = dtype
+        self.storage_offset = storage_offset
+        self.size = tuple(size)
+        self.stride = tuple(stride)
+
+    @classmethod
+    def rebuild(cls, storage, storage_offset, size, stride, *args, **kwargs):
+        """Replacement of torch._utils._rebuild_tensor_v2 used while indexing."""
+        return cls(storage.key, storage.dtype, storage_offset, size, stride)
+
+
+class _IndexUnpickler(std_pickle.Unpickler):
+    """Unpickle a state dict into TensorMeta objects without reading any storage."""
+
+    def find_class(self, mod_name, name):
+        if type(name) is str and "Storage" in name:
+            try:
+                return StorageType(name)
+            except KeyError:  # pragma: no cover
+                pass
+        if mod_name == "torch._utils":
+            if name == "_rebuild_tensor_v2":
+                return TensorMeta.rebuild
+            if name.startswith("_rebuild_parameter"):
+                return lambda data, *args, **kwargs: data
+        mod_name = {"torch.tensor": "torch._tensor"}.get(mod_name, mod_name)
+        return super().find_class(mod_name, name)
+
+    def persistent_load(self, saved_id):
+        typename, storage_type, key, location, numel = saved_id
+        assert _maybe_decode_ascii(typename) == "storage", f"Unknown typename for persistent_load: {typename}"
+        dtype = torch.uint8 if storage_type is UntypedStorage else storage_type.dtype
+        return _StorageMeta(key, dtype)
+
+
+class MmapTensorReader:
+    """Serve tensors of a zip checkpoint saved by torch.save as views of a file mapping.
+
+    The pickle is walked once to index every tensor, the storages are never read. The file is mapped
+    once copy-on-write and each tensor is a slice of its uncompressed zip member, so loading costs no
+    parse and no copy, and in-place updates are never written back. A tensor loaded again gets its own
+    mapping, so in-place updates of a loaded tensor are not seen by later loads either.
+    """
+
+    def __init__(self, path):
+        """Init the MmapTensorReader object.
+
+        Args:
+            path (str): path of the checkpoint, e.g. pytorch_model.bin.
+
+        Raises:
+            ValueError: the checkpoint can't be served from a mapping, e.g. legacy or compressed format.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = None
+        self._served_tensors = set()
+        try:
+            self.tensors, self._data_offsets = self._build_index()
+        except Exception as e:
+            self._file.close()
+            raise ValueError(f"Fail to index {path} for mmap loading: {e}") from e
+
+    def _build_index(self):
+        if not zipfile.is_zipfile(self._file):
+            raise ValueError("not a zip checkpoint")
+        data_offsets = {}
+        with zipfile.ZipFile(self._file) as zip_file:
+            pickle_name = None
+            for info in zip_file.infolist():
+                parts = info.filename.split("/")
+                if parts[-1] == "byteorder" and zip_file.read(info).decode() != sys.byteorder:
+                    raise ValueError("byteorder mismatch")
+                if parts[-1] == "data.pkl" and len(parts) == 2:
+                    pickle_name = info.filename
+                if len(parts) >= 3 and parts[-2] == "data":
+                    if info.compress_type != zipfile.ZIP_STORED:
+                        raise ValueError(f"{info.filename} is compressed")
+                    # the data starts after the local file header, its name and extra field
+                    self._file.seek(info.header_offset)
+                    name_len, extra_len = struct.unpack("<HH", self._file.read(30)[26:30])
+                    data_offsets[parts[-1]] = info.header_offset + 30 + name_len + extra_len
+            if pickle_name is None:
+                raise ValueError("data.pkl not found")
+            state_dict = _IndexUnpickler(io.BytesIO(zip_file.read(pickle_name)), encoding="utf-8").load()
+        tensors = {name: meta for name, meta in state_dict.items() if isinstance(meta, TensorMeta)}
+        return tensors, data_offsets
+
+    def __contains__(self, tensor_name):
+        """Check whether the checkpoint has the tensor."""
+        return tensor_name in self.tensors
+
+    def get_tensor(self, tensor_name):
+        """Get a tensor by name.
+
+        Args:
+            tensor_name (str): the tensor name.
+
+        Returns:
+            tensor: a cpu tensor backed by a private mapping of the checkpoint.
+        """
+        meta = self.tensors[tensor_name]
+        numel = 1
+        for dim in meta.size:
+            numel *= dim
+        if numel == 0:
+            return torch.empty(meta.size, dtype=meta.dtype)
+        element_size = torch._utils._element_size(meta.dtype)
+        count = 1 + sum((size - 1) * stride for size, stride in zip(meta.size, meta.stride))
+        start = self._data_offsets[meta.key] + meta.storage_offset * element_size
+        if tensor_name in self._served_tensors:
+            # the slice served before may have been updated in place, map the tensor on its own
+            map_start = start - start % mmap.ALLOCATIONGRANULARITY
+            buffer = mmap.mmap(
+                self._file.fileno(),
+                start - map_start + count * element_size,
+                offset=map_start,
+                access=mmap.ACCESS_COPY,
+            )
+            offset = start - map_start
+        else:
+            if self._mmap is None:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+            self._served_tensors.add(tensor_name)
+            buffer, offset = self._mmap, start
+        flat = torch.frombuffer(buffer, dtype=meta.dtype, count=count, offset=offset)
+        return flat.as_strided(meta.size, meta.stride)
+
+    def close(self):
+        """Close the checkpoint file, loaded tensors keep the mapping alive until they are released."""
+        # the mapping can't be closed while tensors export it, it is unmapped with the last of them
+        self._mmap = None
+        self._file.close()
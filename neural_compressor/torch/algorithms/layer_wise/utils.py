@@ -19,6 +19,11 @@
 import gc
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import torch
 from accelerate.utils import set_module_tensor_to_device
@@ -26,9 +31,10 @@ from safetensors import safe_open
 
 from neural_compressor.common import options
 from neural_compressor.torch.algorithms.weight_only.modules import INCWeightOnlyLinear
+from neural_compressor.torch.utils import logger
 from neural_compressor.torch.utils.utility import dowload_hf_model, load_empty_model
 
-from .load import load
+from .load import MmapTensorReader, load
 
 LWQ_WORKSPACE = os.path.join(options.workspace, "lwq_tmpdir")
 
@@ -157,27 +163,6 @@ def load_tensor(path, tensor_name=None, prefix=None):
         return state_dict
 
 
-def load_tensor_from_safetensors(path, tensor_name=None, device="cpu"):
-    """Load a tensor from safetensors file with given tensor name."""
-    with safe_open(path, framework="pt", device=device) as f:
-        value = f.get_tensor(tensor_name)
-    return value
-
-
-def load_tensor_from_safetensors_shard(
-    pretrained_model_name_or_path, tensor_name, prefix=None, device="cpu"
-):  # pragma: no cover
-    """Load tensor from shard."""
-    path = _get_path(pretrained_model_name_or_path)
-    idx_dict = json.load(open(os.path.join(path, "model.safetensors.index.json"), "r"))["weight_map"]
-    if tensor_name not in idx_dict.keys():
-        if tensor_name.replace(f"{prefix}.", "") in idx_dict.keys():
-            tensor_name = tensor_name.replace(f"{prefix}.", "")
-        else:
-            assert False, "{} not in the index.json".format(tensor_name)
-    return load_tensor_from_safetensors(os.path.join(path, idx_dict[tensor_name]), tensor_name, device)
-
-
 def _get_path(pretrained_model_name_or_path):
     is_local = os.path.isdir(pretrained_model_name_or_path)
     if is_local:  # pragma: no cover
@@ -190,6 +175,212 @@ def _get_path(pretrained_model_name_or_path):
 get_path = _get_path
 
 
+class CheckpointLoader:
+    """Load tensors of a local checkpoint, parsing its index once and reusing opened shard files.
+
+    CPU tensors are views of the shard mapping, which is private to the opened handle. A tensor requested again
+    from the same handle may have been updated in place by its first user, so the shard is mapped again instead.
+    The loader is shared by the prefetch thread, a handle evicted while another thread reads from it is closed
+    after the read.
+    """
+
+    # files whose status decides whether a cached loader is still valid
+    checkpoint_files = [
+        "model.safetensors",
+        "model.safetensors.index.json",
+        "pytorch_model.bin",
+        "pytorch_model.bin.index.json",
+    ]
+
+    def __init__(self, path, max_open_files=16, use_mmap=True):
+        """Init the CheckpointLoader object.
+
+        Args:
+            path (str): local checkpoint directory.
+            max_open_files (int, optional): max number of memory-mapped shard handles kept open,
+                the least recently used one is closed first. Defaults to 16.
+            use_mmap (bool, optional): serve pytorch_model.bin tensors as views of the file mapping
+                with MmapTensorReader, fall back to unpickling per tensor if the file can't be indexed.
+                Defaults to True.
+        """
+        self.path = path
+        self.max_open_files = max_open_files
+        self.use_mmap = use_mmap
+        self._unmappable_files = set()
+        self.signature = self.get_signature(path)
+        self.num_opened_files = 0
+        self._handles = OrderedDict()
+        self._served_tensors = {}
+        self._handle_users = {}
+        self._retired_handles = {}
+        self._lock = threading.Lock()
+        self.weight_map = None
+        files = os.listdir(path)
+        safetensors_files = [filename for filename in files if filename.endswith(".safetensors")]
+        if len(safetensors_files) == 1:
+            self.use_safetensors = True
+        elif len(safetensors_files) >= 2:
+            self.use_safetensors = True
+            self.weight_map = self._load_weight_map("model.safetensors.index.json")
+        elif "pytorch_model.bin.index.json" in files:
+            self.use_safetensors = False
+            self.weight_map = self._load_weight_map("pytorch_model.bin.index.json")
+        else:
+            self.use_safetensors = False
+
+    @classmethod
+    def get_signature(cls, path):
+        """Get the modification status of the checkpoint directory and its entry files."""
+        signature = [os.stat(path).st_mtime_ns]
+        for filename in cls.checkpoint_files:
+            file_path = os.path.join(path, filename)
+            if os.path.exists(file_path):
+                stat = os.stat(file_path)
+                signature.append((filename, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load_weight_map(self, index_file):
+        with open(os.path.join(self.path, index_file), "r") as f:
+            return json.load(f)["weight_map"]
+
+    def _get_shard(self, tensor_name, prefix=None):
+        if tensor_name not in self.weight_map:
+            if tensor_name.replace(f"{prefix}.", "") in self.weight_map:
+                tensor_name = tensor_name.replace(f"{prefix}.", "")
+            else:
+                assert False, "{} not in the index.json".format(tensor_name)
+        return tensor_name, os.path.join(self.path, self.weight_map[tensor_name])
+
+    @contextmanager
+    def _use_handle(self, file_path, device="cpu", tensor_name=None):
+        key = (file_path, str(device))
+        with self._lock:
+            if key in self._handles and tensor_name in self._served_tensors[key]:
+                self._close_handle(key)
+            if key in self._handles:
+                self._handles.move_to_end(key)
+            else:
+                if file_path.endswith(".safetensors"):
+                    self._handles[key] = safe_open(file_path, framework="pt", device=device)
+                else:
+                    self._handles[key] = MmapTensorReader(file_path)
+                self._served_tensors[key] = set()
+                self.num_opened_files += 1
+                if len(self._handles) > self.max_open_files:
+                    self._close_handle(next(iter(self._handles)))
+            # only cpu tensors share the mapping of the handle
+            if tensor_name is not None and torch.device(device).type == "cpu":
+                self._served_tensors[key].add(tensor_name)
+            handle = self._handles[key]
+            self._handle_users[id(handle)] = self._handle_users.get(id(handle), 0) + 1
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                self._handle_users[id(handle)] -= 1
+                if self._handle_users[id(handle)] == 0:
+                    del self._handle_users[id(handle)]
+                    if id(handle) in self._retired_handles:
+                        self._release_handle(self._retired_handles.pop(id(handle)))
+
+    def _close_handle(self, key):
+        handle = self._handles.pop(key)
+        self._served_tensors.pop(key)
+        if id(handle) in self._handle_users:
+            # another thread still reads from it, the last user closes it
+            self._retired_handles[id(handle)] = handle
+        else:
+            self._release_handle(handle)
+
+    @staticmethod
+    def _release_handle(handle):
+        if isinstance(handle, MmapTensorReader):
+            handle.close()
+
+    def _get_tensor_from_bin(self, file_path, tensor_name, prefix=None, device="cpu"):
+        if self.use_mmap and file_path not in self._unmappable_files:
+            if "gamma" in tensor_name:  # pragma: no cover
+                tensor_name = tensor_name.replace("gamma", "weight")
+            if "beta" in tensor_name:  # pragma: no cover
+                tensor_name = tensor_name.replace("beta", "bias")
+            try:
+                with self._use_handle(file_path) as reader:
+                    if tensor_name not in reader:  # pragma: no cover
+                        tensor_name = tensor_name.replace(f"{prefix}.", "")
+                    return reader.get_tensor(tensor_name).to(device)
+            except ValueError as e:
+                logger.warning(f"{e}, fall back to unpickling it per tensor.")
+                self._unmappable_files.add(file_path)
+        self.num_opened_files += 1
+        return load_tensor(file_path, tensor_name, prefix)
+
+    def get_tensor(self, tensor_name, prefix=None, device="cpu"):
+        """Load a tensor with given tensor name.
+
+        Args:
+            tensor_name (str): tensor name.
+            prefix (str, optional): the model base prefix, stripped when the name is not found. Defaults to None.
+            device (str, optional): tensor device. Defaults to "cpu".
+
+        Returns:
+            tensor: the loaded tensor.
+        """
+        if self.use_safetensors:
+            if self.weight_map is None:
+                file_path = os.path.join(self.path, "model.safetensors")
+            else:
+                tensor_name, file_path = self._get_shard(tensor_name, prefix)
+            with self._use_handle(file_path, device, tensor_name) as handle:
+                return handle.get_tensor(tensor_name)
+        if self.weight_map is None:
+            return self._get_tensor_from_bin(os.path.join(self.path, "pytorch_model.bin"), tensor_name, prefix, device)
+        tensor_name, file_path = self._get_shard(tensor_name, prefix)
+        return self._get_tensor_from_bin(file_path, tensor_name, None, device)
+
+    def close(self):
+        """Close all opened files."""
+        with self._lock:
+            for key in list(self._handles.keys()):
+                self._close_handle(key)
+
+
+_checkpoint_loaders = {}
+_checkpoint_loaders_lock = threading.Lock()
+
+
+def get_checkpoint_loader(path):
+    """Get the cached CheckpointLoader of a local checkpoint, rebuild it if the checkpoint files changed.
+
+    Args:
+        path (str): local checkpoint directory.
+
+    Returns:
+        CheckpointLoader: the loader of the checkpoint.
+    """
+    with _checkpoint_loaders_lock:
+        loader = _checkpoint_loaders.get(path)
+        if loader is None or loader.signature != CheckpointLoader.get_signature(path):
+            if loader is not None:
+                loader.close()
+            loader = CheckpointLoader(path)
+            _checkpoint_loaders[path] = loader
+        return loader
+
+
+def close_checkpoint_loaders(path=None):
+    """Close the cached CheckpointLoader of a local checkpoint and release its opened files.
+
+    Args:
+        path (str, optional): local checkpoint directory, close all cached loaders if None. Defaults to None.
+    """
+    with _checkpoint_loaders_lock:
+        paths = list(_checkpoint_loaders.keys()) if path is None else [path]
+        for path in paths:
+            loader = _checkpoint_loaders.pop(path, None)
+            if loader is not None:
+                loader.close()
+
+
 def load_value(model, param_name, path, device="cpu"):
     """Load the module value.
 
@@ -209,17 +400,7 @@ def load_value(model, param_name, path, device="cpu"):
             if module == input_embeddings:
                 param_name = name + "." + param_name.split(".")[-1]
     prefix = model.base_model_prefix
-    files = os.listdir(path)
-    safetensors_files = [filename for filename in files if filename.endswith(".safetensors")]
-    if len(safetensors_files) == 1:
-        value = load_tensor_from_safetensors(os.path.join(path, "model.safetensors"), param_name, device=device)
-    elif len(safetensors_files) >= 2:
-        value = load_tensor_from_safetensors_shard(path, param_name, device=device)
-    elif "pytorch_model.bin.index.json" in files:
-        value = load_tensor_from_shard(path, param_name, prefix)
-    else:
-        value = load_tensor(os.path.join(path, "pytorch_model.bin"), param_name, prefix)
-    return value
+    return get_checkpoint_loader(path).get_tensor(param_name, prefix, device=device)
 
 
 def load_module(model, module_name, path, device="cpu"):
@@ -238,7 +419,128 @@ def load_module(model, module_name, path, device="cpu"):
         set_module_tensor_to_device(model, param_name, device, value)
 
 
-def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_path=None, indicated_layers=None):
+def load_module_state(model, module_name, path, device="cpu", use_workspace=True):
+    """Load the parameters of a module, preferring the copy saved in LWQ_WORKSPACE.
+
+    Args:
+        model (torch.nn.module): torch model.
+        module_name (str): module name.
+        path (str): path to load state_dict per layer.
+        device (str, optional): module device. Defaults to "cpu".
+        use_workspace (bool, optional): load the copy saved in LWQ_WORKSPACE if it exists,
+            otherwise only load from the checkpoint like `load_module`. Defaults to True.
+
+    Returns:
+        dict: parameter name to tensor.
+    """
+    module = get_module(model, module_name)
+    state_dict = None
+    if use_workspace and os.path.exists(os.path.join(LWQ_WORKSPACE, f"{module_name}.pt")):
+        state_dict = torch.load(
+            os.path.join(LWQ_WORKSPACE, f"{module_name}.pt"),
+            map_location=torch.device(device) if isinstance(device, str) else device,
+        )
+    values = {}
+    for n, p in module.named_parameters():
+        if state_dict:
+            values[n] = state_dict[n]
+        else:
+            values[n] = load_value(model, module_name + "." + n, path, device=device)
+    return values
+
+
+class WeightPrefetcher:
+    """Load module weights on a background thread ahead of their use.
+
+    The modules to prefetch are predicted from the order in which they were requested before,
+    falling back to the given module order. At most `depth` modules are held in memory ahead of use.
+    """
+
+    def __init__(self, model, path, module_names, device="cpu", depth=2, use_workspace=True):
+        """Init the WeightPrefetcher object.
+
+        Args:
+            model (torch.nn.module): torch model.
+            path (str): path to load state_dict per layer.
+            module_names (list): names of the modules in execution order.
+            device (str, optional): module device. Defaults to "cpu".
+            depth (int, optional): number of modules loaded ahead. Defaults to 2.
+            use_workspace (bool, optional): prefer the module copies saved in LWQ_WORKSPACE, False to load
+                from the checkpoint only. Defaults to True.
+        """
+        self.model = model
+        self.path = path
+        self.module_names = list(module_names)
+        self.device = device
+        self.depth = depth
+        self.use_workspace = use_workspace
+        self.io_wait_time = 0.0
+        self._index = {name: idx for idx, name in enumerate(self.module_names)}
+        self._next = {}
+        self._last = None
+        self._futures = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lwq_prefetch")
+
+    def _load(self, module_name):
+        return load_module_state(self.model, module_name, self.path, self.device, use_workspace=self.use_workspace)
+
+    def _predict(self, module_name):
+        names = []
+        name = module_name
+        while len(names) < self.depth:
+            if name in self._next:
+                name = self._next[name]
+            elif self._index.get(name, len(self.module_names)) + 1 < len(self.module_names):
+                name = self.module_names[self._index[name] + 1]
+            else:
+                break
+            if name == module_name or name in names:
+                break
+            names.append(name)
+        return names
+
+    def get(self, module_name):
+        """Get the parameters of a module and start loading the modules expected next.
+
+        Args:
+            module_name (str): module name.
+
+        Returns:
+            dict: parameter name to tensor.
+        """
+        if self._last is not None:
+            self._next[self._last] = module_name
+        self._last = module_name
+        window = self._predict(module_name)
+        for name in list(self._futures.keys()):
+            if name != module_name and name not in window:
+                self._futures.pop(name).cancel()
+        future = self._futures.pop(module_name, None)
+        for name in window:
+            if name not in self._futures:
+                self._futures[name] = self._executor.submit(self._load, name)
+        start = time.time()
+        values = future.result() if future is not None else self._load(module_name)
+        self.io_wait_time += time.time() - start
+        return values
+
+    def invalidate(self, module_name):
+        """Drop the prefetched parameters of a module, e.g. after its weights were updated on disk."""
+        future = self._futures.pop(module_name, None)
+        if future is not None:
+            future.cancel()
+
+    def close(self):
+        """Stop the background thread and release prefetched parameters."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=True)
+
+
+def register_weight_hooks(
+    model, path, device="cpu", clean_weight=True, saved_path=None, indicated_layers=None, prefetcher=None
+):
     """Register weight hooks for model.
 
     Args:
@@ -247,6 +549,7 @@ def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_pa
         device (str, optional): module device. Defaults to "cpu".
         clean_weight (bool, optional): to clean model weight. Defaults to True.
         saved_path (str, optional): path to save module weight. Defaults to None.
+        prefetcher (WeightPrefetcher, optional): load weights through the prefetcher. Defaults to None.
 
     Returns:
         list: handlers.
@@ -256,19 +559,12 @@ def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_pa
 
     def forward_pre_hook(name):
         def hook(module, input):
-            state_dict = None
-            if os.path.exists(os.path.join(LWQ_WORKSPACE, f"{name}.pt")):
-                state_dict = torch.load(
-                    os.path.join(LWQ_WORKSPACE, f"{name}.pt"),
-                    map_location=torch.device(device) if isinstance(device, str) else device,
-                )
-            for n, p in module.named_parameters():
-                param_name = name + "." + n
-                if state_dict:
-                    value = state_dict[n]
-                else:
-                    value = load_value(model, param_name, path, device=device)
-                set_module_tensor_to_device(model, param_name, device, value)
+            if prefetcher is not None:
+                values = prefetcher.get(name)
+            else:
+                values = load_module_state(model, name, path, device=device)
+            for n, value in values.items():
+                set_module_tensor_to_device(model, name + "." + n, device, value)
             module = module.to(device)
 
         return hook
@@ -287,19 +583,8 @@ def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_pa
     for name, module in modules:
         if indicated_layers is not None and name not in indicated_layers:  # pragma: no cover
             # load other layers to memory
-            state_dict = None
-            if os.path.exists(os.path.join(LWQ_WORKSPACE, f"{name}.pt")):
-                state_dict = torch.load(
-                    os.path.join(LWQ_WORKSPACE, f"{name}.pt"),
-                    map_location=torch.device(device) if isinstance(device, str) else device,
-                )
-            for n, p in module.named_parameters():
-                param_name = name + "." + n
-                if state_dict:
-                    value = state_dict[n]
-                else:
-                    value = load_value(model, param_name, path, device=device)
-                set_module_tensor_to_device(model, param_name, device, value)
+            for n, value in load_module_state(model, name, path, device=device).items():
+                set_module_tensor_to_device(model, name + "." + n, device, value)
             module = module.to(device)
             continue
         handle[name] = [module.register_forward_pre_hook(forward_pre_hook(name))]
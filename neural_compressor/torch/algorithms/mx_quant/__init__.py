@@ -14,3 +14,5 @@
 
 # pylint:disable=import-error
 """MX quantization."""
+
+from .save_load import save, load
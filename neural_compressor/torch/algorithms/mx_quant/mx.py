@@ -27,11 +27,18 @@ from torch.nn import functional as F
 from neural_compressor.torch.algorithms import Quantizer
 from neural_compressor.torch.utils import logger, set_module
 
-from .utils import quantize_elemwise_op, quantize_mx_op
+from .utils import get_elem_codebook, pack_mx_weight, quantize_elemwise_op, quantize_mx_op, unpack_mx_weight
 
 
 class MXLinear(torch.nn.Linear):
-    """Linear for MX data type."""
+    """Linear for MX data type.
+
+    The MX quantized weight is kept in fp32 by default. After `pack_weight`, it's stored as the packed element
+    codes and an 8-bit shared exponent per block, and the forward decodes it tile by tile.
+    """
+
+    # number of weight elements decoded at a time by a packed MXLinear
+    DECODE_TILE_NUMEL = 2**18
 
     def __init__(
         self,
@@ -46,8 +53,58 @@ class MXLinear(torch.nn.Linear):
 
         self.name = name
         self.mx_specs = mx_specs
+        self.packed = False
         super().__init__(in_features, out_features, bias)
 
+    def can_pack_weight(self):
+        """Whether the weight data type can be packed, only the formats of at most 8 bits are supported."""
+        return self.mx_specs is not None and get_elem_codebook(self.mx_specs.w_dtype)[0] is not None
+
+    def _init_packed_weight(self, packed_weight, shared_exp):
+        del self.weight
+        self.register_buffer("packed_weight", packed_weight)
+        self.register_buffer("shared_exp", shared_exp)
+        self.packed = True
+
+    def init_packed_weight(self):
+        """Replace the fp32 weight with empty packed buffers, used to load a packed state dict."""
+        assert self.can_pack_weight(), f"Cannot pack the weight of {self.mx_specs.w_dtype}."
+        _, code_bits = get_elem_codebook(self.mx_specs.w_dtype)
+        num_blocks = -(-self.in_features // self.mx_specs.blocksize)
+        num_codes = num_blocks * self.mx_specs.blocksize
+        packed_weight = torch.zeros(
+            (self.out_features, -(-num_codes * code_bits // 8)), dtype=torch.uint8, device=self.weight.device
+        )
+        shared_exp = torch.zeros((self.out_features, num_blocks), dtype=torch.int8, device=self.weight.device)
+        self._init_packed_weight(packed_weight, shared_exp)
+
+    def pack_weight(self):
+        """Quantize the fp32 weight to MX data type and replace it with the packed codes and shared exponents."""
+        assert self.can_pack_weight(), f"Cannot pack the weight of {self.mx_specs.w_dtype}."
+        weight = self.weight.data
+        if self.mx_specs.out_dtype != "float32":
+            weight = quantize_elemwise_op(weight, mx_specs=self.mx_specs)
+        packed_weight, shared_exp = pack_mx_weight(
+            weight, self.mx_specs.w_dtype, self.mx_specs.round_method, self.mx_specs.blocksize
+        )
+        self._init_packed_weight(packed_weight, shared_exp)
+        if self.bias is not None and self.mx_specs.out_dtype != "float32":
+            self.bias.data = quantize_elemwise_op(self.bias.data, mx_specs=self.mx_specs)
+
+    def _packed_linear(self, input):
+        output = input.new_empty(input.shape[:-1] + (self.out_features,))
+        tile_rows = max(1, self.DECODE_TILE_NUMEL // self.in_features)
+        for start in range(0, self.out_features, tile_rows):
+            weight = unpack_mx_weight(
+                self.packed_weight[start : start + tile_rows],
+                self.shared_exp[start : start + tile_rows],
+                self.mx_specs.w_dtype,
+                self.mx_specs.blocksize,
+                self.in_features,
+            )
+            output[..., start : start + weight.shape[0]] = F.linear(input, weight)
+        return output
+
     def apply_mx_specs(self):
         """Apply MX data type to weight."""
         if self.mx_specs is not None:
@@ -85,7 +142,7 @@ class MXLinear(torch.nn.Linear):
                 axes=[-1],
             )
         # compute output
-        output = F.linear(input, self.weight)
+        output = self._packed_linear(input) if self.packed else F.linear(input, self.weight)
         if self.mx_specs.out_dtype != "float32":
             output = quantize_elemwise_op(output, mx_specs=self.mx_specs)
 
@@ -157,7 +214,10 @@ class MXQuantizer(Quantizer):
                 name=name,
             )
             new_module.load_state_dict(tmp_stat)
-            new_module.apply_mx_specs()
+            if config[(name, type(m).__name__)].pack_weight and new_module.can_pack_weight():
+                new_module.pack_weight()
+            else:
+                new_module.apply_mx_specs()
             if name == "":
                 return new_module
             else:
@@ -0,0 +1,86 @@
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Save and load the MX quantized model."""
+
+import os
+
+import torch
+
+from neural_compressor.common.utils import load_config_mapping, save_config_mapping
+from neural_compressor.torch.utils import QCONFIG_NAME, WEIGHT_NAME, fetch_module, logger, set_module
+
+from .mx import MXLinear
+
+
+def save(model, output_dir="./saved_results"):
+    """Save the MX quantized model and config to the output path.
+
+    Args:
+        model (torch.nn.module): MX quantized model.
+        output_dir (str, optional): output path to save.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    qmodel_weight_file_path = os.path.join(os.path.abspath(os.path.expanduser(output_dir)), WEIGHT_NAME)
+    qconfig_file_path = os.path.join(os.path.abspath(os.path.expanduser(output_dir)), QCONFIG_NAME)
+    # saving process
+    save_config_mapping(model.qconfig, qconfig_file_path)
+
+    # MethodType 'save' not in state_dict
+    del model.save
+    torch.save(model.state_dict(), qmodel_weight_file_path)
+
+    logger.info("Save quantized model weight to {}.".format(qmodel_weight_file_path))
+    logger.info("Save configuration of quantized model to {}.".format(qconfig_file_path))
+
+
+def load(model_name_or_path, original_model):
+    """Load the MX quantized model.
+
+    The linear modules of the original model are replaced with MXLinear, packed ones if they were saved packed,
+    then the saved state dict is loaded.
+
+    Args:
+        model_name_or_path (str): the directory of the saved model.
+        original_model (torch.nn.module): original model before quantization.
+
+    Returns:
+        torch.nn.Module: MX quantized model.
+    """
+    from neural_compressor.common.base_config import ConfigRegistry
+
+    assert original_model is not None, "Loading a MX quantized model needs the original model."
+    qmodel_weight_file_path = os.path.join(os.path.abspath(os.path.expanduser(model_name_or_path)), WEIGHT_NAME)
+    qconfig_file_path = os.path.join(os.path.abspath(os.path.expanduser(model_name_or_path)), QCONFIG_NAME)
+    config_mapping = load_config_mapping(qconfig_file_path, ConfigRegistry.get_all_configs()["torch"])
+    model = original_model
+    for (name, op_type), config in config_mapping.items():
+        if op_type != "Linear":  # pragma: no cover
+            continue
+        module = fetch_module(model, name)
+        new_module = MXLinear(
+            module.in_features,
+            module.out_features,
+            bias=module.bias is not None,
+            mx_specs=config,
+            name=name,
+        )
+        if config.pack_weight and new_module.can_pack_weight():
+            new_module.init_packed_weight()
+        if name == "":
+            model = new_module
+        else:
+            set_module(model, name, new_module)
+    model.load_state_dict(torch.load(qmodel_weight_file_path, weights_only=True))
+    model.qconfig = config_mapping
+    return model
@@ -496,21 +496,17 @@ def quantize_elemwise_op(A, mx_specs):
     return A
 
 
-def _quantize_mx(
+def _quantize_mx_blocks(
     A,
     scale_bits,
-    elem_format,  # can be None for no quantization
+    elem_format,
     shared_exp_method="max",
     axes=None,
     block_size=32,
     round="nearest",
     flush_fp32_subnorms=False,
 ):
-    """Function used for MX* quantization."""
-    # Shortcut for no quantization
-    if elem_format is None:
-        return A
-
+    """Quantize the blocks of A to the element format, return the elements and the shared exponents separately."""
     assert scale_bits > 0
 
     # Make sure axes is a list of non-negative numbers
@@ -551,6 +547,35 @@ def _quantize_mx(
 
     A = _quantize_elemwise_core(A, mbits, ebits, max_norm, round=round, allow_denorm=True, saturate_normals=True)
 
+    return A, shared_exp, axes, orig_shape, padded_shape
+
+
+def _quantize_mx(
+    A,
+    scale_bits,
+    elem_format,  # can be None for no quantization
+    shared_exp_method="max",
+    axes=None,
+    block_size=32,
+    round="nearest",
+    flush_fp32_subnorms=False,
+):
+    """Function used for MX* quantization."""
+    # Shortcut for no quantization
+    if elem_format is None:
+        return A
+
+    A, shared_exp, axes, orig_shape, padded_shape = _quantize_mx_blocks(
+        A,
+        scale_bits,
+        elem_format,
+        shared_exp_method=shared_exp_method,
+        axes=axes,
+        block_size=block_size,
+        round=round,
+        flush_fp32_subnorms=flush_fp32_subnorms,
+    )
+
     A = A * (2**shared_exp)
 
     # Undo tile reshaping
@@ -584,3 +609,145 @@ def quantize_mx_op(
         shared_exp_method="max",
         flush_fp32_subnorms=False,
     )
+
+
+# the code of the shared exponent of a block which overflows the scale
+SHARED_EXP_NAN_CODE = -128
+
+_CODEBOOK_CACHE = {}
+
+
+def get_elem_codebook(elem_format):
+    """Get all the values of an element format whose width is at most 8 bits.
+
+    The code of an element is the index of its value in the ascending codebook.
+
+    Args:
+        elem_format (str or ElemFormat): element format.
+
+    Returns:
+        Tuple[torch.Tensor, int]: the float32 codebook, and the number of bits used to store a code,
+            the codebook is None if the format is wider than 8 bits.
+    """
+    if type(elem_format) is str:
+        elem_format = ElemFormat.from_str(elem_format)
+    if elem_format in _CODEBOOK_CACHE:
+        return _CODEBOOK_CACHE[elem_format]
+
+    ebits, mbits, emax, max_norm, _ = _get_format_params(elem_format)
+    if ebits + mbits - 1 > 8:
+        _CODEBOOK_CACHE[elem_format] = (None, 0)
+        return _CODEBOOK_CACHE[elem_format]
+    if ebits == 0:
+        # sign-magnitude ints of 1.xxx representation
+        max_mantissa = 2 ** (mbits - 1) - 1
+        positive = [k / 2 ** (mbits - 2) for k in range(max_mantissa + 1)]
+    else:
+        # mbits includes the sign and the implicit bits
+        explicit_bits = mbits - 2
+        min_exp = -(2 ** (ebits - 1)) + 2
+        positive = [2.0**min_exp * j / 2**explicit_bits for j in range(2**explicit_bits)]  # subnormal
+        for exp in range(min_exp, emax + 1):
+            positive += [2.0**exp * j / 2**explicit_bits for j in range(2**explicit_bits, 2 ** (explicit_bits + 1))]
+        positive = [v for v in positive if v <= max_norm]
+    codebook = torch.tensor(sorted(set([-v for v in positive] + positive)), dtype=torch.float32)
+    code_bits = 1
+    while 2**code_bits < len(codebook):
+        code_bits *= 2
+    _CODEBOOK_CACHE[elem_format] = (codebook, code_bits)
+    return _CODEBOOK_CACHE[elem_format]
+
+
+_BYTE_DECODE_TABLE_CACHE = {}
+
+
+def get_byte_decode_table(elem_format):
+    """Get the values of the codes packed in each byte value of an element format.
+
+    Args:
+        elem_format (str or ElemFormat): element format, its width must be at most 8 bits.
+
+    Returns:
+        torch.Tensor: the float32 table of shape (256, 8 // code_bits), the row of a byte holds the values
+            of its codes in the order of `pack_codes`.
+    """
+    if type(elem_format) is str:
+        elem_format = ElemFormat.from_str(elem_format)
+    if elem_format not in _BYTE_DECODE_TABLE_CACHE:
+        codebook, code_bits = get_elem_codebook(elem_format)
+        assert codebook is not None, "Only the element formats of at most 8 bits can be packed."
+        byte = torch.arange(256)
+        mask = 2**code_bits - 1
+        # bytes holding codes out of the codebook never appear in a packed weight
+        _BYTE_DECODE_TABLE_CACHE[elem_format] = torch.stack(
+            [codebook[((byte >> (i * code_bits)) & mask).clamp(max=len(codebook) - 1)] for i in range(8 // code_bits)],
+            dim=-1,
+        )
+    return _BYTE_DECODE_TABLE_CACHE[elem_format]
+
+
+def pack_codes(codes, code_bits):
+    """Pack the uint8 codes along the last dim, 8 // code_bits codes per byte."""
+    codes_per_byte = 8 // code_bits
+    if codes_per_byte == 1:
+        return codes
+    pad = -codes.shape[-1] % codes_per_byte
+    if pad:
+        codes = torch.nn.functional.pad(codes, (0, pad))
+    codes = codes.reshape(codes.shape[:-1] + (-1, codes_per_byte))
+    packed = torch.zeros(codes.shape[:-1], dtype=torch.uint8, device=codes.device)
+    for i in range(codes_per_byte):
+        packed |= codes[..., i] << (i * code_bits)
+    return packed
+
+
+def pack_mx_weight(weight, elem_format, round, block_size, scale_bits=8):
+    """Quantize a 2D weight to MX data type along the last dim and pack it.
+
+    Args:
+        weight (torch.Tensor): the weight.
+        elem_format (str): element format, its width must be at most 8 bits.
+        round (str): round method.
+        block_size (int): number of elements sharing an exponent.
+        scale_bits (int, optional): bits of the shared exponents. Defaults to 8.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: the uint8 packed codes of shape (rows, packed columns)
+            and the int8 shared exponents of shape (rows, blocks).
+    """
+    codebook, code_bits = get_elem_codebook(elem_format)
+    assert codebook is not None, "Only the element formats of at most 8 bits can be packed."
+    assert scale_bits <= 8, "The shared exponents are stored in 8 bits."
+    elem_format = ElemFormat.from_str(elem_format) if type(elem_format) is str else elem_format
+    A, shared_exp, _, _, _ = _quantize_mx_blocks(
+        weight, scale_bits, elem_format, shared_exp_method="max", axes=[-1], block_size=block_size, round=round
+    )
+    codes = torch.searchsorted(codebook.to(A.device), A.float().contiguous()).to(torch.uint8)
+    packed_weight = pack_codes(codes.reshape(codes.shape[0], -1), code_bits)
+    shared_exp = shared_exp.reshape(shared_exp.shape[0], -1)
+    shared_exp = torch.where(torch.isnan(shared_exp), SHARED_EXP_NAN_CODE, shared_exp).to(torch.int8)
+    return packed_weight, shared_exp
+
+
+def unpack_mx_weight(packed_weight, shared_exp, elem_format, block_size, in_features, dtype=torch.float32):
+    """Decode rows of a weight packed by `pack_mx_weight`.
+
+    Args:
+        packed_weight (torch.Tensor): the packed codes of the rows.
+        shared_exp (torch.Tensor): the shared exponents of the rows.
+        elem_format (str): element format.
+        block_size (int): number of elements sharing an exponent.
+        in_features (int): number of columns of the weight.
+        dtype (torch.dtype, optional): dtype of the decoded weight. Defaults to torch.float32.
+
+    Returns:
+        torch.Tensor: the decoded rows.
+    """
+    table = get_byte_decode_table(elem_format).to(packed_weight.device)
+    num_blocks = shared_exp.shape[-1]
+    # decode all the codes of a byte at once, the padding codes of the last byte are dropped
+    A = table.index_select(0, packed_weight.reshape(-1).int()).reshape(packed_weight.shape[0], -1)
+    A = A[:, : num_blocks * block_size].reshape(shared_exp.shape + (block_size,))
+    exp = shared_exp.float().masked_fill(shared_exp == SHARED_EXP_NAN_CODE, float("NaN"))
+    A = A * torch.exp2(exp).unsqueeze(-1)
+    return A.reshape(A.shape[0], -1)[:, :in_features].to(dtype)
@@ -34,6 +34,7 @@ class W8A8PT2EQuantizer(Quantizer):
     """The W8A8 quantizer using PT2E."""
 
     is_dynamic = False
+    support_calib_cache = True
 
     def __init__(self, quant_config=None):
         """Initialize the quantizer."""
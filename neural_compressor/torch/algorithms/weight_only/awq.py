@@ -21,6 +21,7 @@ import torch
 
 from neural_compressor.torch.algorithms import Quantizer
 from neural_compressor.torch.utils import get_accelerator, logger
+from neural_compressor.torch.utils.activation_store import ActivationStore
 
 from .modules import MulLinear
 from .utility import (
@@ -148,6 +149,13 @@ def _get_weight_scale(weight, q_group_size=-1):
 
 @torch.no_grad()
 def _get_act_scale(input_val):
+    if isinstance(input_val, ActivationStore):
+        # accumulate batch by batch instead of concatenating all batches
+        total, num_rows = 0, 0
+        for x in input_val:
+            x = x.abs().view(-1, x.shape[-1])
+            total, num_rows = total + x.sum(0), num_rows + x.shape[0]
+        return total / num_rows
     tmp = [x.abs().view(-1, x.shape[-1]) for x in input_val]
     tmp = torch.cat(tmp, dim=0)
     return tmp.mean(0)
@@ -170,6 +178,7 @@ class ActAwareWeightQuant:
         total_block_kwargs=[],
         device="auto",
         absorb_layer_dict={},
+        activation_window=0,
     ):
 
         self.example_inputs = example_inputs
@@ -188,6 +197,7 @@ class ActAwareWeightQuant:
         self.use_full_range = use_full_range
         self.weight_config = weight_config
         self.absorb_layer_dict = absorb_layer_dict
+        self.activation_window = activation_window
 
     def _move_model_and_data_to_device(self):
         # Put the model and example_inputs into target device
@@ -242,6 +252,7 @@ class ActAwareWeightQuant:
                 block,
                 module_hook_config,
                 calib_func=block_calibration,
+                activation_window=self.activation_window,
             )
             # Step 3: search best scale for linears in one block and apply it
             if use_auto_scale:
@@ -335,10 +346,10 @@ class ActAwareWeightQuant:
                 loss = 0
                 if len(module_tuple) > 1:
                     # use block inference for multi-modules
-                    cur_out = self.block_inference(block)
+                    cur_out = self._iter_block_outputs(block)
                 else:
                     module = absorbed_modules[module_name_list[0]]
-                    cur_out = self.module_inference(module, input_val)
+                    cur_out = self._iter_module_outputs(module, input_val)
                 for out1, out2 in zip(org_out, cur_out):
                     loss += (out1 - out2).float().pow(2).mean().item()
                 history.append(loss)
@@ -446,7 +457,7 @@ class ActAwareWeightQuant:
                         quantile=ratio,
                     )
                     loss = 0
-                    cur_out = self.module_inference(module, input_val)
+                    cur_out = self._iter_module_outputs(module, input_val)
                     for out1, out2 in zip(org_out, cur_out):
                         loss += (out1 - out2).float().pow(2).mean().item()
                     history.append(loss)
@@ -498,23 +509,25 @@ class ActAwareWeightQuant:
             input_list (list): A list of previous block outputs to serve as input to the next block.
         """
         for i, inp in enumerate(input_list):
-            if len(self.total_block_args[i]) > 0:
-                self.total_block_args[i][0] = inp
-            elif "hidden_states" in self.total_block_kwargs[i]:
-                self.total_block_kwargs[i]["hidden_states"] = inp
+            # assign the updated args back, the items of ActivationStore are copies
+            args = self.total_block_args[i]
+            if len(args) > 0:
+                args[0] = inp
+                self.total_block_args[i] = args
+                continue
+            kwargs = self.total_block_kwargs[i]
+            if "hidden_states" in kwargs:
+                kwargs["hidden_states"] = inp
+                self.total_block_kwargs[i] = kwargs
             else:  # pragma: no cover
                 assert False, "cannot find hidden_states position for next block"
 
-    def block_inference(self, model):
-        """Collect output of block.
+    def _new_output_list(self):
+        if self.activation_window > 0:
+            return ActivationStore(window=self.activation_window)
+        return []
 
-        Args:
-            model (torch.nn.Module): input model.
-
-        Returns:
-            output(list):  a list of block output.
-        """
-        total_out = []
+    def _iter_block_outputs(self, model):
         for args, kwargs in zip(self.total_block_args, self.total_block_kwargs):
             # to avoid layer_past: Dynamic_cache when transformers higher than 4.45.1
             if "layer_past" in kwargs.keys() and kwargs["layer_past"] is not None:
@@ -522,6 +535,26 @@ class ActAwareWeightQuant:
             out = model(*args, **kwargs)
             if isinstance(out, tuple):  # pragma: no cover
                 out = out[0]
+            yield out
+
+    def _iter_module_outputs(self, model, inputs):
+        for inp in inputs:
+            out = model(inp)
+            if isinstance(out, tuple):  # pragma: no cover
+                out = out[0]
+            yield out
+
+    def block_inference(self, model):
+        """Collect output of block.
+
+        Args:
+            model (torch.nn.Module): input model.
+
+        Returns:
+            output(list):  a list of block output, an ActivationStore if activation_window > 0.
+        """
+        total_out = self._new_output_list()
+        for out in self._iter_block_outputs(model):
             total_out.append(out)
         return total_out
 
@@ -533,13 +566,10 @@ class ActAwareWeightQuant:
             inputs (list): a list of module input.
 
         Returns:
-            output(list):  a list of module output.
+            output(list):  a list of module output, an ActivationStore if activation_window > 0.
         """
-        total_out = []
-        for inp in inputs:
-            out = model(inp)
-            if isinstance(out, tuple):  # pragma: no cover
-                out = out[0]
+        total_out = self._new_output_list()
+        for out in self._iter_module_outputs(model, inputs):
             total_out.append(out)
         return total_out
 
@@ -558,17 +588,19 @@ class AWQQuantizer(Quantizer):
         self.absorb_layer_dict = absorb_layer_dict
 
     @torch.no_grad()
-    def prepare(self, model, *args, **kwargs):
+    def prepare(self, model, activation_window=0, *args, **kwargs):
         """Prepare a given model to get hidden states and kwargs of first block.
 
         Args:
             model: A float torch model.
+            activation_window: number of batches whose block inputs are kept in memory, the others are
+                spilled to the workspace. Defaults to 0, which keeps all batches in memory.
 
         Returns:
             A prepared model.
         """
         assert isinstance(model, torch.nn.Module), "AWQ algorithm only supports torch module"
-        model = replace_forward(model)
+        model = replace_forward(model, activation_window=activation_window)
         return model
 
     @torch.no_grad()
@@ -585,6 +617,7 @@ class AWQQuantizer(Quantizer):
         return_int=False,
         use_full_range=False,
         data_type="int",
+        activation_window=0,
         *args,
         **kwargs,
     ):
@@ -603,6 +636,8 @@ class AWQQuantizer(Quantizer):
             return_int: Choose return fp32 or int32 model. Defaults to False.
             use_full_range: Choose sym range whether use -2**(bits-1). Defaults to False.
             data_type: data type. Defaults to "int".
+            activation_window: number of batches whose activations are kept in memory, the others are
+                spilled to the workspace. Defaults to 0, which keeps all batches in memory.
 
         Returns:
             model: fake quantized model
@@ -625,6 +660,7 @@ class AWQQuantizer(Quantizer):
             total_block_args=total_block_args,
             total_block_kwargs=total_block_kwargs,
             absorb_layer_dict=self.absorb_layer_dict,
+            activation_window=activation_window,
         )
         qdq_model = awq.quantize(
             use_auto_scale=use_auto_scale,
@@ -21,7 +21,8 @@ import math
 import random
 import re
 import time
-from collections import UserDict, defaultdict
+from collections import UserDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
 import torch
@@ -35,6 +36,7 @@ from neural_compressor.torch.utils import (
     logger,
     set_module,
 )
+from neural_compressor.torch.utils.activation_store import ActivationStore
 from neural_compressor.torch.utils.auto_accelerator import auto_detect_accelerator
 
 from .modules import INCWeightOnlyLinear
@@ -189,7 +191,12 @@ class RAWGPTQuantizer(object):
         device=None,
         use_layer_wise=False,
         model_path="",
+        prefetch_depth=0,
         quant_lm_head=False,
+        num_workers=1,
+        threads_per_worker=None,
+        activation_window=0,
+        micro_batch_size=1,
         dataloader=None,
         *args,
         **kwargs,
@@ -216,7 +223,20 @@ class RAWGPTQuantizer(object):
             dataloader: an iterable containing calibration datasets, contains (inputs, targets)
             use_layer_wise (bool): Enables quantize model per layer. Defaults to False.
             model_path (str): Model path that is used to load state_dict per layer.
+            prefetch_depth (int): Number of modules whose weights are loaded ahead on a background thread
+                                  in layer-wise mode, 0 to disable. Defaults to 0.
             quant_lm_head (bool): Indicates whether quantize the lm_head layer in transformers. Defaults to False.
+            num_workers (int): Number of layers in a sequential group quantized concurrently on CPU. Not used in
+                               layer-wise mode. Defaults to 1.
+            threads_per_worker (int): Number of intra-op threads of each worker. Defaults to None, which keeps the
+                                      current intra-op threads so that the results are bit-identical to quantizing
+                                      the layers one by one. A smaller value avoids oversubscribing the cores but
+                                      changes the reduction order, the results may differ in the last bits.
+            activation_window (int): Number of calibration batches whose block inputs are kept in memory, the
+                                     others are spilled to a file in the workspace. Defaults to 0, which keeps
+                                     all block inputs in memory.
+            micro_batch_size (int): Number of cached calibration batches with the same shapes concatenated into
+                                    one block forward. The block inputs must be batch first. Defaults to 1.
             device (str): cpu or cuda.
         """
         # model
@@ -253,8 +273,13 @@ class RAWGPTQuantizer(object):
         self.is_ready = False
 
         self.use_layer_wise = use_layer_wise
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.activation_window = activation_window
+        self.micro_batch_size = max(1, micro_batch_size)
+        self.prefetcher = None
         if use_layer_wise:
-            self.prepare_layer_wise(model_path, quantizable_layers)
+            self.prepare_layer_wise(model_path, quantizable_layers, prefetch_depth)
 
         # dataloader
         self.use_max_length = use_max_length
@@ -263,7 +288,7 @@ class RAWGPTQuantizer(object):
         self.dataloader = []
         self.nsamples = nsamples
 
-    def prepare_layer_wise(self, model_path, indicated_layers=None):
+    def prepare_layer_wise(self, model_path, indicated_layers=None, prefetch_depth=0):
         """Prepare for layer-wise quantization, including registering hooks and setting up the model path.
 
         Args:
@@ -272,16 +297,31 @@ class RAWGPTQuantizer(object):
                                         If None, all layers will be considered.
                                         Layers not specified in this list will be retained in memory
                                         but will not undergo quantization.
+            prefetch_depth (int, optional): Number of modules whose weights are loaded ahead on a
+                                        background thread, 0 to disable. Defaults to 0.
         """
         import os
 
-        from neural_compressor.torch.algorithms.layer_wise import LWQ_WORKSPACE, get_path, register_weight_hooks
+        from neural_compressor.torch.algorithms.layer_wise import (
+            LWQ_WORKSPACE,
+            WeightPrefetcher,
+            get_named_children,
+            get_path,
+            register_weight_hooks,
+        )
 
         os.makedirs(LWQ_WORKSPACE, exist_ok=True)
         if model_path == "":
             model_path = self.model.path
         assert model_path, "model_path should not be None."
         self.model_path = get_path(model_path)
+        if prefetch_depth > 0:
+            module_names = [name for name, _ in get_named_children(self.model)]
+            if indicated_layers is not None:
+                module_names = [name for name in module_names if name in indicated_layers]
+            self.prefetcher = WeightPrefetcher(
+                self.model, self.model_path, module_names, device=self.device, depth=prefetch_depth
+            )
         register_weight_hooks(
             self.model,
             self.model_path,
@@ -289,6 +329,7 @@ class RAWGPTQuantizer(object):
             clean_weight=True,
             saved_path=LWQ_WORKSPACE,
             indicated_layers=indicated_layers,
+            prefetcher=self.prefetcher,
         )
 
     def get_full_layer_name(self, sub_layer_name, block_idx):
@@ -393,7 +434,7 @@ class RAWGPTQuantizer(object):
                 # each outputs can be different shape, hence also use list to store
                 if isinstance(kwargs[arg], torch.Tensor) or arg == "alibi":
                     if self.cache_key_arguments.get(arg, None) is None:
-                        self.cache_key_arguments[arg] = []
+                        self.cache_key_arguments[arg] = self.new_activation_list()
                     self.cache_key_arguments[arg].append(kwargs[arg])
                 continue
             # copy positional arguments, positional arguments are sensitive for their order, be cautious!
@@ -402,7 +443,7 @@ class RAWGPTQuantizer(object):
             for idx, item in enumerate(args):
                 if (idx + 1) > len(self.cache_positional_arguments):
                     # initialize
-                    self.cache_positional_arguments.append([])
+                    self.cache_positional_arguments.append(self.new_activation_list())
                 self.cache_positional_arguments[idx].append(item)
             raise ValueError
 
@@ -438,8 +479,11 @@ class RAWGPTQuantizer(object):
         logger.info("All calibration data's shape =>")
         # check all hidden_states shape
         try:
-            for hidden_states in self.cache_positional_arguments[0]:
-                logger.info(hidden_states.shape)
+            if self.activation_window > 0:
+                logger.info(f"{len(self.cache_positional_arguments[0])} batches are stored in the workspace.")
+            else:
+                for hidden_states in self.cache_positional_arguments[0]:
+                    logger.info(hidden_states.shape)
         except:
             pass
         logger.info("Done.")
@@ -455,6 +499,16 @@ class RAWGPTQuantizer(object):
         # end
         logger.info("GPTQ quantization prepared.")
 
+    def new_activation_list(self):
+        """Get a list to cache the block inputs of the calibration batches.
+
+        Returns:
+            list or ActivationStore: an ActivationStore spilling to the workspace if activation_window > 0.
+        """
+        if self.activation_window > 0:
+            return ActivationStore(window=self.activation_window)
+        return []
+
     def gather_single_batch_from_dict(self, data_dict, idx):
         """Gather single batch from a dict.
 
@@ -487,6 +541,103 @@ class RAWGPTQuantizer(object):
             single_batch.append(data_item[idx])
         return single_batch
 
+    def _get_hidden_states_batch_size(self, positional_batch, keyword_batch):
+        hidden_states = keyword_batch["hidden_states"] if "hidden_states" in keyword_batch else positional_batch[0]
+        return hidden_states.shape[0]
+
+    def _get_batch_dim_multiples(self, num_positional, keys):
+        """Get the size of the first dim of each block input per sample, alibi is (batch * heads, 1, seq)."""
+        config = getattr(self.model, "config", None)
+        num_heads = getattr(config, "num_attention_heads", None) or getattr(config, "n_head", None) or 1
+        return [1] * num_positional + [num_heads if key == "alibi" else 1 for key in keys]
+
+    @staticmethod
+    def _is_batch_major(value, batch_size, multiple=1):
+        # e.g. hidden_states (batch, seq, hidden), a tensor without the batch dim like a (seq, dim) table is not
+        return isinstance(value, torch.Tensor) and value.dim() >= 2 and value.shape[0] == batch_size * multiple
+
+    def _can_concat_value(self, value, batch_size, other_value, other_size, multiple):
+        if isinstance(value, (tuple, list)) and type(value) is type(other_value):
+            # e.g. position_embeddings=(cos, sin)
+            return len(value) == len(other_value) and all(
+                self._can_concat_value(item, batch_size, other_item, other_size, multiple)
+                for item, other_item in zip(value, other_value)
+            )
+        if self._is_batch_major(value, batch_size, multiple) and self._is_batch_major(
+            other_value, other_size, multiple
+        ):
+            return value.shape[1:] == other_value.shape[1:] and value.dtype == other_value.dtype
+        if isinstance(value, torch.Tensor) and isinstance(other_value, torch.Tensor):
+            # tensors without the batch dim, e.g. cache_position, are shared by the batches
+            return value.shape == other_value.shape and torch.equal(value, other_value)
+        return value is other_value
+
+    def _can_concat(self, batch, batch_size, other, other_size, multiples, names):
+        """Check whether two cached batches can be concatenated into one forward."""
+        for value, other_value, multiple, name in zip(batch, other, multiples, names):
+            if not self._can_concat_value(value, batch_size, other_value, other_size, multiple):
+                logger.warning_once(
+                    f"Micro-batching is disabled for the cached batches with a different `{name}`, "
+                    + "they run in separate forwards."
+                )
+                return False
+        return True
+
+    def _concat_values(self, values, batch_size, multiple):
+        if isinstance(values[0], (tuple, list)):
+            return type(values[0])(self._concat_values(items, batch_size, multiple) for items in zip(*values))
+        return torch.cat(values) if self._is_batch_major(values[0], batch_size, multiple) else values[0]
+
+    def gather_micro_batches(self, batch_num):
+        """Gather the cached batches into micro-batches for the block forward.
+
+        At most `micro_batch_size` consecutive batches whose inputs have the same shapes are concatenated along
+        the first dim, so the block runs GEMMs over several samples instead of one sample at a time. Batches of
+        different sequence lengths are not padded, which would add the padded tokens to the Hessian. Only the
+        tensors whose first dim is the batch size of hidden_states (batch * heads for alibi) are concatenated,
+        also inside tuples and lists like position_embeddings=(cos, sin), the other inputs must be equal across
+        the batches and are passed once.
+
+        Args:
+            batch_num (int): number of cached batches.
+
+        Yields:
+            tuple: indices of the cached batches, batch sizes of them, positional and keyword arguments.
+        """
+        keys = list(self.cache_key_arguments)
+        multiples = self._get_batch_dim_multiples(len(self.cache_positional_arguments), keys)
+        names = [f"positional argument {i}" for i in range(len(self.cache_positional_arguments))] + keys
+        idx = 0
+        while idx < batch_num:
+            positional_batch = self.gather_single_batch_from_list(self.cache_positional_arguments, idx)
+            keyword_batch = self.gather_single_batch_from_dict(self.cache_key_arguments, idx)
+            batch = positional_batch + [keyword_batch[k] for k in keys]
+            batch_size = self._get_hidden_states_batch_size(positional_batch, keyword_batch)
+            group, sizes = [batch], [batch_size]
+            idx += 1
+            while len(group) < self.micro_batch_size and idx < batch_num:
+                other_positional = self.gather_single_batch_from_list(self.cache_positional_arguments, idx)
+                other_keyword = self.gather_single_batch_from_dict(self.cache_key_arguments, idx)
+                other = other_positional + [other_keyword[k] for k in keys]
+                other_size = self._get_hidden_states_batch_size(other_positional, other_keyword)
+                if not self._can_concat(batch, batch_size, other, other_size, multiples, names):
+                    break
+                group.append(other)
+                sizes.append(other_size)
+                idx += 1
+            if len(group) > 1:
+                batch = [
+                    self._concat_values(values, batch_size, multiple)
+                    for values, multiple in zip(zip(*group), multiples)
+                ]
+            num_positional = len(positional_batch)
+            yield (
+                list(range(idx - len(group), idx)),
+                sizes,
+                batch[:num_positional],
+                dict(zip(keys, batch[num_positional:])),
+            )
+
     def update_blockwise_hidden_states(self, outs):
         """Update the blockwise hidden states.
 
@@ -538,6 +689,40 @@ class RAWGPTQuantizer(object):
             layers.append([layer])
         return layers
 
+    def quantize_layers_concurrently(self, quantize_fn, layer_names):
+        """Run fasterquant of the layers in a sequential group with a thread pool.
+
+        The GPTQ objects of the layers don't depend on each other, and the heavy torch ops release the GIL, so the
+        column-by-column updates of several layers keep more cores busy than a single layer. At most `num_workers`
+        layers are in flight and the results are yielded in order, so only their weights are held at once. The
+        intra-op threads are only capped during the run if `threads_per_worker` is set, the same threads as the
+        serial run keep the results bit-identical.
+
+        Args:
+            quantize_fn (Callable): quantize a layer by its name and return (scale, zero, Q).
+            layer_names (list): the names of the layers.
+
+        Yields:
+            tuple: the layer name and the result of quantize_fn.
+        """
+        num_workers = min(self.num_workers, len(layer_names))
+        num_threads = torch.get_num_threads()
+        if self.threads_per_worker:
+            torch.set_num_threads(self.threads_per_worker)
+        try:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                pending = deque()
+                for layer_name in layer_names:
+                    if len(pending) == num_workers:
+                        name, future = pending.popleft()
+                        yield name, future.result()
+                    pending.append((layer_name, executor.submit(quantize_fn, layer_name)))
+                while pending:
+                    name, future = pending.popleft()
+                    yield name, future.result()
+        finally:
+            torch.set_num_threads(num_threads)
+
     @torch.no_grad()
     def execute_quantization(self, means=None, stds=None):
         """Run quantization."""
@@ -555,6 +740,8 @@ class RAWGPTQuantizer(object):
         tblock_length = len(self.gptq_related_blocks["transformers"])
         for block_idx in range(tblock_length):
             logger.info(f"Quantizing layer {block_idx + 1} / {tblock_length}..")
+            if self.prefetcher is not None:
+                block_start_time, block_io_wait_time = time.time(), self.prefetcher.io_wait_time
             if not self.use_layer_wise:  # pragma: no cover
                 # if we do not apply layer-wise feature, we still place the entire block on the GPU
                 transformer_block = self.gptq_related_blocks["transformers"][block_idx].to(self.device)
@@ -612,27 +799,25 @@ class RAWGPTQuantizer(object):
                     gptq_for_this_block[layer_name].quantizer.configure(weight_config_this_layer)
 
                 # Step 2.3: modify forward functions to hook inputs data (used in gptq execution)
-                def add_batch(_name):
-                    def tmp(_, inp, out):
-                        gptq_for_this_block[_name].add_batch(inp[0].data, out.data)  # noqa: F821
-
-                    return tmp
-
+                # the layers which consume the same input share the Hessian
+                hessian_tracker = HessianSharingTracker(gptq_for_this_block)
                 handles = []  # register handles which add inputs and outputs to gptq object
                 for layer_name in sequential_layers:
-                    handles.append(sequential_layers[layer_name].register_forward_hook(add_batch(layer_name)))
+                    handles.append(
+                        sequential_layers[layer_name].register_forward_hook(hessian_tracker.hook(layer_name))
+                    )
                 batch_num = self.cache_key_arguments.pop("batch_num")
-                for j in range(batch_num):
-                    cache_keyword_batch = self.gather_single_batch_from_dict(self.cache_key_arguments, j)
-                    cache_positional_batch = self.gather_single_batch_from_list(self.cache_positional_arguments, j)
+                for _, _, cache_positional_batch, cache_keyword_batch in self.gather_micro_batches(batch_num):
                     out = transformer_block(*cache_positional_batch, **cache_keyword_batch)
                     accelerator.synchronize()
                     out = self.track_hidden_states(out)
+                    hessian_tracker.update()
                 self.cache_key_arguments["batch_num"] = batch_num
                 for h in handles:
                     h.remove()
+
                 # Step 2.4: everything is prepared, so start quantization!
-                for layer_name in sequential_layers:
+                def quantize_layer(layer_name):
                     # weight_config_this_layer = self.weight_config.get(
                     #     self.get_full_layer_name(layer_name, block_idx), None
                     # )
@@ -648,14 +833,26 @@ class RAWGPTQuantizer(object):
                     accelerator.synchronize()
                     if "hpu" in self.device:
                         W = W.to("cpu")
-                    scale, zp, Q = gptq_for_this_block[layer_name].fasterquant(
-                        W,
-                        blocksize=weight_config_this_layer["block_size"],
-                        percdamp=weight_config_this_layer["percdamp"],
-                        groupsize=weight_config_this_layer["group_size"],
-                        act_order=weight_config_this_layer["act_order"],
-                        static_groups=weight_config_this_layer["static_groups"],
-                    )
+                    # grad mode is thread-local, the workers of quantize_layers_concurrently don't inherit it
+                    with torch.no_grad():
+                        return gptq_for_this_block[layer_name].fasterquant(
+                            W,
+                            blocksize=weight_config_this_layer["block_size"],
+                            percdamp=weight_config_this_layer["percdamp"],
+                            groupsize=weight_config_this_layer["group_size"],
+                            act_order=weight_config_this_layer["act_order"],
+                            static_groups=weight_config_this_layer["static_groups"],
+                        )
+
+                # the weight updates of the layers are independent, quantize them concurrently
+                # layer-wise mode keeps loading and quantizing one weight at a time to save memory
+                concurrent = self.num_workers > 1 and len(sequential_layers) > 1 and not self.use_layer_wise
+                if concurrent and self.device == "cpu":
+                    quant_results = self.quantize_layers_concurrently(quantize_layer, list(sequential_layers))
+                else:
+                    quant_results = ((layer_name, quantize_layer(layer_name)) for layer_name in sequential_layers)
+                for layer_name, (scale, zp, Q) in quant_results:
+                    weight_config_this_layer = self.get_layer_config(self.get_full_layer_name(layer_name, block_idx))
                     if self.use_layer_wise:  # pragma: no cover
                         from neural_compressor.torch.algorithms.layer_wise import (
                             LWQ_WORKSPACE,
@@ -675,6 +872,8 @@ class RAWGPTQuantizer(object):
                                 set_module_tensor_to_device(self.model, param_name, self.device, value)
                         # sub_layer.weight.data = Q
                         torch.save(sub_layer.state_dict(), LWQ_WORKSPACE + f"/{full_layer_name}.pt")
+                        if self.prefetcher is not None:
+                            self.prefetcher.invalidate(full_layer_name)
                         clean_module_weight(sub_layer)
                         del Q
                         gc.collect()
@@ -691,17 +890,17 @@ class RAWGPTQuantizer(object):
 
                 # Step 2.5: replace output data with quantized weights
                 batch_num = self.cache_key_arguments.pop("batch_num")
-                for j in range(batch_num):
-                    cache_keyword_batch = self.gather_single_batch_from_dict(self.cache_key_arguments, j)
-                    cache_positional_batch = self.gather_single_batch_from_list(self.cache_positional_arguments, j)
+                for indices, sizes, cache_positional_batch, cache_keyword_batch in self.gather_micro_batches(batch_num):
                     out = transformer_block(*cache_positional_batch, **cache_keyword_batch)
                     accelerator.synchronize()
                     out = self.track_hidden_states(out)
+                    assert out.shape[0] == sum(sizes), "the block output of a micro-batch should be batch first."
                     # iteratively replace the input with output, thus layerwise quantization can continue.
-                    if "hidden_states" in self.cache_key_arguments:
-                        self.cache_key_arguments["hidden_states"][j] = out
-                    else:
-                        self.cache_positional_arguments[0][j] = out
+                    for j, out_j in zip(indices, torch.split(out, sizes) if len(sizes) > 1 else [out]):
+                        if "hidden_states" in self.cache_key_arguments:
+                            self.cache_key_arguments["hidden_states"][j] = out_j
+                        else:
+                            self.cache_positional_arguments[0][j] = out_j
                 self.cache_key_arguments["batch_num"] = batch_num
                 if self.use_layer_wise:  # pragma: no cover
                     self.gptq_related_blocks["transformers"][block_idx] = transformer_block
@@ -769,6 +968,7 @@ class RAWGPTQuantizer(object):
                         bias=bias is not None,
                         g_idx=gptq_perm is not None,
                         device="cpu",
+                        cache_weight=weight_config_this_layer.get("cache_weight", True),
                     )
                     new_module.pack(int_weight, gptq_scale, gptq_zp, bias, gptq_perm)
                     set_module(transformer_block, layer_name, new_module)
@@ -778,6 +978,13 @@ class RAWGPTQuantizer(object):
                 accelerator.synchronize()
                 torch.cuda.empty_cache()
                 gc.collect()
+                if self.prefetcher is not None:
+                    block_time = time.time() - block_start_time
+                    block_io_wait_time = self.prefetcher.io_wait_time - block_io_wait_time
+                    logger.info(
+                        f"Block {block_idx + 1} takes {block_time:.2f}s, I/O wait {block_io_wait_time:.2f}s, "
+                        + f"compute {block_time - block_io_wait_time:.2f}s."
+                    )
                 logger.info("------------------------------")
         # 2.7.1 do the post transformer blocks quantization
         do_post_transformer_quant = self.quant_lm_head
@@ -875,6 +1082,8 @@ class RAWGPTQuantizer(object):
                             set_module_tensor_to_device(self.model, param_name, self.device, value)
                     # sub_layer.weight.data = Q
                     torch.save(sub_layer.state_dict(), LWQ_WORKSPACE + f"/{full_layer_name}.pt")
+                    if self.prefetcher is not None:
+                        self.prefetcher.invalidate(full_layer_name)
                     clean_module_weight(sub_layer)
                     del Q
                     gc.collect()
@@ -953,6 +1162,7 @@ class RAWGPTQuantizer(object):
                     bias=bias is not None,
                     g_idx=gptq_perm is not None,
                     device="cpu",
+                    cache_weight=weight_config_this_layer.get("cache_weight", True),
                 )
                 new_module.pack(int_weight, gptq_scale, gptq_zp, bias, gptq_perm)
                 set_module(self.model, layer_name, new_module)
@@ -961,12 +1171,100 @@ class RAWGPTQuantizer(object):
         if self.use_layer_wise:
             import shutil
 
+            from neural_compressor.torch.algorithms.layer_wise import LWQ_WORKSPACE, close_checkpoint_loaders
+
+            if self.prefetcher is not None:
+                self.prefetcher.close()
+            close_checkpoint_loaders(self.model_path)
+
             shutil.rmtree(LWQ_WORKSPACE, ignore_errors=True)
         logger.info("Quantization done")
         # self.model.config.use_cache = self.use_cache
         return self.model
 
 
+class HessianSharingTracker:
+    """Accumulate one Hessian for the layers which consume the same input tensor.
+
+    The q/k/v projections, the gate/up projections and the fused experts read the same activation, so they have the
+    same Hessian H = 2XX^T. The forward hooks record the inputs of a calibration batch, and `update` groups the layers
+    by their input tensor after the batch and accumulates the batch once per group. The layers of a group share the
+    Hessian tensor and the cache of its inverse Cholesky factor. The grouping only keeps the layers which shared the
+    input in every batch, a layer is split from its group with a copy of the Hessian as soon as its input differs.
+
+    Example:
+        tracker = HessianSharingTracker(gptq_for_this_block)
+        handles = [layer.register_forward_hook(tracker.hook(name)) for name, layer in layers.items()]
+        for batch in batches:
+            block(*batch)
+            tracker.update()
+    """
+
+    def __init__(self, gptq_objs):
+        """Init a HessianSharingTracker.
+
+        Args:
+            gptq_objs (dict): the GPTQ objects of the layers, keyed by layer name.
+        """
+        self.gptq_objs = gptq_objs
+        self.records = []
+
+    def hook(self, name):
+        """Get the forward hook which records the input of the layer."""
+
+        def tmp(_, inp, out):
+            x = inp[0]
+            gptq = self.gptq_objs[name]
+            # the recorded input is kept alive until `update`, so its storage is not reused by another tensor
+            version = x._version if not x.is_inference() else None
+            key = (x.data_ptr(), x.shape, x.stride(), x.dtype, version, type(gptq.layer), gptq.columns)
+            self.records.append((name, key, x.data, out.data))
+
+        return tmp
+
+    def _share(self, names, H, hinv_cache):
+        for name in names:
+            self.gptq_objs[name].H = H
+            self.gptq_objs[name].hinv_cache = hinv_cache
+
+    def update(self):
+        """Add the recorded inputs of the last batch to the Hessians."""
+        records, self.records = self.records, []
+        num_calls = defaultdict(int)
+        for name, *_ in records:
+            num_calls[name] += 1
+        groups = {}
+        for index, (name, key, inp, out) in enumerate(records):
+            # a layer called more than once in a batch is accumulated for each call on its own
+            group_key = key if num_calls[name] == 1 else index
+            groups.setdefault(group_key, ([], inp, out))[0].append(name)
+        num_sharing = defaultdict(int)
+        for gptq in self.gptq_objs.values():
+            num_sharing[id(gptq.H)] += 1
+        for names, inp, out in groups.values():
+            cells = {}
+            for name in names:
+                cells.setdefault(id(self.gptq_objs[name].H), []).append(name)
+            cells = list(cells.values())
+            if len(cells) > 1 and all(self.gptq_objs[cell[0]].nsamples == 0 for cell in cells):
+                # the layers haven't seen any input yet, start sharing a Hessian
+                self._share(names, self.gptq_objs[names[0]].H, {})
+                for cell in cells[1:]:
+                    num_sharing[id(self.gptq_objs[cell[0]].H)] = 0
+                num_sharing[id(self.gptq_objs[names[0]].H)] = len(names)
+                cells = [names]
+            for cell in cells:
+                owner = self.gptq_objs[cell[0]]
+                if len(cell) < num_sharing[id(owner.H)]:
+                    # other layers sharing the Hessian didn't consume this input, split from them
+                    num_sharing[id(owner.H)] -= len(cell)
+                    self._share(cell, owner.H.clone(), {} if len(cell) > 1 else None)
+                    num_sharing[id(owner.H)] = len(cell)
+                owner.add_batch(inp, out)
+                for name in cell[1:]:
+                    self.gptq_objs[name].nsamples = owner.nsamples
+
+
 class GPTQ:
     """Please refer to the following.
 
@@ -988,6 +1286,8 @@ class GPTQ:
         self.nsamples = 0
         self.quantizer = Quantizer()
         self.perm = None  # act_order choice
+        # shared by the layers which consume the same input, see HessianSharingTracker
+        self.hinv_cache = None
 
     def add_batch(self, inp, out):
         """Add inputs and outputs to gptq object."""
@@ -1052,11 +1352,17 @@ class GPTQ:
             self.quantizer.find_params(W, weight=True)
 
         H = self.H
-        if "hpu" in self.device:
-            H = H.to("cpu")
         del self.H
-        dead = torch.diag(H) == 0
-        H[dead, dead] = 1
+        hinv_key = (percdamp, act_order)
+        if self.hinv_cache is not None and hinv_key in self.hinv_cache:
+            dead, perm, Hinv = self.hinv_cache[hinv_key]
+        else:
+            if self.hinv_cache is not None:
+                # the Hessian is shared with other layers, don't modify it in place
+                H = H.clone()
+            dead, perm, Hinv = self._prepare_hessian(H, percdamp, act_order)
+            if self.hinv_cache is not None:
+                self.hinv_cache[hinv_key] = (dead, perm, Hinv)
         W[:, dead] = 0  # such channel makes no contribution to quantization computation
 
         # enable static_groups
@@ -1072,26 +1378,12 @@ class GPTQ:
 
         # rearrange considering the diag's value
         if act_order:
-            perm = torch.argsort(torch.diag(H), descending=True)
             W = W[:, perm]
-            H = H[perm][:, perm]
             self.perm = perm.clone()
 
         Losses = torch.zeros_like(W)
         Q = torch.zeros_like(W)
 
-        damp = percdamp * torch.mean(torch.diag(H))
-        # TODO: [SW-201115] when index device is not the same as tensor, the H[diag, diag] += damp doesn't effect.
-        if "hpu" in self.device:
-            diag = torch.arange(self.columns, device="cpu")
-        else:
-            diag = torch.arange(self.columns, device=self.device)
-        H[diag, diag] += damp  # add a average value of
-        H = torch.linalg.cholesky(H)
-        H = torch.cholesky_inverse(H)
-        H = torch.linalg.cholesky(H, upper=True)
-        Hinv = H
-
         scale = []
         zero = []
 
@@ -1168,12 +1460,35 @@ class GPTQ:
             Q = Q.to(self.device)
         return scale, zero, Q
 
+    def _prepare_hessian(self, H, percdamp, act_order):
+        """Get the dead channels, the act_order permutation and the inverse Hessian in Cholesky form."""
+        if "hpu" in self.device:
+            H = H.to("cpu")
+        dead = torch.diag(H) == 0
+        H[dead, dead] = 1
+        perm = None
+        if act_order:
+            perm = torch.argsort(torch.diag(H), descending=True)
+            H = H[perm][:, perm]
+        damp = percdamp * torch.mean(torch.diag(H))
+        # TODO: [SW-201115] when index device is not the same as tensor, the H[diag, diag] += damp doesn't effect.
+        if "hpu" in self.device:
+            diag = torch.arange(self.columns, device="cpu")
+        else:
+            diag = torch.arange(self.columns, device=self.device)
+        H[diag, diag] += damp  # add a average value of
+        H = torch.linalg.cholesky(H)
+        H = torch.cholesky_inverse(H)
+        H = torch.linalg.cholesky(H, upper=True)
+        return dead, perm, H
+
     def free(self):
         """Free memory."""
         if DEBUG:
             self.inp1 = None
             self.out1 = None
         self.H = None
+        self.hinv_cache = None
         self.Losses = None
         self.Trace = None
         torch.cuda.empty_cache()
@@ -1374,7 +1689,12 @@ class GPTQuantizer(INCQuantizer):
         device=None,
         use_layer_wise=False,
         model_path=None,
+        prefetch_depth=0,
         quant_lm_head=False,
+        num_workers=1,
+        threads_per_worker=None,
+        activation_window=0,
+        micro_batch_size=1,
         *args,
         **kwargs,
     ):
@@ -1394,7 +1714,12 @@ class GPTQuantizer(INCQuantizer):
             device=device,
             use_layer_wise=use_layer_wise,
             model_path=model_path,
+            prefetch_depth=prefetch_depth,
             quant_lm_head=quant_lm_head,
+            num_workers=num_workers,
+            threads_per_worker=threads_per_worker,
+            activation_window=activation_window,
+            micro_batch_size=micro_batch_size,
         )
         self.gptq_quantizer.prepare_for_calibration()
         return self.gptq_quantizer.model
@@ -36,6 +36,8 @@ class HQQGlobalOptions:
     """Global options for HQQ."""
 
     use_half = os.getenv("HQQ_NOT_USE_HALF", "0") == "0"
+    # the size in MB of the dequantized weights cached for the recently used HQQLinear modules, 0 to disable
+    weight_cache_mb = int(os.getenv("HQQ_WEIGHT_CACHE_MB", "0"))
 
 
 hqq_global_option = HQQGlobalOptions()
@@ -21,6 +21,8 @@
 """The HQQ modules."""
 
 
+import weakref
+from collections import OrderedDict
 from typing import Any, Dict, Mapping, Tuple
 
 import torch
@@ -47,6 +49,8 @@ class HQQTensorHandle:
 
     # Store meta-data (we invert the scale for dequantization)
     SUPPORTED_BITS = [8, 4, 3, 2]
+    # number of elements dequantized at a time by `iter_dequantized_rows`
+    DEQUANT_TILE_NUMEL = 2**18
     optimize_weights = optimize_weights_proximal
 
     @classmethod
@@ -82,6 +86,64 @@ class HQQTensorHandle:
         meta["scale"] = q_weight.scale
         return cls._dequantize(q_weight.val, meta)
 
+    @classmethod
+    def dequantize_meta(cls, meta_tensor):
+        """Dequantizes the scale or zero of a QTensor if it's quantized.
+
+        Args:
+            meta_tensor (Union[torch.Tensor, QTensor]): The scale or zero.
+
+        Returns:
+            torch.Tensor: The float scale or zero.
+        """
+        if isinstance(meta_tensor, QTensor):
+            return cls.dequantize(meta_tensor)
+        return meta_tensor
+
+    @classmethod
+    def iter_dequantized_rows(cls, q_weight: "QTensor", scale: torch.Tensor, zero: torch.Tensor):
+        """Dequantizes the QTensor tile by tile, without materializing the whole float tensor.
+
+        The quantized tensor has `group_size` rows and each row is a contiguous chunk of the flattened float
+        tensor, so a tile of the packed rows unpacks to whole rows of the float tensor.
+
+        Args:
+            q_weight (QTensor): The quantized 2D weight tensor.
+            scale (torch.Tensor): The float scale of q_weight.
+            zero (torch.Tensor): The float zero of q_weight.
+
+        Yields:
+            Tuple[int, torch.Tensor]: The index of the first row and the dequantized rows of the float tensor.
+        """
+        meta = q_weight.meta_info
+        W_q = q_weight.val
+        out_features, in_features = meta.shape
+        num_rows = meta.group_size if meta.group_size is not None else out_features
+        row_numel = W_q.shape[1]
+        if meta.axis != 0 or num_rows * row_numel != out_features * in_features or row_numel % in_features:
+            # a layout can't be split into rows, dequantize the whole tensor
+            meta = meta.to_dict()
+            meta["scale"], meta["zero"] = scale, zero
+            yield 0, cls._dequantize(W_q, meta)
+            return
+        unpack_fn = Packer.get_unpack_fn(meta.nbits) if meta.packing else None
+        num_packed_rows = W_q.shape[0]
+        rows_per_packed_row = -(-num_rows // num_packed_rows)
+        tile_rows = max(1, cls.DEQUANT_TILE_NUMEL // (row_numel * rows_per_packed_row))
+        for start in range(0, num_packed_rows, tile_rows):
+            end = min(start + tile_rows, num_packed_rows)
+            W_r = unpack_fn(W_q[start:end]) if unpack_fn is not None else W_q[start:end]
+            if hqq_global_option.use_half:
+                W_r = W_r.half()
+            # the i-th chunk of the unpacked tile is the rows [start, end) + i * num_packed_rows
+            for i in range(W_r.shape[0] // (end - start)):
+                row_start = i * num_packed_rows + start
+                row_end = min(i * num_packed_rows + end, num_rows)
+                if row_start >= num_rows:  # the padding of 3-bit packing
+                    break
+                rows = W_r[i * (end - start) : i * (end - start) + row_end - row_start]
+                yield row_start * row_numel // in_features, ((rows - zero) * scale).reshape(-1, in_features)
+
     @classmethod
     def _create_q_tensor(cls, weight, meta) -> "QTensor":
         scale = meta["scale"]
@@ -185,16 +247,67 @@ class HQQTensorHandle:
             W_r = Packer.get_unpack_fn(meta["nbits"])(W_q)
             if hqq_global_option.use_half:
                 W_r = W_r.half()
-            if (meta["group_size"] is not None) and (meta["nbits"] == 3):
-                W_r = W_r[: meta["group_size"]] if (meta["axis"] == 0) else W_r[:, : meta["group_size"]]
+            if meta["nbits"] == 3:  # remove the padding of 3-bit packing
+                num_rows = meta["group_size"] if meta["group_size"] is not None else meta["shape"][meta["axis"]]
+                W_r = W_r[:num_rows] if (meta["axis"] == 0) else W_r[:, :num_rows]
         else:
-            if hqq_global_option.use_half:
-                W_r = W_q.half()
+            W_r = W_q.half() if hqq_global_option.use_half else W_q
         # TODO: double check the correctness, the official impl is also error...
         W_r = ((W_r - meta["zero"]) * meta["scale"]).reshape(meta["shape"])
         return W_r
 
 
+class _DequantizedWeightCache:
+    """A LRU cache of the dequantized weights of the recently used HQQLinear modules."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+
+    def _remove(self, module_id):
+        _, _, weight = self._entries.pop(module_id)
+        self._nbytes -= weight.numel() * weight.element_size()
+
+    def get(self, module, key):
+        entry = self._entries.get(id(module))
+        if entry is None or entry[0]() is not module or not _is_same_key(entry[1], key):
+            return None
+        self._entries.move_to_end(id(module))
+        return entry[2]
+
+    def put(self, module, key, weight, capacity):
+        nbytes = weight.numel() * weight.element_size()
+        if nbytes > capacity:
+            return
+        module_id = id(module)
+        if module_id in self._entries:
+            self._remove(module_id)
+        while self._entries and self._nbytes + nbytes > capacity:
+            self._remove(next(iter(self._entries)))
+
+        def release(_, module_id=module_id):
+            entry = self._entries.get(module_id)
+            if entry is not None and entry[0]() is None:
+                self._remove(module_id)
+
+        self._entries[module_id] = (weakref.ref(module, release), key, weight)
+        self._nbytes += nbytes
+
+
+_dequantized_weight_cache = _DequantizedWeightCache()
+
+
+def _get_meta_key(meta_tensor):
+    # the tensors of a scale or zero, changed by `to`, `half` or loading a state dict
+    if isinstance(meta_tensor, QTensor):
+        return (meta_tensor.val, meta_tensor.scale, meta_tensor.zero)
+    return (meta_tensor,)
+
+
+def _is_same_key(key, other):
+    return len(key) == len(other) and all(a is b for a, b in zip(key, other))
+
+
 class HQQLinear(torch.nn.Linear):
     """HQQ Linear module."""
 
@@ -211,6 +324,7 @@ class HQQLinear(torch.nn.Linear):
         super().__init__(in_features, out_features, bias, device, dtype)
         self.q_weight = q_weight
         self.quantized = q_weight is not None
+        self._dequantized_meta = None
 
     @dump_elapsed_time("Quantize linear module into HQQ module.")
     def quantize_weight(
@@ -243,9 +357,8 @@ class HQQLinear(torch.nn.Linear):
         q_weight = HQQTensorHandle.quantize(float_tensor=W, tensor_quant_config=weight_quant_config)
         self.q_weight = q_weight
 
-        # * The dequantization process only happens in the first forward pass.
-        # * It will change the `q_weight` but faster.
-        # * we should not save the state after doing the forward.
+        # * The quantized scale and zero are dequantized once in the first forward pass,
+        # * and cached outside of `q_weight`, see `_get_dequantized_meta`.
         if need_quant_scale:  # Quantize scale
             q_scale_tensor = HQQTensorHandle.quantize(
                 float_tensor=self.q_weight.scale, tensor_quant_config=scale_quant_config
@@ -259,24 +372,52 @@ class HQQLinear(torch.nn.Linear):
             self.q_weight.zero = q_zero_tensor
         self.quantized = True
 
+    def _get_meta_key(self):
+        return (self.q_weight.val,) + _get_meta_key(self.q_weight.scale) + _get_meta_key(self.q_weight.zero)
+
+    def _get_dequantized_meta(self):
+        """Get the float scale and zero, the quantized ones are dequantized once and cached.
+
+        The `q_weight` is kept unchanged, so that the state dict still contains the quantized scale and zero.
+        """
+        key = self._get_meta_key()
+        dequantized_meta = getattr(self, "_dequantized_meta", None)
+        if dequantized_meta is None or not _is_same_key(dequantized_meta[0], key):
+            scale = HQQTensorHandle.dequantize_meta(self.q_weight.scale)
+            zero = HQQTensorHandle.dequantize_meta(self.q_weight.zero)
+            self._dequantized_meta = (key, scale, zero)
+        return self._dequantized_meta[1:]
+
     def dequantize_weight(self):
         """Dequantize the weight tensor."""
         assert self.quantized, "model was not quantized"
-        # TODO: move below logic into `HQQTensorHandle`
-        if self.q_weight.is_scale_quantized():
-            scale_qdq = HQQTensorHandle.dequantize(self.q_weight.scale)
-            self.q_weight.scale = scale_qdq
-
-        if self.q_weight.is_zero_quantized():
-            zero_qdq = HQQTensorHandle.dequantize(self.q_weight.zero)
-            self.q_weight.zero = zero_qdq
-
-        W_qdq = HQQTensorHandle.dequantize(self.q_weight)
-        return W_qdq
+        scale, zero = self._get_dequantized_meta()
+        meta = self.q_weight.meta_info.to_dict()
+        meta["scale"], meta["zero"] = scale, zero
+        return HQQTensorHandle._dequantize(self.q_weight.val, meta)
 
     def forward(self, input: torch.Tensor) -> torch.Tensor:
-        """Forward pass of the HQQ linear module."""
-        out = torch.matmul(input, self.dequantize_weight().t())
+        """Forward pass of the HQQ linear module.
+
+        The weight is unpacked and dequantized tile by tile, unless the dequantized weight is cached by
+        `hqq_global_option.weight_cache_mb`.
+        """
+        assert self.quantized, "model was not quantized"
+        cache_capacity = hqq_global_option.weight_cache_mb * 2**20
+        W_qdq = None
+        if cache_capacity > 0:
+            key = self._get_meta_key()
+            W_qdq = _dequantized_weight_cache.get(self, key)
+            if W_qdq is None:
+                W_qdq = self.dequantize_weight()
+                _dequantized_weight_cache.put(self, key, W_qdq, cache_capacity)
+        if W_qdq is not None:
+            out = torch.matmul(input, W_qdq.t())
+        else:
+            scale, zero = self._get_dequantized_meta()
+            out = input.new_empty(input.shape[:-1] + (self.out_features,))
+            for start, W_rows in HQQTensorHandle.iter_dequantized_rows(self.q_weight, scale, zero):
+                out[..., start : start + W_rows.shape[0]] = torch.matmul(input, W_rows.t())
         if self.bias is not None:
             out += self.bias
         return out
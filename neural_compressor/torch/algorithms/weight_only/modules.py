@@ -18,6 +18,7 @@
 # Note: Do not import this file unless you have already imported torch,
 # since the model classes inherit torch.nn.Module.
 import math
+import sys
 from abc import abstractmethod
 
 import numpy as np
@@ -132,6 +133,8 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
         g_idx=False,
         device="cpu",
         use_optimum_format=True,
+        cache_weight=True,
+        dequant_tile_size=1024,
         **kwargs,
     ):
         """Init the WeightOnlyLinear object.
@@ -158,6 +161,11 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
                 3: g_idx: use same number for one group instead of recording the channel order.
                 4. parameter name changed, such as 'packed_weight' -> 'qweight'.
                 5. zeros is always needed even for sym.
+            cache_weight (bool, optional): recover the full-precision weight on the first forward and reuse it.
+                If False, forward dequantizes the packed weight tile by tile, so resident memory stays at
+                the packed size. Defaults to True.
+            dequant_tile_size (int, optional): number of output channels dequantized at a time
+                when cache_weight is False. Defaults to 1024.
         """
         super(INCWeightOnlyLinear, self).__init__(
             in_features,
@@ -168,6 +176,9 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
             device,
         )
         self.use_optimum_format = use_optimum_format
+        self.cache_weight = cache_weight
+        self.dequant_tile_size = dequant_tile_size
+        self._dequant_plan = None
         if "int" not in self.dtype:  # for nf4, fp4
             from neural_compressor.torch.algorithms.weight_only.utility import FLOAT_MAPPING, INT_MAPPING
 
@@ -536,23 +547,162 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
         else:
             return self.unpack_tensor_with_numpy(packed_tensor)
 
+    def unpack_tensor_vectorized(self, packed_tensor):
+        """Unpack the last dim of packed tensor in one vectorized step.
+
+        Args:
+            packed_tensor (tensor): packed tensor, may be a non-contiguous slice.
+
+        Returns:
+            tensor: unpacked tensor, same values as unpack_tensor.
+        """
+        if self.bits in [2, 4, 8] and sys.byteorder == "little":
+            # view the packed words as bytes so shifts run on uint8/int8 lanes
+            packed_bytes = packed_tensor.contiguous().view(-1).view(torch.uint8)
+            n_per_byte = 8 // self.bits
+            if hasattr(self, "qzeros"):
+                mask = 2**self.bits - 1
+                unpacked = [(packed_bytes >> (self.bits * e)) & mask for e in range(n_per_byte)]
+            else:
+                packed_bytes = packed_bytes.view(torch.int8)
+                unpacked = [(packed_bytes << (8 - self.bits * (e + 1))) >> (8 - self.bits) for e in range(n_per_byte)]
+            unpacked_tensor = torch.stack(unpacked, dim=-1).reshape(*packed_tensor.shape[:-1], -1)
+            return unpacked_tensor.type(torch.int16)
+        shifts = torch.arange(self.n_pack, dtype=packed_tensor.dtype, device=packed_tensor.device)
+        tmp = packed_tensor.unsqueeze(-1) << (self.compress_bits - self.bits * (shifts + 1))
+        tmp = tmp >> (self.compress_bits - self.bits)
+        unpacked_tensor = tmp.reshape(*packed_tensor.shape[:-1], -1).type(torch.int16)
+        if hasattr(self, "qzeros"):
+            unpacked_tensor &= 2**self.bits - 1  # remove sign bit
+        return unpacked_tensor
+
+    def dequantize_tile(self, start, end):
+        """Dequantize the weight of output channels [start, end) from the packed buffers.
+
+        Args:
+            start (int): first output channel, should be a multiple of n_pack.
+            end (int): last output channel (exclusive).
+
+        Returns:
+            tensor: dequantized weight tile with shape [end - start, in_features].
+        """
+        tile_len = end - start
+        pack_start, pack_end = start // self.n_pack, math.ceil(end / self.n_pack)
+        # unpack weight
+        if self.use_optimum_format:
+            weight = self.unpack_tensor_vectorized(self.qweight[:, start:end].T)
+            scales = self.scales[:, start:end].T
+        elif self.compression_dim == 1:
+            weight = self.unpack_tensor_vectorized(self.qweight[start:end])
+            scales = self.scales[start:end]
+        else:
+            weight = self.unpack_tensor_vectorized(self.qweight[pack_start:pack_end].T).T[:tile_len]
+            scales = self.scales[start:end]
+        weight = weight[:, : self.in_features]  # avoid oversize
+        if "int" not in self.dtype:
+            new_weight = torch.zeros(tile_len, self.in_features).to(weight.device)
+            for k, v in self.int2float_mapping.items():
+                new_weight += torch.where(weight == k, v, 0)
+            weight = new_weight
+
+        # unpack zero_point
+        zp = None
+        if hasattr(self, "qzeros"):
+            if self.use_optimum_format or self.compression_dim == 0:
+                qzeros = self.qzeros.T if self.use_optimum_format else self.qzeros
+                zp = self.unpack_tensor_vectorized(qzeros[pack_start:pack_end].T).T[:tile_len]
+            else:
+                zp = self.unpack_tensor_vectorized(self.qzeros[start:end])
+            zp = zp[:, : scales.shape[1]]  # avoid oversize
+            if self.use_optimum_format:
+                # zp -= 1 may cause zp == -1, after recover it becomes 2**self.bits - 1
+                zp += 1
+                zp = torch.where(zp > (2**self.bits - 1), 0, zp)
+
+        _, group_index = self._get_dequant_plan()
+        if group_index is None:
+            # contiguous groups, broadcast scales and zero points instead of gathering them per channel
+            weight = weight.reshape(tile_len, -1, self.group_size)
+            scales = scales.unsqueeze(-1)
+            zp = zp.unsqueeze(-1) if zp is not None else None
+        else:
+            scales = scales[:, group_index]
+            zp = zp[:, group_index] if zp is not None else None
+        if zp is not None:
+            weight = torch.subtract(weight, zp)
+            if self.bits == 8:
+                weight = weight.to(torch.int8)  # same wrap-around as recover
+            weight = (weight * scales).type(scales.dtype)
+        else:
+            weight = (weight * scales).type(self.float_type)
+        return weight.reshape(tile_len, self.in_features)
+
+    def _get_dequant_plan(self):
+        """Get the output channel tiles and the group of each input channel for the fused forward.
+
+        The plan is built once and rebuilt only when g_idx or dequant_tile_size changes, so the forward neither
+        checks the channel order again nor writes g_idx.
+
+        Returns:
+            tuple: a list of (start, end) output channel tiles and a long tensor mapping the input channels to
+                their groups, None if the groups are contiguous.
+        """
+        key = (self.dequant_tile_size,)
+        if self.g_idx is not None:
+            key += (self.g_idx.device, self.g_idx.data_ptr(), self.g_idx._version)
+        if self._dequant_plan is not None and self._dequant_plan[0] == key:
+            return self._dequant_plan[1]
+        tile_size = max(self.n_pack, self.dequant_tile_size // self.n_pack * self.n_pack)
+        tiles = [(start, min(start + tile_size, self.out_features)) for start in range(0, self.out_features, tile_size)]
+        group_index = None
+        ordered = self.in_features % self.group_size == 0
+        if self.g_idx is not None:
+            default_g_idx = torch.arange(self.in_features, device=self.g_idx.device) // self.group_size
+            if not ordered or not torch.equal(self.g_idx.long(), default_g_idx):
+                group_index = self.g_idx.long()
+        elif not ordered:
+            group_index = torch.arange(self.in_features, device=self.scales.device) // self.group_size
+        self._dequant_plan = (key, (tiles, group_index))
+        return tiles, group_index
+
+    def fused_dequant_linear(self, input):
+        """Compute linear from the packed weight, dequantizing one tile of output channels at a time.
+
+        Args:
+            input (tensor): input tensor.
+
+        Returns:
+            tensor: output tensor, no full-precision weight is kept after the call.
+        """
+        dtype = self.float_type
+        if dtype == torch.float16 and self.scales.device.type == "cpu":
+            dtype = torch.float32
+        input = input.type(dtype)
+        tiles, _ = self._get_dequant_plan()
+        outputs = []
+        for start, end in tiles:
+            weight = self.dequantize_tile(start, end).type(dtype)
+            bias = self.bias[start:end].type(dtype) if self.bias is not None else None
+            outputs.append(F.linear(input, weight, bias))
+        return torch.cat(outputs, dim=-1)
+
     def forward(self, input):
         """Forward function."""
+        if not self.cache_weight:
+            logger.debug(f"Calculating {self} with fused dequantization")
+            return self.fused_dequant_linear(input)
         if not hasattr(self, "weight"):
             weight = self.recover()
             device = self.scales.device
             if weight.dtype == torch.float16 and device.type == "cpu":
                 weight = weight.float()
                 self.bias = self.bias.float() if self.bias is not None else None
-        if True:  # keep reusing self.weight due to recover is too slow.
-            if not hasattr(self, "weight"):
-                self.weight = weight
-            input = input.type(self.weight.dtype)
-            logger.debug(f"Calculating {self}")
-            return F.linear(input, self.weight, self.bias)
-        else:
-            input = input.type(weight.dtype)
-            return F.linear(input, weight, self.bias)
+        # keep reusing self.weight due to recover is too slow.
+        if not hasattr(self, "weight"):
+            self.weight = weight
+        input = input.type(self.weight.dtype)
+        logger.debug(f"Calculating {self}")
+        return F.linear(input, self.weight, self.bias)
 
     def extra_repr(self) -> str:
         """Extract the configuration string.
@@ -20,6 +20,7 @@
 """RTN quantization."""
 
 import copy
+import time
 from collections import OrderedDict
 
 import torch
@@ -78,6 +79,7 @@ class RTNQuantizer(Quantizer):
         use_mse_search=False,
         use_layer_wise=False,
         model_path="",
+        prefetch_depth=0,
         quant_lm_head=False,
         *args,
         **kwargs,
@@ -97,6 +99,11 @@ class RTNQuantizer(Quantizer):
                                         Defaults to False.
             use_mse_search (bool, optional):  Whether to search clip range.
                                         Defaults to True.
+            use_layer_wise (bool, optional): Whether to load weights layer by layer from model_path.
+                                        Defaults to False.
+            model_path (str, optional): Model path that is used to load state_dict per layer.
+            prefetch_depth (int, optional): Number of modules whose weights are loaded ahead on a
+                                        background thread in layer-wise mode, 0 to disable. Defaults to 0.
             quant_lm_head (bool, optional):  Whether to quantize the lm_head layer.
                                         Defaults to False.
 
@@ -130,125 +137,159 @@ class RTNQuantizer(Quantizer):
 
         if use_layer_wise:
             from neural_compressor.common.utils import DEFAULT_WORKSPACE
-            from neural_compressor.torch.algorithms.layer_wise.utils import get_path, load_module
+            from neural_compressor.torch.algorithms.layer_wise.utils import (
+                WeightPrefetcher,
+                close_checkpoint_loaders,
+                get_path,
+                load_module,
+                set_module_tensor_to_device,
+            )
 
             if model_path == "":
                 model_path = model.path
             assert model_path, "model_path should not be None."
             model_path = get_path(model_path)
+            prefetcher = None
+            if prefetch_depth > 0:
+                leaf_names = [name for name, m in model.named_modules() if len(list(m.named_children())) == 0]
+                # RTN reads every module once from the checkpoint, like load_module
+                prefetcher = WeightPrefetcher(
+                    model, model_path, leaf_names, device=device, depth=prefetch_depth, use_workspace=False
+                )
+                start_time = time.time()
 
-        for name, m in model.named_modules():
-            if use_layer_wise and len(list(m.named_children())) == 0:
-                load_module(model, name, model_path, device=device)
-            if not isinstance(m, supported_layers):
-                continue
-            if name in weight_config:  # pragma: no cover
-                # initialize op configuration
-                dtype = weight_config[name].get("dtype", "int")
-                if dtype == "fp32":
+        try:
+            for name, m in model.named_modules():
+                if use_layer_wise and len(list(m.named_children())) == 0:
+                    if prefetcher is not None:
+                        io_wait_time = prefetcher.io_wait_time
+                        for n, value in prefetcher.get(name).items():
+                            set_module_tensor_to_device(model, name + "." + n, device, value)
+                        logger.debug(f"Waited {prefetcher.io_wait_time - io_wait_time:.3f}s for weights of {name}.")
+                    else:
+                        load_module(model, name, model_path, device=device)
+                if not isinstance(m, supported_layers):
                     continue
-                # Move modules to the accelerator device layer-by-layer
-                if not use_layer_wise:
-                    m.to(device)
-                ### FP8 cast part
-                if dtype in ["fp8_e5m2", "fp8_e5m2fnuz", "fp8_e4m3fn", "fp8_e4m3fnuz"]:
-                    logger.debug("Cast module {} to FP8 using qdq mode, no scaling".format(name))
-                    m.weight = cast_fp8(m.weight, dtype, use_qdq=True)
+                if name in weight_config:  # pragma: no cover
+                    # initialize op configuration
+                    dtype = weight_config[name].get("dtype", "int")
+                    if dtype == "fp32":
+                        continue
+                    # Move modules to the accelerator device layer-by-layer
+                    if not use_layer_wise:
+                        m.to(device)
+                    ### FP8 cast part
+                    if dtype in ["fp8_e5m2", "fp8_e5m2fnuz", "fp8_e4m3fn", "fp8_e4m3fnuz"]:
+                        logger.debug("Cast module {} to FP8 using qdq mode, no scaling".format(name))
+                        m.weight = cast_fp8(m.weight, dtype, use_qdq=True)
+                        continue
+                    ####
+                    logger.debug("Apply RTN on module %s.", name)
+                    bits = weight_config[name].get("bits", 4)
+                    group_size = weight_config[name]["group_size"]
+                    scheme = weight_config[name]["scheme"]
+                    quantile = weight_config[name].get("quantile", 1.0)
+                    group_dim = weight_config[name]["group_dim"]
+                    use_full_range = weight_config[name]["use_full_range"]
+                    use_mse_search = weight_config[name]["use_mse_search"]
+                    cache_weight = weight_config[name].get("cache_weight", True)
+                    use_optimum_format = kwargs.get("use_optimum_format", True)
+                    # double quant config
+                    double_quant_config = {
+                        "double_quant": weight_config[name]["use_double_quant"],
+                        "double_quant_dtype": weight_config[name]["double_quant_dtype"],
+                        "double_quant_bits": weight_config[name]["double_quant_bits"],
+                        "double_quant_scheme": weight_config[name]["double_quant_scheme"],
+                        "double_quant_group_size": weight_config[name]["double_quant_group_size"],
+                    }
+                    if dtype != "int" and "int" in dtype:
+                        bits = int(dtype.lstrip("int"))
+                        dtype = "int"
+                else:
                     continue
-                ####
-                logger.debug("Apply RTN on module %s.", name)
-                bits = weight_config[name].get("bits", 4)
-                group_size = weight_config[name]["group_size"]
-                scheme = weight_config[name]["scheme"]
-                quantile = weight_config[name].get("quantile", 1.0)
-                group_dim = weight_config[name]["group_dim"]
-                use_full_range = weight_config[name]["use_full_range"]
-                use_mse_search = weight_config[name]["use_mse_search"]
-                use_optimum_format = kwargs.get("use_optimum_format", True)
-                # double quant config
-                double_quant_config = {
-                    "double_quant": weight_config[name]["use_double_quant"],
-                    "double_quant_dtype": weight_config[name]["double_quant_dtype"],
-                    "double_quant_bits": weight_config[name]["double_quant_bits"],
-                    "double_quant_scheme": weight_config[name]["double_quant_scheme"],
-                    "double_quant_group_size": weight_config[name]["double_quant_group_size"],
-                }
-                if dtype != "int" and "int" in dtype:
-                    bits = int(dtype.lstrip("int"))
-                    dtype = "int"
-            else:
-                continue
-            log_msg = (
-                f"RTN quantization config: bits={bits}, group_size={group_size}, "
-                + f"scheme={scheme}, quantile={quantile}"
-            )
-            if dtype != "int":
-                log_msg += f", dtype={dtype}"
-            elif scheme == "sym":  # nf4/fp4 is always [-7,7]
-                log_msg += f", use_full_range={use_full_range}"
-            if dtype == "fp32":
-                continue
-            logger.debug(f"RTN quantized module:{name, m}")
-            logger.debug(log_msg)
-
-            # for only group_dim is 0 or only `transformers.Conv1D`, we need transpose weight.
-            if is_transformers_imported():
-                transpose = (group_dim == 0) ^ (isinstance(m, transformers.Conv1D))
-            else:
-                transpose = group_dim == 0
-            if transpose:
-                weight = m.weight.detach().T.contiguous()
-            else:
-                weight = m.weight.detach()
-            if use_mse_search:
-                quantile = search_clip(m, bits, group_size, scheme, dtype, use_full_range)
-            int_weight, scale, zp = quant_tensor(
-                weight,
-                dtype=dtype,
-                bits=bits,
-                group_size=group_size,
-                scheme=scheme,
-                quantile=quantile,
-                return_int=True,
-                full_range=use_full_range,
-                **double_quant_config,
-            )
-            int_weight = int_weight.t_().contiguous() if transpose else int_weight
-            scale = scale.t_().contiguous() if transpose else scale
-            zp = zp.t_().contiguous() if transpose and zp is not None else zp
-            if isinstance(m, torch.nn.Linear):
-                in_features = m.in_features
-                out_features = m.out_features
-            elif is_transformers_imported() and isinstance(m, transformers.Conv1D):
-                in_features = m.weight.shape[0]
-                out_features = m.weight.shape[1]
-                int_weight = int_weight.t_().contiguous()
-                scale = scale.t_().contiguous()
-                zp = zp.t_().contiguous() if zp is not None else zp
-
-            new_module = INCWeightOnlyLinear(
-                in_features,
-                out_features,
-                dtype=dtype,
-                bits=bits,
-                group_size=group_size,
-                zp=zp is not None,
-                bias=m.bias is not None,
-                use_optimum_format=use_optimum_format,
-                device=device,
-            )
-            new_module.pack(int_weight, scale, zp, m.bias)
+                log_msg = (
+                    f"RTN quantization config: bits={bits}, group_size={group_size}, "
+                    + f"scheme={scheme}, quantile={quantile}"
+                )
+                if dtype != "int":
+                    log_msg += f", dtype={dtype}"
+                elif scheme == "sym":  # nf4/fp4 is always [-7,7]
+                    log_msg += f", use_full_range={use_full_range}"
+                if dtype == "fp32":
+                    continue
+                logger.debug(f"RTN quantized module:{name, m}")
+                logger.debug(log_msg)
+
+                # for only group_dim is 0 or only `transformers.Conv1D`, we need transpose weight.
+                if is_transformers_imported():
+                    transpose = (group_dim == 0) ^ (isinstance(m, transformers.Conv1D))
+                else:
+                    transpose = group_dim == 0
+                if transpose:
+                    weight = m.weight.detach().T.contiguous()
+                else:
+                    weight = m.weight.detach()
+                if use_mse_search:
+                    quantile = search_clip(m, bits, group_size, scheme, dtype, use_full_range)
+                int_weight, scale, zp = quant_tensor(
+                    weight,
+                    dtype=dtype,
+                    bits=bits,
+                    group_size=group_size,
+                    scheme=scheme,
+                    quantile=quantile,
+                    return_int=True,
+                    full_range=use_full_range,
+                    **double_quant_config,
+                )
+                int_weight = int_weight.t_().contiguous() if transpose else int_weight
+                scale = scale.t_().contiguous() if transpose else scale
+                zp = zp.t_().contiguous() if transpose and zp is not None else zp
+                if isinstance(m, torch.nn.Linear):
+                    in_features = m.in_features
+                    out_features = m.out_features
+                elif is_transformers_imported() and isinstance(m, transformers.Conv1D):
+                    in_features = m.weight.shape[0]
+                    out_features = m.weight.shape[1]
+                    int_weight = int_weight.t_().contiguous()
+                    scale = scale.t_().contiguous()
+                    zp = zp.t_().contiguous() if zp is not None else zp
 
+                new_module = INCWeightOnlyLinear(
+                    in_features,
+                    out_features,
+                    dtype=dtype,
+                    bits=bits,
+                    group_size=group_size,
+                    zp=zp is not None,
+                    bias=m.bias is not None,
+                    use_optimum_format=use_optimum_format,
+                    device=device,
+                    cache_weight=cache_weight,
+                )
+                new_module.pack(int_weight, scale, zp, m.bias)
+
+                if use_layer_wise:
+                    m = m.to_empty(device=torch.device("meta"))
+                if name == "":
+                    return new_module
+                else:
+                    set_module(model, name, new_module)
+                # Move modules back to the model device layer-by-layer
+                if not use_layer_wise:
+                    m.to(model_device)
+                    new_module.to(model_device)
+        finally:
             if use_layer_wise:
-                m = m.to_empty(device=torch.device("meta"))
-            if name == "":
-                return new_module
-            else:
-                set_module(model, name, new_module)
-            # Move modules back to the model device layer-by-layer
-            if not use_layer_wise:
-                m.to(model_device)
-                new_module.to(model_device)
+                if prefetcher is not None:
+                    prefetcher.close()
+                close_checkpoint_loaders(model_path)
+        if use_layer_wise and prefetcher is not None:
+            total_time = time.time() - start_time
+            logger.info(
+                f"Layer-wise RTN takes {total_time:.2f}s, I/O wait {prefetcher.io_wait_time:.2f}s, "
+                + f"compute {total_time - prefetcher.io_wait_time:.2f}s."
+            )
         if not use_layer_wise:
             model.to(model_device)
         return model
@@ -108,6 +108,8 @@ def load(model_name_or_path, original_model=None, format=SaveLoadFormat.DEFAULT,
         format (str, optional): 'defult' for loading INC weight-only quantized model.
             'huggingface' for loading huggingface WOQ causal language model. Defaults to "default".
         kwargs (remaining dictionary of keyword arguments, optional):
+            cache_weight (bool): whether the loaded weight-only linear modules keep the dequantized weight after
+            the first forward. Defaults to the value saved in the quantization config, True if it is not saved.
             remaining dictionary of keyword arguments for loading huggingface models.
             will be passed to the huggingface model's `__init__` method, such as 'trust_remote_code', 'revision'.
 
@@ -128,6 +130,7 @@ class WOQModelLoader:
         self.original_model = original_model
         self.format = format
         self.device = device
+        self.cache_weight = kwargs.pop("cache_weight", None)
         self.kwargs = kwargs
         self.quantization_config = {}
         self.loaded_state_dict = {}
@@ -385,6 +388,9 @@ class WOQModelLoader:
         module_kwargs["zp"] = True if name + ".qzeros" in self.loaded_state_dict_keys else False
         module_kwargs["use_optimum_format"] = True
         module_kwargs["bias"] = linear_module.bias is not None
+        module_kwargs["cache_weight"] = (
+            self.cache_weight if self.cache_weight is not None else module_quantization_config.get("cache_weight", True)
+        )
         if _is_autoround:
             module_kwargs["scale_dtype"] = convert_dtype_str2torch(
                 module_quantization_config.get("scale_dtype", "fp16")
@@ -16,6 +16,7 @@ import numpy as np
 import torch
 
 from neural_compressor.torch.utils import accelerator, device_synchronize, logger
+from neural_compressor.torch.utils.activation_store import ActivationStore
 
 __all__ = [
     "FLOAT_MAPPING",
@@ -1023,11 +1024,13 @@ def get_example_input(dataloader, i=1):
     return example_inp
 
 
-def replace_forward(model):
+def replace_forward(model, activation_window=0):
     """Replace forward to get the input args and kwargs of first block for AWQ algorithm.
 
     Args:
         model (torch.nn.Module): input model.
+        activation_window (int, optional): number of batches kept in memory, the others are spilled
+            to the workspace with ActivationStore. Defaults to 0, which keeps all batches in memory.
 
     Raises:
         ValueError: to avoid inference of rest parts in model.
@@ -1036,8 +1039,12 @@ def replace_forward(model):
         torch.nn.Module: model with replaced forward.
     """
     # Step 1: replace block_forward to collect block inputs and avoid entire inference
-    setattr(model, "total_block_args", [])
-    setattr(model, "total_block_kwargs", [])
+    if activation_window > 0:
+        setattr(model, "total_block_args", ActivationStore(window=activation_window))
+        setattr(model, "total_block_kwargs", ActivationStore(window=activation_window))
+    else:
+        setattr(model, "total_block_args", [])
+        setattr(model, "total_block_kwargs", [])
 
     def forward(layer, *args, **kwargs):
         # update total_hidden_states, total_block_kwargs, per batch
@@ -1086,7 +1093,14 @@ def recover_forward(model):
 
 # copy from neural_compressor/adaptor/torch_utils/util.py
 def get_module_input_output(
-    model, module_hook_config={}, dataloader=None, iters=-1, calib_func=None, input_func=None, output_func=None
+    model,
+    module_hook_config={},
+    dataloader=None,
+    iters=-1,
+    calib_func=None,
+    input_func=None,
+    output_func=None,
+    activation_window=0,
 ):
     """A help function to get input and output tensor of modules in module_name_list.
 
@@ -1103,6 +1117,8 @@ def get_module_input_output(
         calib_func: a custom inference function to replace dataloader and iters.
         input_func: preprocess input for less memory usage
         output_func: preprocess output for less memory usage
+        activation_window: number of batches kept in memory, the others are spilled to the workspace
+            with ActivationStore. Defaults to 0, which keeps all batches in memory.
 
     Returns:
         total_values: recorded input_values, output_values.
@@ -1115,6 +1131,11 @@ def get_module_input_output(
 
     total_values = defaultdict(defaultdict)
 
+    def _new_values():
+        if activation_window > 0:
+            return ActivationStore(window=activation_window)
+        return []
+
     def _save_input_output_hook(name, record_input=False, record_output=False):
         """A forward hook to save input and output values of a module.
 
@@ -1135,7 +1156,8 @@ def get_module_input_output(
                 if name in total_values and "input" in total_values[name]:
                     total_values[name]["input"].append(input)
                 else:
-                    total_values[name]["input"] = [input]
+                    total_values[name]["input"] = _new_values()
+                    total_values[name]["input"].append(input)
             if record_output:
                 output = outputs[0] if isinstance(outputs, tuple) else outputs
                 if output_func is not None:
@@ -1145,7 +1167,8 @@ def get_module_input_output(
                 if name in total_values and "output" in total_values[name]:
                     total_values[name]["output"].append(output)
                 else:
-                    total_values[name]["output"] = [output]
+                    total_values[name]["output"] = _new_values()
+                    total_values[name]["output"].append(output)
 
         return _hook
 
@@ -93,6 +93,7 @@ def rtn_entry(
             "group_dim": quant_config.group_dim,
             "use_full_range": quant_config.use_full_range,
             "use_mse_search": quant_config.use_mse_search,
+            "cache_weight": quant_config.cache_weight,
             "use_double_quant": quant_config.use_double_quant,
             "double_quant_dtype": quant_config.double_quant_dtype,
             "double_quant_bits": quant_config.double_quant_bits,
@@ -103,6 +104,7 @@ def rtn_entry(
         {
             "use_layer_wise": quant_config.use_layer_wise,
             "model_path": quant_config.model_path,
+            "prefetch_depth": quant_config.prefetch_depth,
             "quant_lm_head": quant_config.quant_lm_head,
         }
     )
@@ -150,6 +152,7 @@ def gptq_entry(
             "sym": quant_config.use_sym,
             "group_size": quant_config.group_size,
             "mse": quant_config.use_mse_search,
+            "cache_weight": quant_config.cache_weight,
             "use_double_quant": quant_config.use_double_quant,
             "double_quant_dtype": quant_config.double_quant_dtype,
             "double_quant_bits": quant_config.double_quant_bits,
@@ -165,7 +168,12 @@ def gptq_entry(
         {
             "use_layer_wise": quant_config.use_layer_wise,
             "model_path": quant_config.model_path,
+            "prefetch_depth": quant_config.prefetch_depth,
             "quant_lm_head": quant_config.quant_lm_head,
+            "num_workers": quant_config.num_workers,
+            "threads_per_worker": quant_config.threads_per_worker,
+            "activation_window": quant_config.activation_window,
+            "micro_batch_size": quant_config.micro_batch_size,
         }
     )
     kwargs.pop("example_inputs")
@@ -435,6 +443,7 @@ def awq_quantize_entry(
                 "scheme": "sym" if quant_config.use_sym else "asym",
                 "use_full_range": quant_config.use_full_range,
                 "use_mse_search": quant_config.use_mse_search,
+                "cache_weight": quant_config.cache_weight,
                 "use_layer_wise": quant_config.use_layer_wise,
                 "use_double_quant": quant_config.use_double_quant,
                 "double_quant_dtype": quant_config.double_quant_dtype,
@@ -447,6 +456,7 @@ def awq_quantize_entry(
             folding = quant_config.folding
             use_full_range = quant_config.use_full_range
             absorb_layer_dict = quant_config.absorb_layer_dict
+            activation_window = quant_config.activation_window
 
     run_fn = kwargs.get("run_fn", None)
     run_args = kwargs.get("run_args", None)
@@ -467,6 +477,7 @@ def awq_quantize_entry(
         use_mse_search=use_mse_search,
         folding=folding,
         use_full_range=use_full_range,
+        activation_window=activation_window,
     )
 
     model.qconfig = configs_mapping
@@ -743,11 +754,13 @@ def mx_quant_entry(
         torch.nn.Module: prepared model or quantized model.
     """
     logger.info("Quantize model with the mx quant algorithm.")
+    from neural_compressor.torch.algorithms.mx_quant import save
     from neural_compressor.torch.algorithms.mx_quant.mx import MXQuantizer
 
     quantizer = get_quantizer(model, quantizer_cls=MXQuantizer, quant_config=configs_mapping)
     model = quantizer.execute(model, mode=mode)
     model.qconfig = configs_mapping
+    model.save = MethodType(save, model)
     postprocess_model(model, mode, quantizer)
 
     return model
@@ -14,14 +14,22 @@
 """Intel Neural Compressor Pytorch quantization AutoTune API."""
 
 
+import itertools
+import mmap
+import os
+import tempfile
+import time
+from contextlib import nullcontext
 from copy import deepcopy
 from typing import Callable, List, Optional, Union
 
 import torch
 
+from neural_compressor.common import options
 from neural_compressor.common.base_config import BaseConfig, get_all_config_set_from_config_registry
-from neural_compressor.common.base_tuning import EvaluationFuncWrapper, TuningConfig, init_tuning
+from neural_compressor.common.base_tuning import EvaluationFuncWrapper, ParallelTrialRunner, TuningConfig, init_tuning
 from neural_compressor.common.utils import dump_elapsed_time
+from neural_compressor.torch.algorithms.base_algorithm import CalibrationCache
 from neural_compressor.torch.quantization import quantize
 from neural_compressor.torch.quantization.config import FRAMEWORK_NAME, RTNConfig
 from neural_compressor.torch.utils import constants, logger
@@ -63,6 +71,133 @@ def _deepcopy_warp(model):
     return new_model
 
 
+class _CopyOnWriteCloner:
+    """Clone the float model for trials without copying its parameters and buffers.
+
+    The CPU tensors of the float model are written once to an unlinked file in the workspace and every clone maps
+    the file copy-on-write. A trial only copies the pages of the tensors it updates in place, so the float model is
+    never written and the quantized models don't share memory with it or with each other. Tensors on other devices
+    are copied for each clone. The file is removed when the cloner is released, the clones keep their mappings.
+    """
+
+    # alignment of the tensors in the file, in bytes
+    alignment = 64
+
+    def __init__(self, model: torch.nn.Module):
+        """Init a _CopyOnWriteCloner object.
+
+        Args:
+            model (torch.nn.Module): the float model.
+        """
+        self.model = model
+        self._offsets = {}
+        os.makedirs(options.workspace, exist_ok=True)
+        self._file = tempfile.TemporaryFile(dir=options.workspace)
+        size = 0
+        for tensor in self._unique_tensors(model):
+            if tensor.device.type != "cpu" or tensor.numel() == 0:
+                continue
+            try:
+                data = tensor.detach().contiguous().reshape(-1).view(torch.uint8).numpy()
+            except (RuntimeError, TypeError):  # pragma: no cover
+                # e.g. quantized tensors, they are copied for each clone
+                continue
+            size += -size % self.alignment
+            self._file.seek(size)
+            self._file.write(data.tobytes())
+            self._offsets[id(tensor)] = (size, data.nbytes)
+            size += data.nbytes
+        self._file.flush()
+        self._size = size
+
+    @staticmethod
+    def _unique_tensors(model):
+        tensors = {}
+        for tensor in itertools.chain(model.parameters(), model.buffers()):
+            tensors.setdefault(id(tensor), tensor)
+        return tensors.values()
+
+    def _copy_tensor(self, tensor, mapping):
+        if mapping is None or id(tensor) not in self._offsets:
+            return tensor.detach().clone()
+        offset, nbytes = self._offsets[id(tensor)]
+        flat = torch.frombuffer(mapping, dtype=torch.uint8, count=nbytes, offset=offset)
+        return flat.view(tensor.dtype).reshape(tensor.shape)
+
+    def clone(self) -> torch.nn.Module:
+        """Clone the model, the CPU parameters and buffers are copy-on-write mappings of the float ones."""
+        mapping = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_COPY) if self._size else None
+        memo = {}
+        for param in self.model.parameters():
+            if id(param) not in memo:
+                data = self._copy_tensor(param, mapping)
+                memo[id(param)] = torch.nn.Parameter(data, requires_grad=param.requires_grad)
+        for buffer in self.model.buffers():
+            if id(buffer) not in memo:
+                memo[id(buffer)] = self._copy_tensor(buffer, mapping)
+        additional_attr_lst = ["_exported", "dynamic_shapes"]
+        original_attr = {key: getattr(self.model, key, None) for key in additional_attr_lst}
+        new_model = deepcopy(self.model, memo)
+        for key, value in original_attr.items():
+            setattr(new_model, key, value)
+        return new_model
+
+
+def _quantize_trial(cloner, quant_config, run_fn, run_args, example_inputs, calib_cache=None):
+    # !!! Make sure to quantize a clone only when inplace is set to `True`.
+    with calib_cache.activate() if calib_cache is not None else nullcontext():
+        q_model = quantize(
+            cloner.clone(),
+            quant_config=quant_config,
+            run_fn=run_fn,
+            run_args=run_args,
+            inplace=True,
+            example_inputs=example_inputs,
+        )
+    return q_model
+
+
+def _can_fork_trials(model):
+    """Check whether the trials of the model can run in forked worker processes."""
+    device_types = {tensor.device.type for tensor in itertools.chain(model.parameters(), model.buffers())}
+    if device_types - {"cpu"}:
+        logger.warning(f"Parallel trials need the model on CPU but it is on {device_types}, run the trials one by one.")
+        return False
+    return ParallelTrialRunner.is_supported()
+
+
+def _autotune_in_parallel(
+    cloner,
+    tune_config,
+    config_loader,
+    tuning_logger,
+    tuning_monitor,
+    eval_func_wrapper,
+    run_fn,
+    run_args,
+    example_inputs,
+    calib_cache=None,
+):
+    def trial_fn(quant_config):
+        q_model = _quantize_trial(cloner, quant_config, run_fn, run_args, example_inputs, calib_cache)
+        return eval_func_wrapper.evaluate(q_model)
+
+    runner = ParallelTrialRunner(
+        trial_fn,
+        tune_config.num_parallel_trials,
+        tune_config.cores_per_trial,
+        worker_init_fn=lambda cores: torch.set_num_threads(len(cores)),
+    )
+    stop_trial_index = runner.run(config_loader, tuning_logger, tuning_monitor)
+    if stop_trial_index is None:
+        return None
+    logger.info("Stopped tuning.")
+    # the quantized models stay in the worker processes, quantize the best config again
+    logger.info("Re-quantizing with best quantization config...")
+    best_quant_config: BaseConfig = tuning_monitor.get_best_quant_config()
+    return _quantize_trial(cloner, best_quant_config, run_fn, run_args, example_inputs, calib_cache)
+
+
 @dump_elapsed_time("Pass auto-tune")
 def autotune(
     model: torch.nn.Module,
@@ -72,9 +207,18 @@ def autotune(
     run_fn=None,
     run_args=None,
     example_inputs=None,
+    cache_calibration: bool = True,
+    keep_best_model: bool = False,
 ):
     """The main entry of auto-tune.
 
+    The trials share the float model and the calibration statistics:
+        - the model of each trial is a copy-on-write clone of the float model instead of a deep copy, the returned
+          model doesn't share memory with the float model.
+        - the observer statistics of the algorithms supporting `CalibrationCache` are collected by `run_fn`
+          once and reused by the trials with the same observers, see `cache_calibration`.
+        - the best quantized model can be kept instead of quantizing it again, see `keep_best_model`.
+
     Args:
         model (torch.nn.Module): _description_
         tune_config (TuningConfig): _description_
@@ -83,6 +227,11 @@ def autotune(
         run_fn (Callable, optional): for calibration to quantize model. Defaults to None.
         run_args (tuple, optional): arguments used by run_fn. Defaults to None.
         example_inputs (tensor/tuple/dict, optional): used to trace torch model. Defaults to None.
+        cache_calibration (bool, optional): reuse the observer statistics across trials, `run_fn` should give
+            the same statistics each time it is called. Defaults to True.
+        keep_best_model (bool, optional): keep the best quantized model during tuning to return it without
+            re-quantizing, at the cost of holding one more quantized model in memory. Defaults to False.
+            It has no effect when `tune_config.num_parallel_trials` > 1, the best config is quantized again.
 
     Returns:
         The quantized model.
@@ -90,44 +239,60 @@ def autotune(
     best_quant_model = None
     eval_func_wrapper = EvaluationFuncWrapper(eval_fn, eval_args)
     config_loader, tuning_logger, tuning_monitor = init_tuning(tuning_config=tune_config)
-    baseline: float = eval_func_wrapper.evaluate(_deepcopy_warp(model))
+    cloner = _CopyOnWriteCloner(model)
+    calib_cache = CalibrationCache() if cache_calibration else None
+    baseline: float = eval_func_wrapper.evaluate(cloner.clone())
     tuning_monitor.set_baseline(baseline)
     tuning_logger.tuning_start()
+    if tune_config.num_parallel_trials > 1 and _can_fork_trials(model):
+        best_quant_model = _autotune_in_parallel(
+            cloner,
+            tune_config,
+            config_loader,
+            tuning_logger,
+            tuning_monitor,
+            eval_func_wrapper,
+            run_fn,
+            run_args,
+            example_inputs,
+            calib_cache,
+        )
+        tuning_logger.tuning_end()
+        return best_quant_model
+    best_kept_model, best_kept_index = None, None
+    best_kept_quantize_time = 0.0
     for trial_index, quant_config in enumerate(config_loader, 1):
         tuning_logger.trial_start(trial_index=trial_index)
         tuning_logger.execution_start()
         logger.info(quant_config.to_dict())
-        # !!! Make sure to use deepcopy only when inplace is set to `True`.
-        q_model = quantize(
-            _deepcopy_warp(model),
-            quant_config=quant_config,
-            run_fn=run_fn,
-            run_args=run_args,
-            inplace=True,
-            example_inputs=example_inputs,
-        )
+        start = time.time()
+        cache_time_saved = calib_cache.time_saved if calib_cache else 0.0
+        q_model = _quantize_trial(cloner, quant_config, run_fn, run_args, example_inputs, calib_cache)
+        quantize_time = time.time() - start
         tuning_logger.execution_end()
         tuning_logger.evaluation_start()
         eval_result: float = eval_func_wrapper.evaluate(q_model)
         tuning_logger.evaluation_end()
         tuning_monitor.add_trial_result(trial_index, eval_result, quant_config)
+        if keep_best_model and tuning_monitor.get_best_trial_record().trial_index == trial_index:
+            best_kept_model, best_kept_index = q_model, trial_index
+            best_kept_quantize_time = quantize_time
+        if calib_cache is not None:
+            tuning_logger.trial_time_saved(trial_index, calib_cache.time_saved - cache_time_saved)
         tuning_logger.trial_end(trial_index)
         if tuning_monitor.need_stop():
             logger.info("Stopped tuning.")
             best_trial_record = tuning_monitor.get_best_trial_record()
             if best_trial_record.trial_index != trial_index:
-                logger.info("Re-quantizing with best quantization config...")
                 del q_model  # maybe gc.collect() is needed for memory release
-                best_quant_config: BaseConfig = best_trial_record.quant_config
-                # !!! Make sure to use deepcopy only when inplace is set to `True`.
-                q_model = quantize(
-                    _deepcopy_warp(model),
-                    quant_config=best_quant_config,
-                    run_fn=run_fn,
-                    run_args=run_args,
-                    inplace=True,
-                    example_inputs=example_inputs,
-                )
+                if best_kept_index == best_trial_record.trial_index:
+                    logger.info("Use the kept model of the best quantization config.")
+                    q_model = best_kept_model
+                    tuning_logger.trial_time_saved(best_kept_index, best_kept_quantize_time)
+                else:
+                    logger.info("Re-quantizing with best quantization config...")
+                    best_quant_config: BaseConfig = best_trial_record.quant_config
+                    q_model = _quantize_trial(cloner, best_quant_config, run_fn, run_args, example_inputs, calib_cache)
             best_quant_model = q_model  # quantize model inplace
             break
     tuning_logger.tuning_end()
@@ -112,9 +112,11 @@ class RTNConfig(TorchBaseConfig):
         "group_dim",
         "use_full_range",
         "use_mse_search",
+        "cache_weight",
         # layer wise params
         "use_layer_wise",
         "model_path",
+        "prefetch_depth",
         # double quant
         "use_double_quant",
         "double_quant_dtype",
@@ -135,9 +137,11 @@ class RTNConfig(TorchBaseConfig):
         group_dim: int = 1,
         use_full_range: bool = False,
         use_mse_search: bool = False,
+        cache_weight: bool = True,
         # layer wise
         use_layer_wise: bool = False,
         model_path: str = "",
+        prefetch_depth: int = 0,
         # double quant
         use_double_quant: bool = False,
         double_quant_dtype: str = "int",
@@ -160,8 +164,12 @@ class RTNConfig(TorchBaseConfig):
             group_dim (int): Dimension for grouping. Default is 1.
             use_full_range (bool): Enables full range for activations. Default is False.
             use_mse_search (bool): Enables mean squared error (MSE) search. Default is False.
+            cache_weight (bool): Keeps the dequantized weight of the quantized linear after its first forward.
+                False dequantizes the weight tile by tile in every forward to save memory. Default is True.
             use_layer_wise (bool): Enables quantize model per layer. Defaults to False.
             model_path (str): Model path that is used to load state_dict per layer.
+            prefetch_depth (int): Number of modules whose weights are loaded ahead on a background thread
+                in layer-wise mode, 0 to disable. Defaults to 0.
             use_double_quant (bool): Enables double quantization. Default is False.
             double_quant_dtype (str): Data type for double_quant scale. Default is "int".
             double_quant_bits (int): Number of bits used to represent double_quant scale. Default is 4.
@@ -179,8 +187,10 @@ class RTNConfig(TorchBaseConfig):
         self.group_dim = group_dim
         self.use_full_range = use_full_range
         self.use_mse_search = use_mse_search
+        self.cache_weight = cache_weight
         self.use_layer_wise = use_layer_wise
         self.model_path = model_path
+        self.prefetch_depth = prefetch_depth
         # double quant
         self.use_double_quant = use_double_quant
         self.double_quant_bits = double_quant_bits
@@ -245,7 +255,13 @@ class RTNConfig(TorchBaseConfig):
         """
         if not self.quant_lm_head:
             self.set_local(
-                LM_HEAD_NAMES, RTNConfig(dtype="fp32", use_layer_wise=self.use_layer_wise, model_path=self.model_path)
+                LM_HEAD_NAMES,
+                RTNConfig(
+                    dtype="fp32",
+                    use_layer_wise=self.use_layer_wise,
+                    model_path=self.model_path,
+                    prefetch_depth=self.prefetch_depth,
+                ),
             )
         config_mapping = super().to_config_mapping(config_list, model_info)
         return config_mapping
@@ -338,6 +354,7 @@ class GPTQConfig(TorchBaseConfig):
         "use_sym",
         "group_size",
         "use_mse_search",
+        "cache_weight",
         "use_double_quant",
         "double_quant_dtype",
         "double_quant_bits",
@@ -346,6 +363,12 @@ class GPTQConfig(TorchBaseConfig):
         # layer wise params
         "use_layer_wise",
         "model_path",
+        "prefetch_depth",
+        # concurrent quantization params
+        "num_workers",
+        "threads_per_worker",
+        "activation_window",
+        "micro_batch_size",
         # quant lm_head
         "quant_lm_head",
         # gptq params
@@ -363,9 +386,11 @@ class GPTQConfig(TorchBaseConfig):
         use_sym: bool = True,
         group_size: int = 32,
         use_mse_search: bool = False,
+        cache_weight: bool = True,
         # layer wise
         use_layer_wise: bool = False,
         model_path: str = "",
+        prefetch_depth: int = 0,
         # double quant
         use_double_quant: bool = False,
         double_quant_dtype: str = "int",
@@ -380,6 +405,11 @@ class GPTQConfig(TorchBaseConfig):
         block_size: int = 2048,
         static_groups: bool = False,
         true_sequential: bool = False,
+        # concurrent quantization
+        num_workers: int = 1,
+        threads_per_worker: int = None,
+        activation_window: int = 0,
+        micro_batch_size: int = 1,
         # Tuning space
         white_list: Optional[List[OP_NAME_OR_MODULE_TYPE]] = DEFAULT_WHITE_LIST,
         **kwargs,
@@ -392,8 +422,12 @@ class GPTQConfig(TorchBaseConfig):
             use_sym (bool): Indicates whether weights are symmetric. Default is True.
             group_size (int): Size of weight groups. Default is 32.
             use_mse_search (bool): Enables mean squared error (MSE) search. Default is False.
+            cache_weight (bool): Keeps the dequantized weight of the quantized linear after its first forward.
+                False dequantizes the weight tile by tile in every forward to save memory. Default is True.
             use_layer_wise (bool): Enables quantize model per layer. Defaults to False.
             model_path (str): Model path that is used to load state_dict per layer.
+            prefetch_depth (int): Number of modules whose weights are loaded ahead on a background thread
+                in layer-wise mode, 0 to disable. Defaults to 0.
             use_double_quant (bool): Enables double quantization. Default is False.
             double_quant_dtype (str): Data type for double_quant scale. Default is "int".
             double_quant_bits (int): Number of bits used to represent double_quant scale. Default is 4.
@@ -412,6 +446,17 @@ class GPTQConfig(TorchBaseConfig):
             true_sequential (bool): Whether to quantize layers within a transformer block in their original order.
                                   This can lead to higher accuracy but slower overall quantization process.
                                   Default is False.
+            num_workers (int): Number of layers in a sequential group quantized concurrently on CPU,
+                               not used in layer-wise mode. Default is 1.
+            threads_per_worker (int): Number of intra-op threads of each worker. Default is None,
+                                      which keeps the current intra-op threads so that the results are
+                                      bit-identical to num_workers=1. A smaller value avoids oversubscribing
+                                      the cores but the results may differ in the last bits.
+            activation_window (int): Number of calibration batches whose block inputs are kept in memory,
+                                     the others are spilled to a file in the workspace. Default is 0, which
+                                     keeps all block inputs in memory.
+            micro_batch_size (int): Number of cached calibration batches with the same shapes concatenated into
+                                    one block forward. The block inputs must be batch first. Default is 1.
             white_list (Optional[List[OP_NAME_OR_MODULE_TYPE]]): White list of operator names or module types.
                                                                  Default is DEFAULT_WHITE_LIST.
         """
@@ -421,9 +466,11 @@ class GPTQConfig(TorchBaseConfig):
         self.use_sym = use_sym
         self.group_size = group_size
         self.use_mse_search = use_mse_search
+        self.cache_weight = cache_weight
         # layer wise
         self.use_layer_wise = use_layer_wise
         self.model_path = model_path
+        self.prefetch_depth = prefetch_depth
         # double quant
         self.use_double_quant = use_double_quant
         self.double_quant_bits = double_quant_bits
@@ -437,6 +484,10 @@ class GPTQConfig(TorchBaseConfig):
         self.static_groups = static_groups
         self.true_sequential = true_sequential
         self.quant_lm_head = quant_lm_head
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.activation_window = activation_window
+        self.micro_batch_size = micro_batch_size
         self._post_init()  # initialize global & local configuration
 
     @classmethod
@@ -468,7 +519,17 @@ class GPTQConfig(TorchBaseConfig):
         """
         if not self.quant_lm_head:
             self.set_local(
-                LM_HEAD_NAMES, GPTQConfig(dtype="fp32", use_layer_wise=self.use_layer_wise, model_path=self.model_path)
+                LM_HEAD_NAMES,
+                GPTQConfig(
+                    dtype="fp32",
+                    use_layer_wise=self.use_layer_wise,
+                    model_path=self.model_path,
+                    prefetch_depth=self.prefetch_depth,
+                    num_workers=self.num_workers,
+                    threads_per_worker=self.threads_per_worker,
+                    activation_window=self.activation_window,
+                    micro_batch_size=self.micro_batch_size,
+                ),
             )
         config_mapping = super().to_config_mapping(config_list, model_info)
         return config_mapping
@@ -548,6 +609,7 @@ class AWQConfig(TorchBaseConfig):
         "use_sym",
         "use_full_range",
         "use_mse_search",
+        "cache_weight",
         "use_layer_wise",
         "use_double_quant",
         "double_quant_dtype",
@@ -561,6 +623,7 @@ class AWQConfig(TorchBaseConfig):
         "use_auto_clip",
         "folding",
         "absorb_layer_dict",
+        "activation_window",
     ]
     name = AWQ
 
@@ -573,6 +636,7 @@ class AWQConfig(TorchBaseConfig):
         group_dim: int = 1,
         use_full_range: bool = False,
         use_mse_search: bool = False,
+        cache_weight: bool = True,
         use_layer_wise: bool = False,
         model_path: str = "",
         # double quant
@@ -589,6 +653,7 @@ class AWQConfig(TorchBaseConfig):
         folding: bool = False,
         white_list: Optional[List[OP_NAME_OR_MODULE_TYPE]] = DEFAULT_WHITE_LIST,
         absorb_layer_dict: dict = {},
+        activation_window: int = 0,
         **kwargs,
     ):
         """Init AWQ weight-only quantization config.
@@ -601,6 +666,8 @@ class AWQConfig(TorchBaseConfig):
             group_dim (int): Dimension for grouping, default is 1.
             use_full_range (bool): Enables full range for activations, default is False.
             use_mse_search (bool): Enables mean squared error (MSE) search, default is False.
+            cache_weight (bool): Keeps the dequantized weight of the quantized linear after its first forward.
+              False dequantizes the weight tile by tile in every forward to save memory, default is True.
             use_layer_wise (bool): Enables quantize model per layer. Defaults to False.
             model_path (str): Model path that is used to load state_dict per layer.
             use_double_quant (bool): Enables double quantization, default is False.
@@ -614,6 +681,9 @@ class AWQConfig(TorchBaseConfig):
             folding(bool): Allow insert mul before linear when the scale cannot be absorbed by last layer,
               default is False.
             absorb_layer_dict (dict): The layer dict that scale can be absorbed, default is {}.
+            activation_window (int): Number of calibration batches whose block inputs and linear inputs are kept
+              in memory, the others are spilled to a file in the workspace. Default is 0, which keeps all of
+              them in memory.
             white_list (Optional[List[OP_NAME_OR_MODULE_TYPE]]): White list of operator names or module types.
               Default is DEFAULT_WHITE_LIST.
         """
@@ -625,6 +695,7 @@ class AWQConfig(TorchBaseConfig):
         self.group_dim = group_dim
         self.use_full_range = use_full_range
         self.use_mse_search = use_mse_search
+        self.cache_weight = cache_weight
         self.use_layer_wise = use_layer_wise
         self.model_path = model_path
         # double quant
@@ -638,6 +709,7 @@ class AWQConfig(TorchBaseConfig):
         self.use_auto_clip = use_auto_clip
         self.folding = folding
         self.absorb_layer_dict = absorb_layer_dict
+        self.activation_window = activation_window
         self._post_init()
 
     @classmethod
@@ -1130,6 +1202,7 @@ class MXQuantConfig(TorchBaseConfig):
         "blocksize",
         "round_method",
         "weight_only",
+        "pack_weight",
     ]
     name = MX_QUANT
 
@@ -1141,6 +1214,7 @@ class MXQuantConfig(TorchBaseConfig):
         blocksize: int = 32,
         round_method: str = "nearest",
         weight_only: bool = False,
+        pack_weight: bool = False,
         white_list: Optional[List[OP_NAME_OR_MODULE_TYPE]] = DEFAULT_WHITE_LIST,
         **kwargs,
     ):
@@ -1153,6 +1227,8 @@ class MXQuantConfig(TorchBaseConfig):
             blocksize (int): Granularity to share the scale, default is 32.
             round_method (str): Round method, default is "nearest".
             weight_only (bool): Whether implement weight_only, default is False.
+            pack_weight (bool): Whether store the weights of at most 8 bits as packed element codes and 8-bit
+              shared exponents instead of fp32, default is False.
             white_list (Optional[List[OP_NAME_OR_MODULE_TYPE]]): White list of operator names or module types.
               Default is DEFAULT_WHITE_LIST.
         """
@@ -1163,6 +1239,7 @@ class MXQuantConfig(TorchBaseConfig):
         self.blocksize = blocksize
         self.round_method = round_method
         self.weight_only = weight_only
+        self.pack_weight = pack_weight
         self._post_init()
 
     @classmethod
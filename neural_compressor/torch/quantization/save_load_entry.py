@@ -23,6 +23,7 @@ from neural_compressor.torch.quantization.config import (
     FP8Config,
     GPTQConfig,
     HQQConfig,
+    MXQuantConfig,
     RTNConfig,
     TEQConfig,
 )
@@ -91,6 +92,8 @@ def load(model_name_or_path, original_model=None, format="default", device="cpu"
         device (str, optional): 'cpu', 'hpu'. specify the device the model will be loaded to.
             currently only used for weight-only quantization.
         kwargs (remaining dictionary of keyword arguments, optional):
+            cache_weight (bool): for weight-only quantization, whether the quantized linear modules keep the
+            dequantized weight after the first forward. Defaults to the value saved in the quantization config.
             remaining dictionary of keyword arguments for loading huggingface models.
             Will be passed to the huggingface model's `__init__` method, such as 'trust_remote_code', 'revision'.
 
@@ -123,13 +126,19 @@ def load(model_name_or_path, original_model=None, format="default", device="cpu"
                 from neural_compressor.torch.algorithms import weight_only
 
                 qmodel = weight_only.load(
-                    model_name_or_path, original_model, format=SaveLoadFormat.DEFAULT, device=device
+                    model_name_or_path, original_model, format=SaveLoadFormat.DEFAULT, device=device, **kwargs
                 )
                 return qmodel.to(device)
+            elif isinstance(config_object, MXQuantConfig):
+                from neural_compressor.torch.algorithms import mx_quant
+
+                return mx_quant.load(model_name_or_path, original_model).to(device)
     elif format == SaveLoadFormat.HUGGINGFACE.value:
         import transformers
 
-        config = transformers.AutoConfig.from_pretrained(model_name_or_path, **kwargs)
+        # cache_weight is an argument of the weight-only linear modules, not of the huggingface config
+        config_kwargs = {key: value for key, value in kwargs.items() if key != "cache_weight"}
+        config = transformers.AutoConfig.from_pretrained(model_name_or_path, **config_kwargs)
         # use config to check which algorithm is used.
         if (
             "fp8_config" in config.quantization_config
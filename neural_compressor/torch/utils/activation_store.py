@@ -0,0 +1,179 @@
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A disk-backed store of the calibration activations of block-wise algorithms."""
+
+import mmap
+import os
+import tempfile
+from collections import OrderedDict, namedtuple
+
+import torch
+
+from neural_compressor.common import options
+
+__all__ = [
+    "ActivationStore",
+]
+
+_TensorSlot = namedtuple("_TensorSlot", ["index"])
+_TensorInfo = namedtuple("_TensorInfo", ["offset", "nbytes", "dtype", "shape", "device"])
+
+
+class ActivationStore:
+    """A list of per-batch activations spilled to a memory-mapped workspace file.
+
+    Block-wise algorithms such as GPTQ and AWQ keep the inputs of the current block for every calibration
+    batch. The store writes the tensors of each item to a temporary file as soon as the item is added, and
+    keeps only the `window` most recently used items in memory, so the memory grows with the window instead
+    of the number of calibration batches. An item can be a tensor or a list, tuple or dict of them, other
+    values are kept in memory as they are. Items are read back batch by batch through a mapping of the file.
+
+    Updates must be assigned back with `store[i] = item`, modifying a loaded item in place is lost once the
+    item leaves the window. An assigned item with the same tensor sizes overwrites the old one in the file.
+
+    Example:
+        store = ActivationStore(window=2)
+        for batch in dataloader:
+            store.append(embedding(batch))
+        for i, hidden_states in enumerate(store):
+            store[i] = block(hidden_states)
+    """
+
+    def __init__(self, window: int = 1, workspace: str = None):
+        """Init an ActivationStore.
+
+        Args:
+            window (int, optional): number of items kept in memory. Defaults to 1.
+            workspace (str, optional): directory of the temporary file. Defaults to None, which is
+                "activation_store" under the workspace of neural_compressor options.
+        """
+        self.window = max(1, window)
+        if workspace is None:
+            workspace = os.path.join(options.workspace, "activation_store")
+        os.makedirs(workspace, exist_ok=True)
+        # the file is removed once closed
+        self._file = tempfile.TemporaryFile(dir=workspace)
+        self._end = 0
+        self._items = []
+        self._cache = OrderedDict()
+
+    def _flatten(self, item, tensors):
+        if isinstance(item, torch.Tensor):
+            tensors.append(item)
+            return _TensorSlot(len(tensors) - 1)
+        if type(item) in (list, tuple):
+            return type(item)(self._flatten(value, tensors) for value in item)
+        if type(item) is dict:
+            return {key: self._flatten(value, tensors) for key, value in item.items()}
+        return item
+
+    def _unflatten(self, skeleton, tensors):
+        if isinstance(skeleton, _TensorSlot):
+            return tensors[skeleton.index]
+        if type(skeleton) in (list, tuple):
+            return type(skeleton)(self._unflatten(value, tensors) for value in skeleton)
+        if type(skeleton) is dict:
+            return {key: self._unflatten(value, tensors) for key, value in skeleton.items()}
+        return skeleton
+
+    def _write_tensor(self, tensor, offset=None):
+        data = tensor.detach().to("cpu").contiguous().reshape(-1).view(torch.uint8).numpy()
+        if offset is None:
+            offset = self._end
+            self._end += data.nbytes
+        view, written = memoryview(data), 0
+        while written < data.nbytes:
+            written += os.pwrite(self._file.fileno(), view[written:], offset + written)
+        return _TensorInfo(offset, data.nbytes, tensor.dtype, tuple(tensor.shape), tensor.device)
+
+    def _read_tensor(self, info):
+        if info.nbytes == 0:
+            return torch.empty(info.shape, dtype=info.dtype, device=info.device)
+        map_start = info.offset - info.offset % mmap.ALLOCATIONGRANULARITY
+        buffer = mmap.mmap(
+            self._file.fileno(), info.offset - map_start + info.nbytes, offset=map_start, access=mmap.ACCESS_COPY
+        )
+        flat = torch.frombuffer(buffer, dtype=torch.uint8, count=info.nbytes, offset=info.offset - map_start)
+        tensor = flat.view(info.dtype).reshape(info.shape).clone()
+        del flat
+        buffer.close()
+        return tensor.to(info.device)
+
+    def _store(self, item, old_infos=None):
+        tensors = []
+        skeleton = self._flatten(item, tensors)
+        nbytes = [t.numel() * t.element_size() for t in tensors]
+        if old_infos is not None and [info.nbytes for info in old_infos] == nbytes:
+            # same sizes, overwrite the old item to keep the file from growing
+            infos = [self._write_tensor(t, info.offset) for t, info in zip(tensors, old_infos)]
+        else:
+            infos = [self._write_tensor(t) for t in tensors]
+        return skeleton, infos
+
+    def _put_cache(self, idx, item):
+        self._cache[idx] = item
+        self._cache.move_to_end(idx)
+        while len(self._cache) > self.window:
+            self._cache.popitem(last=False)
+
+    def append(self, item):
+        """Add the activations of a batch."""
+        self._items.append(self._store(item))
+        self._put_cache(len(self._items) - 1, item)
+
+    def __len__(self):
+        """Get the number of items."""
+        return len(self._items)
+
+    def __getitem__(self, idx):
+        """Get an item, read it from the file if it isn't in the window."""
+        if idx < 0:
+            idx += len(self._items)
+        if idx in self._cache:
+            self._cache.move_to_end(idx)
+            return self._cache[idx]
+        skeleton, infos = self._items[idx]
+        item = self._unflatten(skeleton, [self._read_tensor(info) for info in infos])
+        self._put_cache(idx, item)
+        return item
+
+    def __setitem__(self, idx, item):
+        """Replace an item."""
+        if idx < 0:
+            idx += len(self._items)
+        self._items[idx] = self._store(item, self._items[idx][1])
+        self._put_cache(idx, item)
+
+    def __iter__(self):
+        """Iterate the items batch by batch."""
+        for idx in range(len(self._items)):
+            yield self[idx]
+
+    @property
+    def file_size(self):
+        """Get the size of the workspace file in bytes."""
+        return self._end
+
+    def close(self):
+        """Release the items and remove the workspace file."""
+        self._cache.clear()
+        self._items = []
+        if not self._file.closed:
+            self._file.close()
+
+    def __del__(self):
+        """Remove the workspace file."""
+        file = getattr(self, "_file", None)
+        if file is not None and not file.closed:
+            file.close()
@@ -27,6 +27,7 @@ from neural_compressor.torch.utils import (
     logger,
     set_module,
 )
+from neural_compressor.torch.utils.activation_store import ActivationStore
 
 cur_accelerator = get_accelerator()
 
@@ -53,11 +54,13 @@ def get_block_prefix(model):
     return block_prefix, block_num
 
 
-def replace_forward(model):
+def replace_forward(model, activation_window=0):
     """Replace forward to get the input args and kwargs of first block for AWQ algorithm.
 
     Args:
         model (torch.nn.Module): input model.
+        activation_window (int, optional): number of batches kept in memory, the others are spilled
+            to the workspace with ActivationStore. Defaults to 0, which keeps all batches in memory.
 
     Raises:
         ValueError: to avoid inference of rest parts in model.
@@ -66,8 +69,12 @@ def replace_forward(model):
         torch.nn.Module: model with replaced forward.
     """
     # Step 1: replace block_forward to collect block inputs and avoid entire inference
-    setattr(model, "total_block_args", [])
-    setattr(model, "total_block_kwargs", [])
+    if activation_window > 0:
+        setattr(model, "total_block_args", ActivationStore(window=activation_window))
+        setattr(model, "total_block_kwargs", ActivationStore(window=activation_window))
+    else:
+        setattr(model, "total_block_args", [])
+        setattr(model, "total_block_kwargs", [])
 
     def forward(layer, *args, **kwargs):
         # update total_hidden_states, total_block_kwargs, per batch
@@ -114,13 +121,15 @@ def recover_forward(model):
     return model
 
 
-def block_wise_calibration(model, dataloader=None, data=None, inference_dtype=torch.bfloat16):
+def block_wise_calibration(model, dataloader=None, data=None, inference_dtype=torch.bfloat16, activation_window=0):
     """Calibration model on hpu block-by-block to reduce device memory usage.
 
     Args:
         model (torch.nn.Module): prepared model.
         dataloader (obj): dataloader.
         data (obj): one data.
+        activation_window (int, optional): number of batches whose block inputs are kept in memory, the
+            others are spilled to the workspace. Defaults to 0, which keeps all batches in memory.
     """
 
     def get_block_kwargs(model, dataloader=None, data=None, device="cpu"):
@@ -137,7 +146,7 @@ def block_wise_calibration(model, dataloader=None, data=None, inference_dtype=to
             total_block_kwargs: list of input kwargs of each batch.
         """
         with torch.no_grad():
-            model = replace_forward(model)
+            model = replace_forward(model, activation_window=activation_window)
             mapped_state_dict = model.state_dict()  # using memory mapping
             for n, m in model.named_modules():
                 if isinstance(m, torch.nn.Embedding):
@@ -183,11 +192,13 @@ def block_wise_calibration(model, dataloader=None, data=None, inference_dtype=to
                 out = block(*args, **kwargs)
                 if isinstance(out, tuple):  # pragma: no cover
                     out = out[0]
-                # update inputs of next block
-                if len(total_block_args[block_id]) > 0:
-                    total_block_args[block_id][0].copy_(out)
-                elif "hidden_states" in total_block_kwargs[block_id]:
-                    total_block_kwargs[block_id]["hidden_states"].copy_(out)
+                # update inputs of next block, assign back since items of ActivationStore are copies
+                if len(args) > 0:
+                    args[0].copy_(out)
+                    total_block_args[block_id] = args
+                elif "hidden_states" in kwargs:
+                    kwargs["hidden_states"].copy_(out)
+                    total_block_kwargs[block_id] = kwargs
                 cur_accelerator.synchronize()
             block = block.to("meta")  # clean device memory
             gc.collect()
@@ -434,11 +434,12 @@ class CallBacks:
                 res_list.append(res)
         return res_list
 
-    def on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None):
+    def on_after_compute_loss(self, input, student_output, student_loss, teacher_output=None, sample_indices=None):
         """Be called on the end of loss computation."""
         loss_list = []
+        kwargs = {"sample_indices": sample_indices} if sample_indices is not None else {}
         for callbacks in self.callbacks_list:
-            loss = callbacks.on_after_compute_loss(input, student_output, student_loss, teacher_output)
+            loss = callbacks.on_after_compute_loss(input, student_output, student_loss, teacher_output, **kwargs)
             if loss is not None:
                 loss_list.append(loss)
         return loss_list[0] if len(loss_list) == 1 else loss_list
@@ -16,6 +16,8 @@
 # limitations under the License.
 """LayerHistogramCollector: save the histogram by layer."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from neural_compressor.utils.utility import combine_histogram
@@ -29,7 +31,7 @@ class LayerHistogramCollector(object):
     quantization using KL divergence.
     """
 
-    def __init__(self, num_bins=8001, layer_tensor=None, include_layer=None, logger=None):
+    def __init__(self, num_bins=8001, layer_tensor=None, include_layer=None, logger=None, num_workers=1):
         """Init a LayerHistogramCollector object.
 
         Args:
@@ -37,12 +39,30 @@ class LayerHistogramCollector(object):
             layer_tensor: A dict with layer names as keys and lists of NDArrays as values
             include_layer: Layers that need to collect histograms
             logger: Output logger information if use a logger
+            num_workers: Number of threads collecting histograms of different layers concurrently
         """
         self.hist_dict = {}
         self.num_bins = num_bins
         self.layer_tensor = layer_tensor
         self.include_layer = include_layer
         self.logger = logger
+        self.num_workers = num_workers
+
+    def _collect_layer(self, name):
+        """Collect the histogram of one layer."""
+        histogram = self.hist_dict.get(name)
+        for arr in self.layer_tensor[name]:
+            if self.logger:
+                self.logger.debug("Collect layer {} histogram of shape {}.".format(name, arr.shape))
+            min_range = np.min(arr)
+            max_range = np.max(arr)
+            th = max(abs(min_range), abs(max_range))
+            if histogram is not None:
+                histogram = combine_histogram(histogram, arr)
+            else:
+                hist, hist_edges = np.histogram(arr, bins=self.num_bins, range=(-th, th))
+                histogram = (hist, hist_edges, min_range, max_range, th)
+        return histogram
 
     def collect(self):
         """Collect layer output NDArrays as a callback function."""
@@ -51,17 +71,13 @@ class LayerHistogramCollector(object):
         #     return
         # handle = ctypes.cast(arr, NDArrayHandle)
         # arr = NDArray(handle, writable=False).copyto(cpu()).asnumpy()
-        for name in self.layer_tensor:
-            if name not in self.include_layer:
-                continue
-            for arr in self.layer_tensor[name]:
-                if self.logger:
-                    self.logger.debug("Collect layer {} histogram of shape {}.".format(name, arr.shape))
-                min_range = np.min(arr)
-                max_range = np.max(arr)
-                th = max(abs(min_range), abs(max_range))
-                if name in self.hist_dict:
-                    self.hist_dict[name] = combine_histogram(self.hist_dict[name], arr)
-                else:
-                    hist, hist_edges = np.histogram(arr, bins=self.num_bins, range=(-th, th))
-                    self.hist_dict[name] = (hist, hist_edges, min_range, max_range, th)
+        names = [name for name in self.layer_tensor if name in self.include_layer]
+        if self.num_workers > 1 and len(names) > 1:
+            # layers are independent and numpy releases the GIL while binning the data
+            with ThreadPoolExecutor(max_workers=min(self.num_workers, len(names))) as executor:
+                histograms = list(executor.map(self._collect_layer, names))
+        else:
+            histograms = [self._collect_layer(name) for name in names]
+        for name, histogram in zip(names, histograms):
+            if histogram is not None:
+                self.hist_dict[name] = histogram
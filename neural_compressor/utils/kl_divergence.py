@@ -16,6 +16,8 @@
 # limitations under the License.
 """KL Divergence: measure probability distribution difference to determine the thresholds per quantized op."""
 
+import numpy as np
+
 
 class KL_Divergence(object):  # pragma: no cover
     """The class of supporting KL divergence calibration algorithm."""
@@ -65,13 +67,12 @@ class KL_Divergence(object):  # pragma: no cover
                 tmp_sum2 += p_idx * (math.log(P_sum * q_idx))
         return (tmp_sum1 - tmp_sum2) / P_sum
 
-    def get_threshold(self, hist, hist_edges, min_val, max_val, num_bins, quantized_type, num_quantized_bins=255):
-        """The interface of getting threshold per op using KL divergency algorithm."""
+    def _get_search_range(self, hist, min_val, max_val, num_bins):
+        """Get the range of candidate bins searched for the threshold."""
         if min_val >= 0:
             ending_iter = num_bins - 1
             starting_iter = int(ending_iter * 0.7)
         else:
-            th = max(abs(max_val), abs(min_val))
             starting_iter = 0
             ending_iter = num_bins - 1
             if abs(max_val) > abs(min_val):
@@ -90,35 +91,130 @@ class KL_Divergence(object):  # pragma: no cover
                     else:
                         break
                 starting_iter = int(0.6 * ending_iter)
+        return starting_iter, ending_iter
+
+    def _kl_divergence(self, hist, i, num_quantized_bins):
+        """Compute the KL divergence of clipping the histogram at bin i, None if the candidate is skipped."""
+        reference_distr_P = hist[0:i].tolist()
+        outliers_count = sum(hist[i:2048])
+        if reference_distr_P[i - 1] == 0:
+            return None
+        reference_distr_P[i - 1] += outliers_count
+        reference_distr_bins = reference_distr_P[:]
+        candidate_distr_Q = hist[0:i].tolist()
+        num_merged_bins = int(i / num_quantized_bins)
+        candidate_distr_Q_quantized = [0] * num_quantized_bins
+        j_start = 0
+        j_end = num_merged_bins
+
+        for idx in range(num_quantized_bins):
+            candidate_distr_Q_quantized[idx] = sum(candidate_distr_Q[j_start:j_end])
+            j_start += num_merged_bins
+            j_end += num_merged_bins
+            if idx + 1 == num_quantized_bins - 1:
+                j_end = i
+        candidate_distr_Q = self.expand_quantized_bins(candidate_distr_Q_quantized, reference_distr_bins)
+        P_sum = sum(reference_distr_P)
+        Q_sum = sum(candidate_distr_Q)
+        return self.safe_entropy(reference_distr_P, P_sum, candidate_distr_Q, Q_sum)
+
+    def _kl_divergences(self, hist, candidates, num_quantized_bins, block_size=256):
+        """Compute the KL divergence of all candidate bins at once.
+
+        Bins are merged into quantized bins with cumulative sums, and a block of candidates is
+        evaluated together by broadcasting over a (candidates, bins) matrix.
 
+        Args:
+            hist (np.ndarray): histogram counts.
+            candidates (np.ndarray): candidate bins to clip the histogram at, hist[i - 1] must be non-zero.
+            num_quantized_bins (int): number of quantized bins.
+            block_size (int, optional): number of candidates evaluated together. Defaults to 256.
+
+        Returns:
+            tuple: KL divergences and their magnitudes which bound the rounding error.
+        """
+        hist = hist.astype(np.float64) if hist.dtype.kind == "f" else hist.astype(np.int64)
+        cum_hist = np.concatenate(([0], np.cumsum(hist)))
+        cum_nonzeros = np.concatenate(([0], np.cumsum(hist != 0)))
+        outliers_end = min(2048, hist.size)
+        kl = np.empty(candidates.size)
+        magnitude = np.empty(candidates.size)
+        for block_start in range(0, candidates.size, block_size):
+            i = candidates[block_start : block_start + block_size, None]
+            k = np.arange(i.max())[None, :]
+            valid = (k < i) & (hist[np.minimum(k, hist.size - 1)] != 0)
+            num_merged_bins = i // num_quantized_bins
+            # quantized bin of each bin, the last quantized bin absorbs the remainder
+            chunk = np.where(
+                num_merged_bins > 0,
+                np.minimum(k // np.maximum(num_merged_bins, 1), num_quantized_bins - 1),
+                num_quantized_bins - 1,
+            )
+            chunk_start = chunk * num_merged_bins
+            chunk_end = np.where(chunk == num_quantized_bins - 1, i, chunk_start + num_merged_bins)
+            chunk_sum = cum_hist[chunk_end] - cum_hist[chunk_start]
+            chunk_nonzeros = cum_nonzeros[chunk_end] - cum_nonzeros[chunk_start]
+
+            outliers = np.where(i < outliers_end, cum_hist[outliers_end] - cum_hist[np.minimum(i, outliers_end)], 0)
+            p = np.where(valid, hist[np.minimum(k, hist.size - 1)], 0).astype(np.float64)
+            p += np.where(k == i - 1, outliers, 0)
+            q = np.where(valid, chunk_sum / np.maximum(chunk_nonzeros, 1), 0.0)
+            p_sum = (cum_hist[i] + outliers).astype(np.float64)
+            q_sum = q.sum(axis=1, keepdims=True)
+
+            safe_p = np.where(valid, p, 1.0)
+            safe_q = np.where(valid, q, 1.0)
+            log_p = np.log(q_sum * safe_p)
+            log_q = np.log(p_sum * safe_q)
+            block = slice(block_start, block_start + i.shape[0])
+            kl[block] = (np.where(valid, p * (log_p - log_q), 0.0).sum(axis=1)) / p_sum[:, 0]
+            magnitude[block] = (np.where(valid, p * (np.abs(log_p) + np.abs(log_q)), 0.0).sum(axis=1)) / p_sum[:, 0]
+        return kl, magnitude
+
+    def get_threshold(
+        self, hist, hist_edges, min_val, max_val, num_bins, quantized_type, num_quantized_bins=255, vectorized=True
+    ):
+        """The interface of getting threshold per op using KL divergency algorithm.
+
+        Args:
+            hist (np.ndarray): histogram counts.
+            hist_edges (np.ndarray): histogram bin edges.
+            min_val (float): minimum value of the tensor.
+            max_val (float): maximum value of the tensor.
+            num_bins (int): number of bins of the histogram.
+            quantized_type: quantized data type, unused.
+            num_quantized_bins (int, optional): number of quantized bins. Defaults to 255.
+            vectorized (bool, optional): evaluate all candidates with array operations instead of
+                Python loops. The candidates whose divergences are within rounding error of the
+                minimum are re-evaluated with the loop version, so both give the same threshold.
+                Defaults to True.
+
+        Returns:
+            float: the threshold.
+        """
+        starting_iter, ending_iter = self._get_search_range(hist, min_val, max_val, num_bins)
         bin_width = hist_edges[1] - hist_edges[0]
         min_kl_divergence = 0
         min_kl_index = 0
         kl_inited = False
 
-        for i in range(starting_iter, ending_iter + 1):
-            reference_distr_P = hist[0:i].tolist()
-            outliers_count = sum(hist[i:2048])
-            if reference_distr_P[i - 1] == 0:
+        if vectorized:
+            hist_array = np.asarray(hist)
+            candidates = np.arange(max(starting_iter, 1), ending_iter + 1)
+            candidates = candidates[hist_array[candidates - 1] != 0]
+            if candidates.size > 0:
+                kl, magnitude = self._kl_divergences(hist_array, candidates, num_quantized_bins)
+                # divergences differ from the loop version by rounding only, so re-evaluate
+                # the candidates that may tie with the minimum to pick the same one.
+                tolerance = 1e-9 * magnitude.max() + np.finfo(np.float64).tiny
+                candidates = candidates[kl <= kl.min() + tolerance]
+        else:
+            candidates = range(starting_iter, ending_iter + 1)
+
+        for i in candidates:
+            kl_divergence = self._kl_divergence(hist, int(i), num_quantized_bins)
+            if kl_divergence is None:
                 continue
-            reference_distr_P[i - 1] += outliers_count
-            reference_distr_bins = reference_distr_P[:]
-            candidate_distr_Q = hist[0:i].tolist()
-            num_merged_bins = int(i / num_quantized_bins)
-            candidate_distr_Q_quantized = [0] * num_quantized_bins
-            j_start = 0
-            j_end = num_merged_bins
-
-            for idx in range(num_quantized_bins):
-                candidate_distr_Q_quantized[idx] = sum(candidate_distr_Q[j_start:j_end])
-                j_start += num_merged_bins
-                j_end += num_merged_bins
-                if idx + 1 == num_quantized_bins - 1:
-                    j_end = i
-            candidate_distr_Q = self.expand_quantized_bins(candidate_distr_Q_quantized, reference_distr_bins)
-            P_sum = sum(reference_distr_P)
-            Q_sum = sum(candidate_distr_Q)
-            kl_divergence = self.safe_entropy(reference_distr_P, P_sum, candidate_distr_Q, Q_sum)
             if not kl_inited:
                 min_kl_divergence = kl_divergence
                 min_kl_index = i
@@ -35,6 +35,7 @@ torch_included_folder:
 """
 
 import copy
+import re
 import unittest
 
 from neural_compressor.common import Logger
@@ -45,6 +46,7 @@ from typing import Any, Callable, List, Optional, Tuple, Union
 
 from neural_compressor.common.base_config import (
     BaseConfig,
+    OpNameMatcher,
     config_registry,
     get_all_config_set_from_config_registry,
     register_config,
@@ -55,6 +57,7 @@ from neural_compressor.common.base_tuning import (
     ConfigSet,
     EvaluationFuncWrapper,
     Evaluator,
+    ParallelTrialRunner,
     SequentialSampler,
     TuningConfig,
     init_tuning,
@@ -320,6 +323,60 @@ class TestBaseConfig(unittest.TestCase):
         self.assertTrue(configs_mapping[("OP2_NAME", "OP_TYPE1")].weight_bits == 6)
         self.assertTrue(configs_mapping[("OP3_NAME", "OP_TYPE2")].weight_bits == 4)
 
+    def test_op_name_matcher(self):
+        patterns = [
+            "model.layers.1",
+            "model.layers.1.mlp.fc1",
+            ".*lm_head",
+            "model.layers.[0-3].attn",
+            "model.layers.1.mlp.fc1",
+            "model.layers.1x",
+            "model\\.layers\\.2",
+            "(?i)MODEL.layers.3",
+            "model.layers.4|model.embed",
+            "model.layers.5.mlp.fc1$",
+            "model.layerss?.6",
+        ]
+        op_names = [
+            "model.layers.1.mlp.fc1",
+            "model.layers.1.mlp.fc10",
+            "model.layers.1.attn",
+            "model.layers.10.attn",
+            "model.layers.1x",
+            "model_layers_1_mlp_fc1",
+            "model.layers.2.mlp",
+            "model_layers_2",
+            "model.layers.3.mlp",
+            "model.layers.4",
+            "model.embed_tokens",
+            "model.layers.5.mlp.fc1",
+            "model.layers.5.mlp.fc10",
+            "model.layerss.6",
+            "model.layer.6",
+            "model.lm_head",
+            "lm_head",
+            "model",
+            "",
+        ]
+        for i in range(len(patterns) + 1):
+            matcher = OpNameMatcher(patterns[:i])
+            for op_name in op_names:
+                expected = None
+                for pattern in patterns[:i]:
+                    if re.match(pattern, op_name):
+                        expected = pattern
+                for _ in range(2):
+                    self.assertEqual(matcher.match(op_name), expected, (patterns[:i], op_name))
+
+    def test_set_local_op_name_priority(self):
+        quant_config = FakeAlgoConfig(weight_bits=4)
+        quant_config.set_local("OP", FakeAlgoConfig(weight_bits=6))
+        quant_config.set_local(".*2_NAME", FakeAlgoConfig(weight_bits=8))
+        configs_mapping = quant_config.to_config_mapping(model_info=FAKE_MODEL_INFO)
+        self.assertTrue(configs_mapping[("OP1_NAME", "OP_TYPE1")].weight_bits == 6)
+        self.assertTrue(configs_mapping[("OP2_NAME", "OP_TYPE1")].weight_bits == 8)
+        self.assertTrue(configs_mapping[("OP3_NAME", "OP_TYPE2")].weight_bits == 6)
+
 
 class TestConfigSet(unittest.TestCase):
     def setUp(self):
@@ -424,5 +481,23 @@ class TestAutoTune(unittest.TestCase):
         self.assertIsNotNone(q_model)
 
 
+def fake_trial_fn(quant_config):
+    # module level to be picklable for the spawned workers
+    return {4: 0.8, 6: 0.99, 8: 0.95}[quant_config.weight_bits]
+
+
+class TestParallelTrialRunner(unittest.TestCase):
+    def test_spawn_workers(self):
+        self.assertTrue(ParallelTrialRunner.is_supported(start_method="spawn"))
+        config_set = [FakeAlgoConfig(weight_bits=4), FakeAlgoConfig(weight_bits=6), FakeAlgoConfig(weight_bits=8)]
+        tuning_config = TuningConfig(config_set=config_set, num_parallel_trials=2)
+        config_loader, tuning_logger, tuning_monitor = init_tuning(tuning_config=tuning_config)
+        tuning_monitor.set_baseline(1.0)
+        runner = ParallelTrialRunner(fake_trial_fn, num_parallel_trials=2, start_method="spawn")
+        # the results are recorded in order, the second trial meets the goal
+        self.assertEqual(runner.run(config_loader, tuning_logger, tuning_monitor), 2)
+        self.assertEqual(tuning_monitor.get_best_quant_config().weight_bits, 6)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,7 +10,7 @@ import tensorflow as tf
 from tensorflow import keras
 
 from neural_compressor.common import logger
-from neural_compressor.common.base_tuning import Evaluator, TuningConfig
+from neural_compressor.common.base_tuning import Evaluator, ParallelTrialRunner, TuningConfig
 from neural_compressor.tensorflow.quantization import SmoothQuantConfig, StaticQuantConfig, autotune
 from neural_compressor.tensorflow.utils import version1_gte_version2
 
@@ -102,6 +102,11 @@ class MyDataloader:
         return self.length
 
 
+def eval_const_fn(model) -> float:
+    # module level to be picklable for the spawned trial workers
+    return 1.0
+
+
 class TestAutoTune(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -189,6 +194,39 @@ class TestAutoTune(unittest.TestCase):
         op_names = [i.name for i in best_model.graph_def.node if i.op == "MatMul" and "_mul" in i.input[0]]
         self.assertTrue(len(op_names) > 0)
 
+    def test_static_quant_auto_tune_parallel(self):
+        calib_dataloader = MyDataloader(dataset=Dataset())
+        custom_tune_config = TuningConfig(
+            config_set=[
+                StaticQuantConfig(weight_sym=True, act_sym=True),
+                StaticQuantConfig(weight_sym=False, act_sym=False),
+            ],
+            num_parallel_trials=2,
+        )
+        best_model = autotune(
+            model="baseline_model",
+            tune_config=custom_tune_config,
+            eval_fn=eval_const_fn,
+            calib_dataloader=calib_dataloader,
+        )
+        self.assertIsNotNone(best_model)
+
+        # a local eval_fn can't be sent to the workers, the trials run one by one
+        acc_data = iter([1.0, 0.8, 0.99])
+
+        def eval_acc_fn(model) -> float:
+            return next(acc_data)
+
+        with patch.object(ParallelTrialRunner, "run") as mock_run:
+            best_model = autotune(
+                model="baseline_model",
+                tune_config=custom_tune_config,
+                eval_fn=eval_acc_fn,
+                calib_dataloader=calib_dataloader,
+            )
+        self.assertFalse(mock_run.called)
+        self.assertIsNotNone(best_model)
+
 
 if __name__ == "__main__":
     unittest.main()
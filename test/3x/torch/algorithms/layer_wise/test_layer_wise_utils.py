@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+
+import pytest
+import torch
+from safetensors.torch import save_file
+
+
+class TestCheckpointLoader:
+    def setup_class(self):
+        self.path = "./lwq_checkpoint_tmp"
+        self.tensors = {f"model.layers.{i}.weight": torch.randn(4, 4) for i in range(6)}
+
+    def teardown_class(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def save_shards(self, num_shards):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        names = list(self.tensors.keys())
+        weight_map = {}
+        for shard in range(num_shards):
+            file_name = f"model-{shard}.safetensors"
+            shard_names = names[shard::num_shards]
+            save_file({n: self.tensors[n] for n in shard_names}, os.path.join(self.path, file_name))
+            weight_map.update({n: file_name for n in shard_names})
+        with open(os.path.join(self.path, "model.safetensors.index.json"), "w") as f:
+            json.dump({"weight_map": weight_map}, f)
+
+    def test_sharded_safetensors(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import CheckpointLoader
+
+        self.save_shards(3)
+        loader = CheckpointLoader(self.path, max_open_files=2)
+        for _ in range(2):
+            for name, tensor in self.tensors.items():
+                assert torch.equal(loader.get_tensor(name), tensor)
+                # the prefix is stripped when the name is not in the index
+                assert torch.equal(loader.get_tensor("transformer." + name, prefix="transformer"), tensor)
+        assert len(loader._handles) == 2
+        with pytest.raises(AssertionError):
+            loader.get_tensor("model.layers.100.weight")
+
+    def test_cached_loader(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import close_checkpoint_loaders, get_checkpoint_loader
+
+        self.save_shards(3)
+        loader = get_checkpoint_loader(self.path)
+        for name, tensor in self.tensors.items():
+            assert torch.equal(loader.get_tensor(name), tensor)
+        assert get_checkpoint_loader(self.path) is loader
+        assert loader.num_opened_files == 3, "each shard should be opened only once."
+        # rewriting the checkpoint invalidates the cached loader
+        self.save_shards(2)
+        new_loader = get_checkpoint_loader(self.path)
+        assert new_loader is not loader
+        for name, tensor in self.tensors.items():
+            assert torch.equal(new_loader.get_tensor(name), tensor)
+        # closing drops the cached loader and its opened shards
+        close_checkpoint_loaders(self.path)
+        assert len(new_loader._handles) == 0
+        assert get_checkpoint_loader(self.path) is not new_loader
+        close_checkpoint_loaders()
+
+    def test_inplace_update(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import CheckpointLoader
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        save_file(self.tensors, os.path.join(self.path, "model.safetensors"))
+        loader = CheckpointLoader(self.path)
+        name = "model.layers.0.weight"
+        loader.get_tensor(name).mul_(0)
+        assert torch.equal(loader.get_tensor(name), self.tensors[name])
+        # only the tensor served twice maps the file again
+        for other_name in list(self.tensors.keys())[1:]:
+            loader.get_tensor(other_name)
+        assert loader.num_opened_files == 2
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_sharded_bin(self, use_mmap):
+        from neural_compressor.torch.algorithms.layer_wise.utils import CheckpointLoader
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        names = list(self.tensors.keys())
+        weight_map = {}
+        for shard in range(2):
+            file_name = f"pytorch_model-{shard}.bin"
+            # a transposed view checks that strides are kept
+            torch.save({n: self.tensors[n].t() for n in names[shard::2]}, os.path.join(self.path, file_name))
+            weight_map.update({n: file_name for n in names[shard::2]})
+        with open(os.path.join(self.path, "pytorch_model.bin.index.json"), "w") as f:
+            json.dump({"weight_map": weight_map}, f)
+        loader = CheckpointLoader(self.path, use_mmap=use_mmap)
+        for name, tensor in self.tensors.items():
+            value = loader.get_tensor(name)
+            assert torch.equal(value, tensor.t())
+            value.mul_(0)
+            assert torch.equal(loader.get_tensor(name), tensor.t())
+        if use_mmap:
+            assert loader.num_opened_files == 2, "each shard should be indexed only once."
+
+    def test_mmap_reader(self):
+        import mmap
+        from unittest import mock
+
+        from neural_compressor.torch.algorithms.layer_wise.load import MmapTensorReader
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        file_path = os.path.join(self.path, "pytorch_model.bin")
+        torch.save(self.tensors, file_path)
+        reader = MmapTensorReader(file_path)
+        with mock.patch("mmap.mmap", side_effect=mmap.mmap) as mock_mmap:
+            values = {name: reader.get_tensor(name) for name in self.tensors}
+            assert mock_mmap.call_count == 1, "the file should be mapped once per reader."
+            for name, tensor in self.tensors.items():
+                assert torch.equal(values[name], tensor)
+                values[name].mul_(0)
+                # a tensor loaded again doesn't see the in-place update of the first load
+                assert torch.equal(reader.get_tensor(name), tensor)
+        reader.close()
+        assert torch.equal(values[name], torch.zeros_like(tensor)), "loaded tensors outlive the reader."
+
+    def test_evict_handle_in_use(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import CheckpointLoader
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        names = list(self.tensors.keys())
+        weight_map = {}
+        for shard in range(2):
+            file_name = f"pytorch_model-{shard}.bin"
+            torch.save({n: self.tensors[n] for n in names[shard::2]}, os.path.join(self.path, file_name))
+            weight_map.update({n: file_name for n in names[shard::2]})
+        with open(os.path.join(self.path, "pytorch_model.bin.index.json"), "w") as f:
+            json.dump({"weight_map": weight_map}, f)
+        loader = CheckpointLoader(self.path, max_open_files=1)
+        with loader._use_handle(os.path.join(self.path, "pytorch_model-0.bin")) as reader:
+            # another thread opens the other shard and evicts the handle in use
+            assert torch.equal(loader.get_tensor(names[1]), self.tensors[names[1]])
+            assert not reader._file.closed
+            assert torch.equal(reader.get_tensor(names[0]), self.tensors[names[0]])
+        assert reader._file.closed, "the evicted handle should be closed by its last user."
+        assert not loader._handle_users and not loader._retired_handles
+
+
+class TinyModel(torch.nn.Module):
+    base_model_prefix = "model"
+
+    def __init__(self):
+        super().__init__()
+        self.layers = torch.nn.ModuleList([torch.nn.Linear(32, 32) for _ in range(4)])
+
+    def forward(self, x):
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+
+class TestWeightPrefetcher:
+    def setup_class(self):
+        self.path = "./lwq_prefetch_tmp"
+        os.makedirs(self.path, exist_ok=True)
+        self.model = TinyModel()
+        save_file(self.model.state_dict(), os.path.join(self.path, "model.safetensors"))
+
+    def teardown_class(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def test_prefetch_order(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import WeightPrefetcher
+
+        names = [f"layers.{i}" for i in range(4)]
+        prefetcher = WeightPrefetcher(self.model, self.path, names, depth=2)
+        # request the first three modules repeatedly, the prefetcher learns to wrap around
+        for _ in range(3):
+            for name in names[:3]:
+                values = prefetcher.get(name)
+                assert torch.equal(values["weight"], self.model.get_submodule(name).weight)
+                assert len(prefetcher._futures) <= 2
+        assert list(prefetcher._futures.keys()) == ["layers.0", "layers.1"]
+        prefetcher.invalidate("layers.0")
+        assert list(prefetcher._futures.keys()) == ["layers.1"]
+        prefetcher.close()
+
+    def test_rtn_with_prefetch(self):
+        from neural_compressor.torch.algorithms.layer_wise.utils import LWQ_WORKSPACE
+        from neural_compressor.torch.algorithms.weight_only.rtn import RTNQuantizer
+
+        weight_config = {
+            f"layers.{i}": {
+                "dtype": "int",
+                "bits": 4,
+                "scheme": "sym",
+                "group_size": 32,
+                "group_dim": 1,
+                "use_full_range": False,
+                "use_mse_search": False,
+                "use_double_quant": False,
+                "double_quant_dtype": "int",
+                "double_quant_bits": 8,
+                "double_quant_scheme": "sym",
+                "double_quant_group_size": 256,
+            }
+            for i in range(4)
+        }
+        inp = torch.randn(2, 32)
+        outputs = []
+        # RTN loads from the checkpoint only, a module copy left in the workspace is ignored
+        os.makedirs(LWQ_WORKSPACE, exist_ok=True)
+        stale_path = os.path.join(LWQ_WORKSPACE, "layers.0.pt")
+        torch.save({"weight": torch.zeros(32, 32), "bias": torch.zeros(32)}, stale_path)
+        try:
+            for prefetch_depth in [0, 2]:
+                model = TinyModel().to("meta")
+                model = RTNQuantizer(quant_config=weight_config).convert(
+                    model, use_layer_wise=True, model_path=self.path, prefetch_depth=prefetch_depth, device="cpu"
+                )
+                outputs.append(model(inp))
+        finally:
+            os.remove(stale_path)
+        assert torch.equal(outputs[0], outputs[1])
@@ -50,3 +50,65 @@ class TestWeightOnlyLinear:
         new_module.pack(int_weight, scale, zp, m.bias)
         unpacked_int_weight = new_module.unpack_tensor(new_module.qweight)
         assert torch.equal(unpacked_int_weight, int_weight)
+
+    @pytest.mark.parametrize("bits", [2, 4, 8])
+    @pytest.mark.parametrize("group_size", [32, -1])
+    @pytest.mark.parametrize(
+        "use_optimum_format, compression_dim, zp",
+        [(True, 1, True), (True, 1, False), (False, 1, True), (False, 1, False), (False, 0, True), (False, 0, False)],
+    )
+    def test_fused_dequant_forward(self, bits, group_size, use_optimum_format, compression_dim, zp):
+        m = torch.nn.Linear(96, 40)
+        weight = m.weight.detach()
+        int_weight, scale, zero_point = quant_tensor(
+            weight,
+            dtype="int",
+            bits=bits,
+            return_int=True,
+            group_size=group_size,
+            scheme="asym" if zp else "sym",
+        )
+        kwargs = dict(
+            dtype="int",
+            bits=bits,
+            group_size=group_size,
+            zp=zero_point is not None,
+            bias=True,
+            use_optimum_format=use_optimum_format,
+            compression_dim=compression_dim,
+        )
+        cached_module = INCWeightOnlyLinear(m.in_features, m.out_features, **kwargs)
+        # pack may update zero point in place
+        cached_module.pack(int_weight, scale, copy.deepcopy(zero_point), m.bias)
+        fused_module = INCWeightOnlyLinear(
+            m.in_features, m.out_features, cache_weight=False, dequant_tile_size=16, **kwargs
+        )
+        fused_module.pack(int_weight, scale, copy.deepcopy(zero_point), m.bias)
+        inp = torch.randn(2, 3, m.in_features)
+        out_cached = cached_module(inp)
+        out_fused = fused_module(inp)
+        assert not hasattr(fused_module, "weight"), "fused dequantization should not cache the weight."
+        assert torch.allclose(out_cached, out_fused, atol=1e-5)
+        assert torch.equal(fused_module.dequantize_tile(0, m.out_features).float(), cached_module.recover().float())
+        # the fused forward doesn't write g_idx
+        assert fused_module.g_idx is None
+
+    def test_fused_dequant_forward_with_g_idx(self):
+        m = torch.nn.Linear(96, 40)
+        int_weight, scale, zero_point = quant_tensor(
+            m.weight.detach(), dtype="int", bits=4, return_int=True, group_size=32, scheme="asym"
+        )
+        g_idx = torch.randperm(m.in_features) // 32
+        kwargs = dict(bits=4, group_size=32, zp=True, bias=True, g_idx=True, use_optimum_format=False)
+        cached_module = INCWeightOnlyLinear(m.in_features, m.out_features, **kwargs)
+        cached_module.pack(int_weight, scale, copy.deepcopy(zero_point), m.bias, g_idx)
+        fused_module = INCWeightOnlyLinear(m.in_features, m.out_features, cache_weight=False, **kwargs)
+        fused_module.pack(int_weight, scale, copy.deepcopy(zero_point), m.bias, g_idx)
+        inp = torch.randn(4, m.in_features)
+        assert torch.allclose(cached_module(inp), fused_module(inp), atol=1e-5)
+        tiles, group_index = fused_module._get_dequant_plan()
+        assert tiles == [(0, m.out_features)]
+        assert torch.equal(group_index, g_idx)
+        # the plan is rebuilt when g_idx changes
+        fused_module.g_idx.copy_(torch.arange(m.in_features) // 32)
+        assert fused_module._get_dequant_plan()[1] is None
@@ -1,9 +1,10 @@
 import copy
+import shutil
 
 import pytest
 import torch
 
-from neural_compressor.torch.quantization import MXQuantConfig, convert, get_default_mx_config, prepare
+from neural_compressor.torch.quantization import MXQuantConfig, convert, get_default_mx_config, load, prepare
 
 
 def build_simple_torch_model():
@@ -35,7 +36,7 @@ class TestMXQuant:
         self.input = torch.randn(1, 30)
 
     def teardown_class(self):
-        pass
+        shutil.rmtree("saved_results", ignore_errors=True)
 
     def test_mx_quant_default(self):
         fp32_model = copy.deepcopy(self.fp32_model)
@@ -95,3 +96,46 @@ class TestMXQuant:
         output2 = q_model(example_inputs)
         # set a big atol to avoid random issue
         assert torch.allclose(output1, output2, atol=2e-2), "Accuracy gap atol > 0.02 is unexpected. Please check."
+
+    @pytest.mark.parametrize(
+        "w_dtype, weight_only, out_dtype",
+        [
+            ("int8", True, "float32"),
+            ("int4", False, "float32"),
+            ("int2", True, "bfloat16"),
+            ("fp8_e4m3", False, "float16"),
+            ("fp6_e3m2", True, "float32"),
+            ("fp4", True, "float32"),
+        ],
+    )
+    def test_mx_quant_pack_weight(self, w_dtype, weight_only, out_dtype):
+        fp32_model = copy.deepcopy(self.fp32_model)
+        quant_config = MXQuantConfig(w_dtype=w_dtype, weight_only=weight_only, out_dtype=out_dtype)
+        q_model = convert(prepare(model=fp32_model, quant_config=quant_config))
+        out1 = q_model(self.input)
+
+        fp32_model = copy.deepcopy(self.fp32_model)
+        quant_config = MXQuantConfig(w_dtype=w_dtype, weight_only=weight_only, out_dtype=out_dtype, pack_weight=True)
+        packed_model = convert(prepare(model=fp32_model, quant_config=quant_config))
+        assert packed_model.fc1.packed and not hasattr(packed_model.fc1, "weight"), "The weight should be packed."
+        assert packed_model.fc1.packed_weight.dtype == torch.uint8
+        out2 = packed_model(self.input)
+        assert torch.allclose(out1, out2, atol=1e-5), "The packed weight should give the same output."
+
+        def state_dict_bytes(model):
+            return sum(t.numel() * t.element_size() for t in model.state_dict().values())
+
+        assert state_dict_bytes(packed_model) < state_dict_bytes(q_model) / 2
+
+    @pytest.mark.parametrize("pack_weight", [True, False])
+    def test_mx_quant_save_load(self, pack_weight):
+        fp32_model = copy.deepcopy(self.fp32_model)
+        quant_config = MXQuantConfig(w_dtype="fp4", pack_weight=pack_weight)
+        q_model = convert(prepare(model=fp32_model, quant_config=quant_config))
+        out1 = q_model(self.input)
+        q_model.save("saved_results")
+
+        loaded_model = load("saved_results", copy.deepcopy(self.fp32_model))
+        assert loaded_model.fc1.packed == pack_weight
+        out2 = loaded_model(self.input)
+        assert torch.equal(out1, out2), "Loaded model should give the same output."
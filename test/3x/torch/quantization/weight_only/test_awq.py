@@ -174,6 +174,21 @@ class TestAWQQuant:
             id(model.model.decoder.embed_tokens.weight) == lm_head_id
         ), "The tied lm_head weight is not deep copied, please check!"
 
+    def test_activation_window(self):
+        model = prepare(copy.deepcopy(self.tiny_gptj), AWQConfig(), example_inputs=self.example_inputs)
+        calib_func(model)
+        model = convert(model)
+        out = model(self.example_inputs)[0]
+        # spill the block inputs and outputs to the workspace, keep one batch in memory
+        model = prepare(
+            copy.deepcopy(self.tiny_gptj), AWQConfig(activation_window=1), example_inputs=self.example_inputs
+        )
+        calib_func(model)
+        model = convert(model)
+        assert torch.allclose(
+            model(self.example_inputs)[0], out, atol=1e-6
+        ), "activation_window should not change the results."
+
     def test_awq_absorb_to_layer(self):
         absorb_layer_dict = {
             "ln_1": (
@@ -347,3 +347,122 @@ class TestGPTQQuant:
         assert (
             get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
         ), "Incorrect number of INCWeightOnlyLinear modules"
+
+    def test_shared_hessian(self):
+        from neural_compressor.torch.algorithms.weight_only.gptq import GPTQ, HessianSharingTracker
+
+        class Block(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.q = torch.nn.Linear(8, 8)
+                self.k = torch.nn.Linear(8, 8)
+                self.v = torch.nn.Linear(8, 8)
+                self.o = torch.nn.Linear(8, 8)
+
+            def forward(self, x, split=False):
+                # v consumes a different input once split
+                out = self.q(x) + self.k(x) + self.v(x * 2 if split else x)
+                return self.o(out) + self.o(x)
+
+        block = Block()
+        separate = {n: GPTQ(m, m.weight.data) for n, m in block.named_children()}
+        shared = {n: GPTQ(m, m.weight.data) for n, m in block.named_children()}
+        tracker = HessianSharingTracker(shared)
+        handles = []
+        for n, m in block.named_children():
+            handles.append(m.register_forward_hook(lambda _, inp, out, n=n: separate[n].add_batch(inp[0], out)))
+            handles.append(m.register_forward_hook(tracker.hook(n)))
+        for split in [False, False, True, False]:
+            block(torch.randn(2, 4, 8), split=split)
+            tracker.update()
+        for h in handles:
+            h.remove()
+        # q and k consumed the same input in all batches, v is split from them in the third batch
+        assert shared["q"].H is shared["k"].H and shared["q"].H is not shared["v"].H
+        assert shared["o"].hinv_cache is None
+        for n in separate:
+            assert shared[n].nsamples == separate[n].nsamples
+            assert torch.allclose(shared[n].H, separate[n].H)
+        W = block.q.weight.data.clone()
+        weight_config = {
+            "dtype": "int",
+            "bits": 4,
+            "sym": True,
+            "group_size": -1,
+            "perchannel": True,
+            "mse": False,
+            "use_double_quant": False,
+            "double_quant_sym": True,
+        }
+        for n in ["q", "k"]:
+            shared[n].quantizer.configure(weight_config)
+            separate[n].quantizer.configure(weight_config)
+            assert torch.equal(shared[n].fasterquant(W.clone())[2], separate[n].fasterquant(W.clone())[2])
+        assert len(shared["k"].hinv_cache) == 1
+
+    def test_num_workers(self):
+        model = copy.deepcopy(self.tiny_gptj)
+        model = prepare(model, GPTQConfig())
+        run_fn(model)
+        model = convert(model)
+        out = model(self.example_inputs)[0]
+        # the workers keep the intra-op threads of the serial run by default, the results are bit-identical
+        model = copy.deepcopy(self.tiny_gptj)
+        quant_config = GPTQConfig(num_workers=2)
+        model = prepare(model, quant_config)
+        run_fn(model)
+        model = convert(model)
+        assert torch.equal(model(self.example_inputs)[0], out), "num_workers should not change the results."
+
+    def test_micro_batch_tuple_inputs(self):
+        from neural_compressor.torch.algorithms.weight_only.gptq import RAWGPTQuantizer
+
+        quantizer = RAWGPTQuantizer(copy.deepcopy(self.tiny_gptj), micro_batch_size=3)
+        hidden_states = [torch.randn(1, 4, 8) for _ in range(4)] + [torch.randn(1, 5, 8)]
+        position_embeddings = [(torch.randn(1, 4, 8), torch.randn(1, 4, 8)) for _ in range(4)]
+        position_embeddings.append((torch.randn(1, 5, 8), torch.randn(1, 5, 8)))
+        quantizer.cache_positional_arguments = [hidden_states]
+        quantizer.cache_key_arguments = {"position_embeddings": position_embeddings, "use_cache": [False] * 5}
+        micro_batches = list(quantizer.gather_micro_batches(5))
+        # the (cos, sin) tuples are concatenated like hidden_states
+        assert [indices for indices, _, _, _ in micro_batches] == [[0, 1, 2], [3], [4]]
+        _, sizes, positional_batch, keyword_batch = micro_batches[0]
+        assert sizes == [1, 1, 1] and positional_batch[0].shape == (3, 4, 8)
+        cos, sin = keyword_batch["position_embeddings"]
+        assert torch.equal(cos, torch.cat([position_embeddings[i][0] for i in range(3)]))
+        assert torch.equal(sin, torch.cat([position_embeddings[i][1] for i in range(3)]))
+        assert keyword_batch["use_cache"] is False
+
+    def test_activation_window(self):
+        model = copy.deepcopy(self.tiny_gptj)
+        model = prepare(model, GPTQConfig())
+        run_fn(model)
+        model = convert(model)
+        out = model(self.example_inputs)[0]
+        # spill the block inputs to the workspace, keep one batch in memory
+        model = copy.deepcopy(self.tiny_gptj)
+        model = prepare(model, GPTQConfig(activation_window=1))
+        run_fn(model)
+        model = convert(model)
+        assert torch.equal(model(self.example_inputs)[0], out), "activation_window should not change the results."
+
+    def test_micro_batch_size(self):
+        def run_fn_multi_batches(model):
+            for i in range(4):
+                model(torch.tensor([[10 + i, 20, 30]], dtype=torch.long).to(device))
+            # a batch of another sequence length runs alone
+            model(torch.tensor([[10, 20]], dtype=torch.long).to(device))
+
+        model = copy.deepcopy(self.tiny_gptj)
+        model = prepare(model, GPTQConfig())
+        run_fn_multi_batches(model)
+        model = convert(model)
+        out = model(self.example_inputs)[0]
+        model = copy.deepcopy(self.tiny_gptj)
+        model = prepare(model, GPTQConfig(micro_batch_size=3))
+        run_fn_multi_batches(model)
+        model = convert(model)
+        # the Hessians only differ in float rounding, which may flip a few rounding decisions
+        assert torch.allclose(
+            model(self.example_inputs)[0], out, atol=0.01
+        ), "micro_batch_size should not change the results."
@@ -259,3 +259,28 @@ class TestHQQ:
         new_hqq_linear.load_state_dict(reload_state_dict)
         out = new_hqq_linear(input)
         assert torch.equal(out_ref, out), f"out_ref: {out_ref}, out: {out}"
+
+    @pytest.mark.parametrize("nbits", [8, 4, 3, 2])
+    def test_hqq_linear_tiled_forward(self, nbits, monkeypatch):
+        from neural_compressor.torch.algorithms.weight_only.hqq.core import HQQTensorHandle
+
+        monkeypatch.setattr(hqq_global_option, "use_half", False)
+        weight_qconfig = QTensorConfig(nbits=nbits, channel_wise=True, group_size=64, optimize=True)
+        scale_qconfig = QTensorConfig(nbits=8, channel_wise=True, group_size=128, optimize=False)
+        zero_qconfig = QTensorConfig(nbits=8, channel_wise=False, group_size=None, optimize=False)
+        hqq_quant_config = HQQModuleConfig(weight=weight_qconfig, scale=scale_qconfig, zero=zero_qconfig)
+        hqq_linear = HQQLinear.from_float(torch.nn.Linear(64, 128), quant_config=hqq_quant_config)
+        input = torch.randn(2, 4, 64)
+        out_ref = torch.matmul(input, hqq_linear.dequantize_weight().t()) + hqq_linear.bias
+        # dequantize a few rows at a time
+        monkeypatch.setattr(HQQTensorHandle, "DEQUANT_TILE_NUMEL", 256)
+        out = hqq_linear(input)
+        assert torch.allclose(out, out_ref, atol=1e-5)
+        assert torch.equal(hqq_linear(input), out)
+        # the forward keeps the quantized scale and zero
+        assert hqq_linear.q_weight.is_scale_quantized() and hqq_linear.q_weight.is_zero_quantized()
+        assert hqq_linear.state_dict()["scale_quantized"] and hqq_linear.state_dict()["zero_quantized"]
+        # cache the dequantized weight
+        monkeypatch.setattr(hqq_global_option, "weight_cache_mb", 1)
+        assert torch.allclose(hqq_linear(input), out_ref, atol=1e-5)
+        assert torch.allclose(hqq_linear(input), out_ref, atol=1e-5)
@@ -368,6 +368,27 @@ class TestRTNQuant:
             get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
         ), "Incorrect number of INCWeightOnlyLinear modules"
 
+    def test_cache_weight(self):
+        from neural_compressor.torch.algorithms.weight_only.modules import INCWeightOnlyLinear
+        from neural_compressor.torch.quantization import load
+
+        fp32_model = copy.deepcopy(self.tiny_gptj)
+        quant_config = RTNConfig(cache_weight=False)
+        q_model = quantize(fp32_model, quant_config=quant_config)
+        woq_linears = [m for m in q_model.modules() if isinstance(m, INCWeightOnlyLinear)]
+        assert woq_linears and not any(m.cache_weight for m in woq_linears), "cache_weight should reach the modules."
+        out = q_model(self.example_inputs)[0]
+        assert torch.allclose(out, self.q_label, atol=1e-5), "cache_weight shouldn't change the result."
+        assert not any(hasattr(m, "weight") for m in woq_linears), "The dequantized weight shouldn't be cached."
+        q_model.save("saved_results")
+
+        # the saved config is used by default and can be overridden
+        loaded_model = load("saved_results", copy.deepcopy(self.tiny_gptj))
+        assert not any(m.cache_weight for m in loaded_model.modules() if isinstance(m, INCWeightOnlyLinear))
+        loaded_model = load("saved_results", copy.deepcopy(self.tiny_gptj), cache_weight=True)
+        assert all(m.cache_weight for m in loaded_model.modules() if isinstance(m, INCWeightOnlyLinear))
+        assert torch.allclose(loaded_model(self.example_inputs)[0], out, atol=1e-5)
+
     @pytest.mark.skipif(not is_hpex_available(), reason="no hpex in environment here.")
     def test_save_and_load_hpu(self):
         from neural_compressor.torch.quantization import load
@@ -447,5 +447,135 @@ class TestAutoTune(unittest.TestCase):
         self.assertTrue(isinstance(best_model.fc3, HalfPrecisionModuleWrapper))
 
 
+class TestTrialCache(unittest.TestCase):
+    def test_autotune_keep_best_model(self):
+        inc_utils.FUNC_CALL_COUNTS.clear()
+        acc_list = [1, 0.9, 0.8]
+
+        def eval_acc_fn(model) -> float:
+            return acc_list.pop(0)
+
+        model = build_simple_torch_model()
+        state_dict = {k: v.clone() for k, v in model.state_dict().items()}
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6])], max_trials=2)
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn, keep_best_model=True)
+        self.assertEqual(inc_utils.FUNC_CALL_COUNTS.get("quantize"), 2)
+        self.assertEqual(best_model.fc1.bits, 4)
+        # RTN updates weights in place, the float model should not be written by the trials
+        for k, v in model.state_dict().items():
+            self.assertTrue(torch.equal(v, state_dict[k]))
+        # the returned model doesn't share memory with the float model
+        float_ptrs = {v.data_ptr() for v in model.state_dict().values()}
+        self.assertFalse(float_ptrs & {v.data_ptr() for v in best_model.state_dict().values()})
+
+        input = torch.randn(1, 30)
+        acc_list.extend([1, 0.9, 0.8])
+        requant_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn)
+        output = best_model(input)
+        self.assertTrue(torch.equal(output, requant_model(input)))
+        with torch.no_grad():
+            for v in model.state_dict().values():
+                v.zero_()
+        self.assertTrue(torch.equal(output, best_model(input)))
+        self.assertTrue(torch.equal(output, requant_model(input)))
+
+    def test_calibration_cache(self):
+        from torch.ao.quantization.observer import MinMaxObserver
+
+        from neural_compressor.torch.algorithms.base_algorithm import CalibrationCache, Quantizer
+
+        class ObserverQuantizer(Quantizer):
+            support_calib_cache = True
+
+            def prepare(self, model, *args, **kwargs):
+                for module in model.modules():
+                    if isinstance(module, torch.nn.Linear):
+                        module.activation_post_process = MinMaxObserver()
+                        module.register_forward_pre_hook(lambda m, input: m.activation_post_process(input[0]))
+                return model
+
+            def convert(self, model, *args, **kwargs):
+                for module in model.modules():
+                    if isinstance(module, torch.nn.Linear):
+                        module.act_scale = module.activation_post_process.calculate_qparams()[0]
+                return model
+
+        calib_count = [0]
+
+        def run_fn(model):
+            calib_count[0] += 1
+            torch.manual_seed(0)
+            model(torch.randn(4, 30))
+
+        calib_cache = CalibrationCache()
+        with calib_cache.activate():
+            q_model1 = ObserverQuantizer().quantize(build_simple_torch_model(), run_fn=run_fn)
+            q_model2 = ObserverQuantizer().quantize(build_simple_torch_model(), run_fn=run_fn)
+        self.assertEqual(calib_count[0], 1)
+        self.assertEqual(calib_cache.hits, 1)
+        self.assertTrue(torch.equal(q_model1.fc1.act_scale, q_model2.fc1.act_scale))
+        # the cache is only used when activated
+        ObserverQuantizer().quantize(build_simple_torch_model(), run_fn=run_fn)
+        self.assertEqual(calib_count[0], 2)
+
+    def test_autotune_parallel_trials(self):
+        acc_map = {8: 1.0, 4: 0.8, 6: 0.95, 5: 0.99, 7: 0.9}
+
+        def eval_acc_fn(model) -> float:
+            # the accuracy only depends on the config, the trials run in the forked workers
+            return acc_map[model.fc1.bits] if hasattr(model.fc1, "bits") else 1.0
+
+        tune_configs = [
+            TuningConfig(config_set=[RTNConfig(bits=[4, 6, 5, 7])], max_trials=4, num_parallel_trials=n)
+            for n in [1, 2, 3]
+        ]
+        best_bits = []
+        for tune_config in tune_configs:
+            best_model = autotune(model=build_simple_torch_model(), tune_config=tune_config, eval_fn=eval_acc_fn)
+            self.assertIsNotNone(best_model)
+            best_bits.append(best_model.fc1.bits)
+        # the third trial meets the goal, the same best config as running the trials one by one
+        self.assertEqual(best_bits, [5, 5, 5])
+
+        # all trials are tried without meeting the goal
+        tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6])], max_trials=4, num_parallel_trials=2)
+        self.assertIsNone(autotune(model=build_simple_torch_model(), tune_config=tune_config, eval_fn=eval_acc_fn))
+
+    def test_autotune_parallel_trials_fallback(self):
+        import sys
+        import types
+
+        from neural_compressor.common.base_tuning import ParallelTrialRunner
+
+        acc_map = {8: 1.0, 4: 0.8, 6: 0.95, 5: 0.99, 7: 0.9}
+
+        def eval_acc_fn(model) -> float:
+            return acc_map[model.fc1.bits] if hasattr(model.fc1, "bits") else 1.0
+
+        def tune(model):
+            tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6, 5, 7])], max_trials=4, num_parallel_trials=2)
+            with patch.object(ParallelTrialRunner, "run") as mock_run:
+                best_model = autotune(model=model, tune_config=tune_config, eval_fn=eval_acc_fn)
+            self.assertFalse(mock_run.called)
+            # the trials run one by one with the same best config
+            self.assertEqual(best_model.fc1.bits, 5)
+
+        # TensorFlow is loaded
+        with patch.dict(sys.modules, {"tensorflow": types.ModuleType("tensorflow")}):
+            self.assertFalse(ParallelTrialRunner.is_supported())
+            tune(build_simple_torch_model())
+        # an accelerator runtime is initialized
+        with patch.object(torch.cuda, "is_initialized", return_value=True):
+            self.assertFalse(ParallelTrialRunner.is_supported())
+            tune(build_simple_torch_model())
+        # a model tensor is not on CPU
+        from neural_compressor.torch.quantization.autotune import _can_fork_trials
+
+        model = build_simple_torch_model()
+        self.assertTrue(_can_fork_trials(model))
+        model.register_buffer("meta_buffer", torch.empty(1, device="meta"))
+        self.assertFalse(_can_fork_trials(model))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -139,6 +139,94 @@ class TestAugment(unittest.TestCase):
         calib_params = augment.dump_calibration({})
         self.assertTrue("A" in calib_params and "B" in calib_params and "D" in calib_params and "C" in calib_params)
 
+    def test_streaming_histogram_calibration(self):
+        from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR
+
+        model, dataloader = self.cv_session
+        augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"])
+        augment.augment_graph()
+        outputs = augment.get_activation_tensors_calib_range()
+        q_config = {
+            "conv": {"activation": {"algorithm": "kl"}},
+            "relu": {"activation": {"algorithm": "percentile"}},
+        }
+        calib_range = augment.get_activation_tensors_calib_range(q_config)
+        for tensor_name, calib_method in [("C", "kl"), ("D", "percentile")]:
+            calibrator = CALIBRATOR[calib_method]()
+            for output in outputs[tensor_name]:
+                calibrator.collect(output)
+            self.assertEqual(calib_range[tensor_name], [list(calibrator.calib_range)])
+            self.assertEqual(len(outputs[tensor_name]), 3)
+
+        augment.num_workers = 2
+        self.assertEqual(augment.get_activation_tensors_calib_range(q_config), calib_range)
+
+    def test_histogram_merge_bins(self):
+        from neural_compressor.adaptor.ox_utils.calibrator import HistogramCollector
+
+        data = np.clip(np.random.randn(1000), -2.9, 2.9)
+        for num_bins in [200, 201]:
+            hist, hist_edges = np.histogram(data, num_bins, range=(-3.0, 3.0))
+            merged = HistogramCollector.merge_bins((hist, hist_edges, data.min(), data.max(), 3.0), 64)
+            self.assertLessEqual(len(merged[0]), 64)
+            expected, _ = np.histogram(data, len(merged[0]), range=(-merged[4], merged[4]))
+            np.testing.assert_array_equal(merged[0], expected)
+
+        collector = HistogramCollector(num_bins=16, max_bins=64)
+        for scale in [1, 10, 100, 1000]:
+            collector.collect_data(np.random.randn(100).astype(np.float32) * scale)
+        self.assertLessEqual(len(collector.histogram[0]), 64)
+        self.assertEqual(collector.histogram[0].sum(), 400)
+
+    def test_streaming_histogram_range(self):
+        from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR
+
+        rng = np.random.default_rng(0)
+        batches = [rng.standard_normal((16, 64)).astype(np.float32) * 2**i for i in range(6)]
+        for calib_method, kwargs in [("kl", {}), ("percentile", {}), ("percentile", {"percentile": 99.9})]:
+            expected = CALIBRATOR[calib_method](**kwargs)
+            expected.collect(batches)
+            calibrator = CALIBRATOR[calib_method](**kwargs)
+            for batch in batches:
+                calibrator.collect(batch)
+            # the ranges are computed on the same bins as the histogram of all the data
+            histogram = calibrator.collector.calib_histogram
+            np.testing.assert_array_equal(histogram[1], expected.collector.histogram[1])
+            self.assertEqual(histogram[0].sum(), expected.collector.histogram[0].sum())
+            bin_width = histogram[1][1] - histogram[1][0]
+            np.testing.assert_allclose(calibrator.calib_range, expected.calib_range, rtol=0, atol=bin_width)
+        # the default kl calibrator keeps the whole data range
+        calibrator = CALIBRATOR["kl"]()
+        for batch in batches:
+            calibrator.collect(batch)
+        self.assertEqual(calibrator.calib_range, (min(x.min() for x in batches), max(x.max() for x in batches)))
+
+    def test_calibration_num_workers_recipe(self):
+        from unittest.mock import patch
+
+        from neural_compressor import PostTrainingQuantConfig, quantization
+        from neural_compressor.adaptor.ox_utils import calibration
+
+        model, dataloader = self.cv_session
+        op_type_dict = {"Conv": {"activation": {"algorithm": ["kl"]}}, "Relu": {"activation": {"algorithm": ["kl"]}}}
+        scales = []
+        for num_workers in [1, 2]:
+            config = PostTrainingQuantConfig(
+                approach="static", op_type_dict=op_type_dict, recipes={"calibration_args": {"num_workers": num_workers}}
+            )
+            with patch.object(
+                calibration, "compute_calib_ranges", wraps=calibration.compute_calib_ranges
+            ) as compute_calib_ranges:
+                q_model = quantization.fit(model, config, calib_dataloader=dataloader)
+            self.assertEqual(compute_calib_ranges.call_args[0][1], num_workers)
+            scales.append(
+                {init.name: numpy_helper.to_array(init) for init in q_model.initializer() if "scale" in init.name}
+            )
+        self.assertTrue(len(scales[0]) > 0)
+        self.assertEqual(scales[0].keys(), scales[1].keys())
+        for name in scales[0]:
+            np.testing.assert_array_equal(scales[0][name], scales[1][name])
+
     def test_augment_graph(self):
         """TEST_CONFIG_1."""
 
@@ -3,6 +3,7 @@ import os
 import shutil
 import subprocess
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 import onnx
@@ -500,6 +501,65 @@ class TestWeightOnlyAdaptor(unittest.TestCase):
             for q, org in zip(q_out, org_out):
                 self.assertTrue((np.abs(q_out[0] - org_out[0]) < 0.5).all())
 
+    def test_rtn_quantize_with_external_data(self):
+        from neural_compressor.model.onnx_model import ONNXModel
+
+        os.makedirs("gptj_external", exist_ok=True)
+        onnx.save_model(
+            copy.deepcopy(self.gptj_model),
+            "gptj_external/decoder_model.onnx",
+            save_as_external_data=True,
+            location="decoder_model.onnx_data",
+            size_threshold=1024,
+        )
+        model = ONNXModel("gptj_external/decoder_model.onnx", load_external_data=False)
+        q_model = rtn_quantize(model, num_workers=2, external_data_location="quantized.onnx_data")
+        self.assertTrue(q_model.is_large_model)
+        self.assertTrue(os.path.getsize("gptj_external/quantized.onnx_data") > 0)
+        onnx.save_model(q_model.model, "gptj_external/quantized.onnx")
+
+        ref_model = rtn_quantize(copy.deepcopy(self.gptj_model))
+        for data, _ in self.gptj_dataloader:
+            sess = ort.InferenceSession("gptj_external/quantized.onnx", providers=["CPUExecutionProvider"])
+            q_out = sess.run(None, data)
+            ref_out = Inference(ref_model.model, data)
+            np.testing.assert_array_equal(q_out[0], ref_out[0])
+
+        # the same arguments through the adaptor
+        conf = PostTrainingQuantConfig(
+            approach="weight_only",
+            recipes={"rtn_args": {"num_workers": 2, "external_data_location": "fit_quantized.onnx_data"}},
+        )
+        q_model = quantization.fit("gptj_external/decoder_model.onnx", conf, calib_dataloader=self.gptj_dataloader)
+        # the file is relative to the model quantized by the adaptor
+        data_path = os.path.join(os.path.dirname(q_model.model_path), "fit_quantized.onnx_data")
+        self.assertTrue(os.path.getsize(data_path) > 0)
+        shutil.rmtree("gptj_external", ignore_errors=True)
+
+    @patch("neural_compressor.adaptor.ox_utils.weight_only.ort.__version__", "1.16.0")
+    def test_rtn_quantize_with_external_data_matmul_fpq4(self):
+        from neural_compressor.model.onnx_model import ONNXModel
+
+        os.makedirs("gptj_external", exist_ok=True)
+        onnx.save_model(
+            copy.deepcopy(self.gptj_model),
+            "gptj_external/decoder_model.onnx",
+            save_as_external_data=True,
+            location="decoder_model.onnx_data",
+            size_threshold=1024,
+        )
+        model = ONNXModel("gptj_external/decoder_model.onnx", load_external_data=False)
+        q_model = rtn_quantize(model, external_data_location="quantized.onnx_data")
+        self.assertTrue(any(node.op_type == "MatMulFpQ4" for node in q_model.nodes()))
+        for tensor in q_model.initializer():
+            if tensor.name.endswith("_shape"):
+                # the int64 shape is kept inline, it has no raw_data to move
+                self.assertEqual(tensor.data_location, onnx.TensorProto.DEFAULT)
+                self.assertEqual(len(tensor.int64_data), 2)
+            elif tensor.name.endswith("_Q4G32"):
+                self.assertEqual(tensor.data_location, onnx.TensorProto.EXTERNAL)
+        shutil.rmtree("gptj_external", ignore_errors=True)
+
 
 if __name__ == "__main__":
     unittest.main()
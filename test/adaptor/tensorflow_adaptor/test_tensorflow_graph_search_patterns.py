@@ -123,6 +123,10 @@ class TestGraphSearchPatterns(unittest.TestCase):
         res = analyzer.query_fusion_pattern_nodes([["MatMul"], ("BiasAdd"), ("Relu")])
         self.assertEqual(3, len(res[0][-1]))
 
+        multi_res = analyzer.query_multi_fusion_pattern_nodes([[["MatMul"], ("BiasAdd"), ("Relu")], [["Relu"]]])
+        self.assertEqual(res, multi_res[0])
+        self.assertEqual(2, len(multi_res[1]))
+
 
 if __name__ == "__main__":
     unittest.main()
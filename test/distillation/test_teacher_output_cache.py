@@ -0,0 +1,139 @@
+import shutil
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from neural_compressor.compression.distillation.criterions import PyTorchKnowledgeDistillationLoss
+from neural_compressor.compression.distillation.teacher_cache import TeacherOutputCache, get_model_hash
+from neural_compressor.config import DistillationConfig, KnowledgeDistillationLossConfig
+from neural_compressor.training import prepare_compression
+
+
+class CountingTeacher(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = nn.Linear(16, 10)
+        self.calls = 0
+
+    def forward(self, x):
+        self.calls += 1
+        return self.fc(x)
+
+
+class TestTeacherOutputCache(unittest.TestCase):
+    cache_dir = "./teacher_cache_tmp"
+
+    def setUp(self):
+        torch.manual_seed(0)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_cache(self):
+        outputs = np.random.default_rng(0).standard_normal((2000, 10)).astype(np.float32)
+        cache = TeacherOutputCache(self.cache_dir, "hash")
+        cache.write(range(0, 100), outputs[:100])
+        cache.write(range(1900, 2000), outputs[1900:])
+        self.assertEqual(len(cache), 200)
+        self.assertTrue(cache.contains([0, 99, 1999]))
+        self.assertFalse(cache.contains([0, 100]))
+        self.assertFalse(cache.contains([5000]))
+        np.testing.assert_array_equal(cache.read([1999, 0]), outputs[[1999, 0]])
+        # reopen with the same teacher
+        cache = TeacherOutputCache(self.cache_dir, "hash")
+        self.assertEqual(len(cache), 200)
+        np.testing.assert_array_equal(cache.read(range(100)), outputs[:100])
+        # reopen with another teacher
+        cache = TeacherOutputCache(self.cache_dir, "new_hash")
+        self.assertEqual(len(cache), 0)
+        self.assertFalse(cache.contains([0]))
+
+    def test_top_k(self):
+        outputs = np.random.default_rng(0).standard_normal((8, 3, 10)).astype(np.float32)
+        cache = TeacherOutputCache(self.cache_dir, "hash", top_k=3, dtype="float16")
+        cache.write(range(8), outputs)
+        result = cache.read(range(8))
+        kept = np.isfinite(result)
+        self.assertTrue((kept.sum(axis=-1) == 3).all())
+        np.testing.assert_allclose(result[kept], outputs[kept], atol=1e-2)
+        self.assertTrue(
+            (outputs[kept].reshape(8, 3, 3).min(axis=-1) >= outputs[~kept].reshape(8, 3, 7).max(axis=-1)).all()
+        )
+
+    def test_model_hash(self):
+        teacher = CountingTeacher()
+        teacher_hash = get_model_hash(teacher)
+        self.assertEqual(teacher_hash, get_model_hash(teacher))
+        with torch.no_grad():
+            teacher.fc.bias[0] += 1
+        self.assertNotEqual(teacher_hash, get_model_hash(teacher))
+
+    def test_distillation_with_cache(self):
+        teacher = CountingTeacher()
+        inputs, labels = torch.randn(32, 16), torch.randint(0, 10, (32,))
+        criterion_conf = KnowledgeDistillationLossConfig(teacher_cache_dir=self.cache_dir)
+        compression_manager = prepare_compression(nn.Linear(16, 10), DistillationConfig(teacher, criterion_conf))
+        model = compression_manager.model
+        losses = []
+        for epoch in range(2):
+            for i in range(0, 32, 8):
+                output = model(inputs[i : i + 8])
+                loss = nn.functional.cross_entropy(output, labels[i : i + 8])
+                loss = compression_manager.callbacks.on_after_compute_loss(
+                    inputs[i : i + 8], output, loss, sample_indices=list(range(i, i + 8))
+                )
+                losses.append(loss.item())
+        self.assertEqual(teacher.calls, 4)
+        self.assertEqual(losses[:4], losses[4:])
+
+    def test_hook_without_sample_indices(self):
+        teacher = CountingTeacher()
+        compression_manager = prepare_compression(nn.Linear(16, 10), DistillationConfig(teacher))
+        hook_args = []
+
+        def on_after_compute_loss(input, student_output, student_loss, teacher_output=None):
+            hook_args.append(teacher_output)
+            return student_loss
+
+        callbacks = compression_manager.callbacks.callbacks_list[0]
+        callbacks.register_hook("on_after_compute_loss", on_after_compute_loss)
+        inputs = torch.randn(8, 16)
+        output = compression_manager.model(inputs)
+        loss = compression_manager.callbacks.on_after_compute_loss(inputs, output, output.sum())
+        self.assertEqual(hook_args, [None])
+        self.assertEqual(teacher.calls, 1)
+        self.assertTrue(torch.is_tensor(loss))
+
+    def test_cache_teacher_outputs(self):
+        teacher = CountingTeacher()
+        dataloader = [(torch.randn(8, 16), None) for _ in range(4)]
+        criterion = PyTorchKnowledgeDistillationLoss(teacher_model=teacher, teacher_cache_dir=self.cache_dir)
+        criterion.cache_teacher_outputs(dataloader)
+        self.assertEqual(teacher.calls, 4)
+        self.assertEqual(len(criterion.teacher_output_cache), 32)
+        outputs = criterion.teacher_model_forward(dataloader[1][0], sample_indices=range(8, 16))
+        self.assertEqual(teacher.calls, 4)
+        self.assertTrue(torch.equal(outputs, teacher.fc(dataloader[1][0]).detach()))
+        # a new run reuses the cache
+        criterion = PyTorchKnowledgeDistillationLoss(teacher_model=teacher, teacher_cache_dir=self.cache_dir)
+        criterion.cache_teacher_outputs(dataloader)
+        self.assertEqual(teacher.calls, 4)
+
+    def test_cache_without_sample_indices(self):
+        teacher = CountingTeacher()
+        criterion = PyTorchKnowledgeDistillationLoss(teacher_model=teacher, teacher_cache_dir=self.cache_dir)
+        inputs = torch.randn(8, 16)
+        with mock.patch("neural_compressor.compression.distillation.criterions.logger") as mock_logger:
+            for _ in range(3):
+                criterion.teacher_model_forward(inputs)
+        self.assertEqual(teacher.calls, 3)
+        self.assertEqual(len(criterion.teacher_output_cache), 0)
+        self.assertEqual(mock_logger.warning.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
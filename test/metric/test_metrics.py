@@ -7,7 +7,7 @@ import numpy as np
 
 from neural_compressor.metric import METRICS
 from neural_compressor.metric.evaluate_squad import evaluate as evaluate_squad
-from neural_compressor.metric.f1 import evaluate
+from neural_compressor.metric.f1 import evaluate, f1_score
 
 
 class InCorrectMetric:
@@ -29,6 +29,19 @@ class CorrectMetric:
         self.item = []
 
 
+class FakeHvd:
+    """Gather the objects of this rank with the ones another rank passes in the same order."""
+
+    def __init__(self, other_rank_objects):
+        self.other_rank_objects = list(other_rank_objects)
+
+    def size(self):
+        return 2
+
+    def allgather_object(self, obj):
+        return [obj, self.other_rank_objects.pop(0)]
+
+
 class TestMetrics(unittest.TestCase):
 
     def testmIOU(self):
@@ -1137,6 +1150,72 @@ class TestMetrics(unittest.TestCase):
         loss.update(predicts, labels)
         self.assertEqual(loss.result(), 0.5)
 
+    def test_accumulated_metrics(self):
+        metrics = METRICS("onnxrt_qlinearops")
+        acc = metrics["Accuracy"]()
+        acc.update([[0.2, 0.8], [0.9, 0.1]], [1, 1])
+        acc.update([[0.6, 0.4], [0.3, 0.7], [0.5, 0.5]], [0, 1, 1])
+        self.assertEqual(acc.sample, 5)
+        self.assertEqual(acc.result(), 0.6)
+        # binary preds of shape (N, 1) are compared with labels of shape (N,) element by element
+        acc.reset()
+        acc.update(np.array([[1], [0], [1]]), np.array([1, 1, 1]))
+        acc.update(np.array([[0]]), np.array([0]))
+        self.assertEqual(acc.result(), 0.75)
+
+        mae = metrics["MAE"]()
+        mae.update([1, 2, 3], [1, 1, 1])
+        mae.update(np.array([[0.5, 1.5], [2.0, 4.0]]), np.array([[1.0, 1.0], [1.0, 1.0]]))
+        self.assertEqual(mae.aes_size, 7)
+        self.assertAlmostEqual(mae.result(), 8.0 / 7)
+
+        mse = metrics["MSE"]()
+        rmse = metrics["RMSE"]()
+        for preds, labels in [([1, 2, 3], [1, 1, 1]), (np.array([[3.0, 1.0]]), np.array([[1.0, 1.0]]))]:
+            mse.update(preds, labels)
+            rmse.update(preds, labels)
+        self.assertEqual(mse.squares_size, 5)
+        self.assertAlmostEqual(mse.result(), 9.0 / 5)
+        self.assertAlmostEqual(rmse.result(), np.sqrt(9.0 / 5))
+
+        f1 = metrics["F1"]()
+        self.assertTrue(np.isnan(f1.result()))
+        f1.update([1, 1, 0, 1], [1, 1, 0, 1])
+        f1.update([0, 1], [1, 1])
+        self.assertAlmostEqual(f1.result(), (1.0 + 0.5) / 2)
+
+    def test_accumulated_metrics_hvd(self):
+        metrics = METRICS("onnxrt_qlinearops")
+        # two ranks with a batch each give the result of a single process which sees both batches
+        for name, counters, batches in [
+            (
+                "Accuracy",
+                ("correct_num", "sample"),
+                [([[0.2, 0.8], [0.9, 0.1]], [1, 1]), ([[0.6, 0.4], [0.3, 0.7], [0.5, 0.5]], [0, 1, 1])],
+            ),
+            ("MAE", ("aes_sum", "aes_size"), [([1, 2, 3], [1, 1, 1]), ([0, 4], [1, 1])]),
+            ("MSE", ("squares_sum", "squares_size"), [([1, 2, 3], [1, 1, 1]), ([0, 4], [1, 1])]),
+        ]:
+            single, rank0, rank1 = metrics[name](), metrics[name](), metrics[name]()
+            for preds, labels in batches:
+                single.update(preds, labels)
+            rank0.update(*batches[0])
+            rank1.update(*batches[1])
+            rank0._hvd = FakeHvd(getattr(rank1, counter) for counter in counters)
+            self.assertAlmostEqual(rank0.result(), single.result())
+
+        rmse, rank1 = metrics["RMSE"](), metrics["MSE"]()
+        rmse.update([1, 2, 3], [1, 1, 1])
+        rank1.update([3, 1], [1, 1])
+        rmse._hvd = FakeHvd([rank1.squares_sum, rank1.squares_size])
+        self.assertAlmostEqual(rmse.result(), np.sqrt(9.0 / 5))
+
+        # F1 gathers the predictions and labels of every rank in each update
+        f1 = metrics["F1"]()
+        f1._hvd = FakeHvd([[0, 1], [1, 1]])
+        f1.update([1, 1, 0, 1], [1, 1, 0, 1])
+        self.assertAlmostEqual(f1.result(), f1_score([1, 1, 0, 1, 0, 1], [1, 1, 0, 1, 1, 1]))
+
 
 if __name__ == "__main__":
     unittest.main()
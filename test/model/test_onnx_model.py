@@ -1,3 +1,4 @@
+import copy
 import os
 import shutil
 import subprocess
@@ -308,6 +309,97 @@ class TestOnnxModel(unittest.TestCase):
         for init in inits:
             self.assertTrue(init in inits_name)
 
+    def test_indexed_lookup(self):
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 1)
+        self.assertEqual(self.model.get_node("Conv1").op_type, "Conv")
+        self.assertIsNone(self.model.get_node("Conv4"))
+        copied_model = copy.deepcopy(self.model)
+        copied_model.remove_node(copied_model.get_node("Relu1"))
+        self.assertIsNone(copied_model.get_node("Relu1"))
+        self.assertIsNotNone(self.model.get_node("Relu1"))
+
+        # add nodes and initializers without ONNXModel
+        self.model.graph().node.extend([onnx.helper.make_node("Relu", ["X1_weight"], ["relu_output"], name="Relu3")])
+        self.model.initializer().extend([numpy_helper.from_array(np.ones(1, dtype=np.float32), "X6_weight")])
+        self.assertEqual(self.model.get_node("Relu3").input, ["X1_weight"])
+        self.assertIsNotNone(self.model.get_initializer("X6_weight"))
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 2)
+
+        # rename a node and replace an input in place
+        self.model.get_node("Relu3").name = "Relu3_quant"
+        self.assertIsNone(self.model.get_node("Relu3"))
+        self.assertEqual(self.model.get_node("Relu3_quant").op_type, "Relu")
+        self.model.get_node("Relu3_quant").input[0] = "X6_weight"
+        self.model.update_node_inputs(self.model.get_node("Relu3_quant"))
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 1)
+        self.assertEqual(self.model.get_initializer_share_num("X6_weight"), 1)
+        self.model.graph().node.extend([onnx.helper.make_node("Relu", ["relu_output"], ["relu4_output"], name="Relu4")])
+        self.assertEqual(self.model.get_initializer_share_num("X6_weight"), 1)
+        self.model.get_node("Relu4").input[0] = "X6_weight"
+        self.model.update_node_inputs(self.model.get_node("Relu4"))
+        self.assertEqual(self.model.get_initializer_share_num("X6_weight"), 2)
+        self.model.replace_node_input(self.model.get_node("Relu1"), self.model.get_node("Relu1").input[0], "X6_weight")
+        self.assertEqual(self.model.get_initializer_share_num("X6_weight"), 3)
+
+        # remove a copy and the indexed elements
+        self.model.remove_node(copy.deepcopy(self.model.get_node("Relu3_quant")))
+        self.model.remove_nodes(
+            [self.model.get_node("Conv3"), self.model.get_node("Add"), self.model.get_node("Relu4")]
+        )
+        self.model.remove_initializers(
+            [self.model.get_initializer("X5_weight"), self.model.get_initializer("X6_weight")]
+        )
+        self.assertEqual([node.name for node in self.model.nodes()], ["Relu1", "Conv1", "Relu2", "Conv2"])
+        self.assertEqual(len(self.model.initializer()), 5)
+        self.assertIsNone(self.model.get_node("Add"))
+        self.assertIsNone(self.model.get_initializer("X5_weight"))
+        self.assertEqual(self.model.get_initializer_share_num("X6_weight"), 0)
+
+        self.model.set_initializer("X1_bias", np.zeros(3, dtype=np.float32))
+        self.assertEqual(numpy_helper.to_array(self.model.get_initializer("X1_bias")).tolist(), [0.0, 0.0, 0.0])
+
+    def test_set_initializer(self):
+        weight = np.random.randn(3, 3, 1, 1)
+        self.model.set_initializer("X1_weight", weight)
+        tensor = self.model.get_initializer("X1_weight")
+        self.assertEqual(tensor.data_type, TensorProto.FLOAT)
+        self.assertEqual(len(tensor.float_data), 0)
+        np.testing.assert_array_equal(numpy_helper.to_array(tensor), weight.astype(np.float32))
+        self.assertIs(self.model.initializer()[-1], tensor)
+
+        # the values of a typed field are replaced
+        self.model.initializer().extend([helper.make_tensor("X6_weight", TensorProto.INT8, [2], [1, 2])])
+        self.model.set_initializer("X6_weight", np.array([-3, 4]))
+        np.testing.assert_array_equal(numpy_helper.to_array(self.model.get_initializer("X6_weight")), [-3, 4])
+        self.model.set_initializer("X6_weight", np.array([5, 6], dtype=np.int8), raw=True)
+        np.testing.assert_array_equal(numpy_helper.to_array(self.model.get_initializer("X6_weight")), [5, 6])
+
+        # no numpy dtype for bfloat16
+        self.model.initializer().extend([helper.make_tensor("X7_weight", TensorProto.BFLOAT16, [2], [1.0, 2.0])])
+        self.model.set_initializer("X7_weight", np.array([0.5, -2.0], dtype=np.float32))
+        tensor = self.model.get_initializer("X7_weight")
+        self.assertEqual(tensor.data_type, TensorProto.BFLOAT16)
+        self.assertEqual(list(tensor.int32_data), [16128, 49152])  # 0x3F00, 0xC000
+
+    def test_set_external_initializer(self):
+        from onnx.external_data_helper import convert_model_to_external_data, write_external_data_tensors
+
+        os.makedirs("external_init", exist_ok=True)
+        convert_model_to_external_data(self.model.model, location="weights.pb", size_threshold=0)
+        write_external_data_tensors(self.model.model, "external_init")
+        with open("external_init/weights.pb", "rb") as f:
+            data = f.read()
+        self.assertEqual(self.model.get_initializer("X1_bias").data_location, TensorProto.EXTERNAL)
+
+        self.model.set_initializer("X1_bias", np.ones(3))
+        tensor = self.model.get_initializer("X1_bias")
+        self.assertEqual(tensor.data_location, TensorProto.DEFAULT)
+        self.assertEqual(len(tensor.external_data), 0)
+        self.assertEqual(numpy_helper.to_array(tensor).tolist(), [1.0, 1.0, 1.0])
+        with open("external_init/weights.pb", "rb") as f:
+            self.assertEqual(f.read(), data)
+        shutil.rmtree("external_init", ignore_errors=True)
+
     def test_input_name_to_nodes(self):
         self.assertEqual(len(self.model.input_name_to_nodes), 12)
         ipts_name = [name for name in self.model.input_name_to_nodes]
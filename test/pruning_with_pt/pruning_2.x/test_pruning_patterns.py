@@ -68,6 +68,41 @@ class TestPruningPatterns(unittest.TestCase):
         compression_manager.callbacks.on_before_eval()
         compression_manager.callbacks.on_after_eval()
 
+    def test_global_kthvalue(self):
+        from neural_compressor.compression.pruner.utils import global_kthvalue
+
+        torch.manual_seed(0)
+        scores = [
+            torch.randn(64, 32).abs(),
+            torch.randn(128) * (torch.rand(128) > 0.5),
+            torch.randint(0, 4, (16, 16)).float(),
+        ]
+        global_scores = torch.cat([torch.flatten(score) for score in scores])
+        for k in [1, 100, 1000, global_scores.numel()]:
+            expected, _ = torch.kthvalue(global_scores, k)
+            threshold = global_kthvalue(scores, k, num_bins=16, max_candidates=8)
+            self.assertEqual(threshold.item(), expected.item())
+            threshold = global_kthvalue(scores, k, num_bins=16, max_candidates=8, exact=False)
+            self.assertGreaterEqual(threshold.item(), expected.item())
+
+    def test_packed_masks(self):
+        from neural_compressor.compression.pruner.utils import PackedMasks
+
+        torch.manual_seed(0)
+        block_mask = torch.rand(8, 5) > 0.5
+        block_wise = block_mask.repeat_interleave(4, dim=0).repeat_interleave(2, dim=-1)
+        element_wise = torch.rand(32, 10) > 0.5
+        masks = PackedMasks({"fc1": block_wise, "fc2": element_wise}, {"fc1": [4, 2], "fc2": [4, 2]})
+        self.assertTrue(masks.is_packed("fc1"))
+        self.assertFalse(masks.is_packed("fc2"))
+        self.assertTrue(torch.equal(masks["fc1"], block_wise))
+        self.assertTrue(torch.equal(masks["fc2"], element_wise))
+        for key, mask in [("fc1", block_wise), ("fc2", element_wise)]:
+            weight = torch.randn(32, 10)
+            expected = weight * mask
+            masks.mask_weight_(key, weight)
+            self.assertTrue(torch.equal(weight, expected))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import unittest
+
+import torch
+import torch.nn as nn
+
+from neural_compressor.compression.pruner.model_slim.sparse_linear import (
+    SparseLinear,
+    export_sparse_model,
+    load_sparse_model,
+)
+
+
+def build_model():
+    return nn.Sequential(nn.Linear(64, 32), nn.ReLU(), nn.Linear(32, 16), nn.ReLU(), nn.Linear(16, 10))
+
+
+class TestSparseLinear(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        os.makedirs("./sparse_linear_tmp", exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree("./sparse_linear_tmp", ignore_errors=True)
+
+    def test_nxm_pattern(self):
+        for pattern in ["4x1", "2x2", "1x4"]:
+            N, M = [int(size) for size in pattern.split("x")]
+            linear = nn.Linear(64, 32)
+            block_mask = torch.rand(32 // N, 64 // M) > 0.7
+            linear.weight.data *= block_mask.repeat_interleave(N, dim=0).repeat_interleave(M, dim=-1)
+            sparse_linear = SparseLinear.from_linear(linear, pattern)
+            self.assertEqual(sparse_linear.pattern, pattern)
+            self.assertTrue(torch.equal(sparse_linear.to_dense(), linear.weight.data))
+            x = torch.randn(2, 3, 64)
+            self.assertTrue(torch.allclose(sparse_linear(x), linear(x), atol=1e-6))
+        self.assertIsNone(SparseLinear.from_linear(nn.Linear(64, 30), "4x1"))
+
+    def test_n_in_m_pattern(self):
+        linear = nn.Linear(64, 32, bias=False)
+        groups = linear.weight.data.reshape(32, 16, 4)
+        groups.scatter_(-1, torch.rand(groups.shape).argsort(dim=-1)[..., :2], 0)
+        sparse_linear = SparseLinear.from_linear(linear, "2:4")
+        self.assertEqual(sparse_linear.pattern, "2:4")
+        self.assertEqual(sparse_linear.values.numel(), 32 * 32)
+        self.assertTrue(torch.equal(sparse_linear.to_dense(), linear.weight.data))
+        x = torch.randn(5, 64)
+        self.assertTrue(torch.allclose(sparse_linear(x), linear(x), atol=1e-6))
+        # a dense group doesn't fit 2:4
+        self.assertIsNone(SparseLinear.from_linear(nn.Linear(64, 32), "2:4"))
+
+    def test_export_and_load(self):
+        model = build_model()
+        for layer in [model[0], model[2]]:
+            out_features, in_features = layer.weight.shape
+            layer.weight.data *= (torch.rand(out_features // 4, in_features) > 0.8).repeat_interleave(4, dim=0)
+        x = torch.randn(4, 64)
+        expected = model(x)
+        export_sparse_model(model, "4x1", layer_names=["0", "2"])
+        self.assertIsInstance(model[0], SparseLinear)
+        self.assertIsInstance(model[2], SparseLinear)
+        self.assertIsInstance(model[4], nn.Linear)
+        self.assertTrue(torch.allclose(model(x), expected, atol=1e-6))
+        torch.save(model.state_dict(), "./sparse_linear_tmp/model.pt")
+        new_model = load_sparse_model(build_model(), "./sparse_linear_tmp/model.pt")
+        self.assertIsInstance(new_model[0], SparseLinear)
+        self.assertTrue(torch.allclose(new_model(x), expected, atol=1e-6))
+
+    def test_export_skip_dense_layers(self):
+        model = build_model()
+        model[0].weight.data *= (torch.rand(32, 64 // 4) > 0.8).repeat_interleave(4, dim=-1)
+        model[2].weight.data *= (torch.rand(16, 32 // 4) > 0.3).repeat_interleave(4, dim=-1)
+        # the unpruned and the lightly pruned layers are kept dense
+        export_sparse_model(model, "1x4")
+        self.assertIsInstance(model[0], SparseLinear)
+        self.assertIsInstance(model[2], nn.Linear)
+        self.assertIsInstance(model[4], nn.Linear)
+        export_sparse_model(model, "1x4", min_sparsity=0.0)
+        self.assertIsInstance(model[2], SparseLinear)
+        self.assertIsInstance(model[4], SparseLinear)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for KL divergence threshold."""
+
+import unittest
+
+import numpy as np
+
+from neural_compressor.utils.kl_divergence import KL_Divergence
+
+
+class TestKLDivergence(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.datas = [
+            rng.standard_normal(20000),
+            rng.laplace(size=20000),
+            np.maximum(rng.standard_normal(20000), 0),
+            rng.standard_t(2, size=20000),
+            rng.standard_normal(20000) * (rng.random(20000) < 0.05),
+        ]
+
+    def test_vectorized_threshold(self):
+        kl = KL_Divergence()
+        for num_bins in [512, 2048]:
+            for data in self.datas:
+                min_val, max_val = data.min(), data.max()
+                th = max(abs(min_val), abs(max_val))
+                hist, hist_edges = np.histogram(data, num_bins, range=(0 if min_val >= 0 else -th, th))
+                for num_quantized_bins in [255, 127]:
+                    expected = kl.get_threshold(
+                        hist, hist_edges, min_val, max_val, num_bins, "int8", num_quantized_bins, vectorized=False
+                    )
+                    result = kl.get_threshold(hist, hist_edges, min_val, max_val, num_bins, "int8", num_quantized_bins)
+                    self.assertEqual(result, expected)
+
+    def test_float_histogram(self):
+        kl = KL_Divergence()
+        data = self.datas[0]
+        hist, hist_edges = np.histogram(data, 512, range=(-abs(data).max(), abs(data).max()))
+        hist = hist.astype(np.float32) * 0.5
+        expected = kl.get_threshold(hist, hist_edges, data.min(), data.max(), 512, "int8", vectorized=False)
+        result = kl.get_threshold(hist, hist_edges, data.min(), data.max(), 512, "int8")
+        self.assertEqual(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
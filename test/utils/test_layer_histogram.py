@@ -119,6 +119,22 @@ class CollectLayerHistogram(unittest.TestCase):
             self.layer_histogram_collector.hist_dict.keys(),
         )
 
+    def test_layer_histogram_num_workers(self):
+        self.layer_histogram_collector.collect()
+        collector = LayerHistogramCollector(
+            num_bins=8001,
+            layer_tensor=self.layer_histogram_collector.layer_tensor,
+            include_layer=self.layer_histogram_collector.include_layer,
+            num_workers=4,
+        )
+        collector.collect()
+        self.assertEqual(list(collector.hist_dict.keys()), list(self.layer_histogram_collector.hist_dict.keys()))
+        for name, histogram in collector.hist_dict.items():
+            expected = self.layer_histogram_collector.hist_dict[name]
+            np.testing.assert_array_equal(histogram[0], expected[0])
+            np.testing.assert_array_equal(histogram[1], expected[1])
+            self.assertEqual(histogram[2:], expected[2:])
+
 
 if __name__ == "__main__":
     unittest.main()